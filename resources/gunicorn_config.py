@@ -1,4 +1,9 @@
 bind    =   "0.0.0.0:8080"
 workers =   4
-threads =   2
-timeout =   120
\ No newline at end of file
+# As many as the database connections pooled per worker, READ_ONLY_POOL_SIZE.
+threads =   4
+timeout =   120
+
+# Create the app, and with it the in-memory coverage, once before forking
+# the workers so they share its arrays.
+preload_app = True
@@ -18,6 +18,7 @@ LOG_DIR=$OUTPUT_DIR/$LOGS
 STATIC_DIR=$OUTPUT_DIR/$STATIC
 
 DATABASE_DIR=$OUTPUT_DIR/$DB
+PROJECTS_DIR=$OUTPUT_DIR/projects
 DATABASE_PATH=$DATABASE_DIR/combined.sqlite
 
 projects=(
@@ -55,15 +56,20 @@ echo ${projects[@]}
 mkdir -p "$OUTPUT_DIR"
 mkdir -p "$COVERAGE_DIR"
 mkdir -p "$DATABASE_DIR"
+mkdir -p "$PROJECTS_DIR"
 mkdir -p "$STATIC_DIR"
 mkdir -p "$LOG_DIR"
 
 trap "kill 0" EXIT
 
+# The projects are linked into a single directory and stored with one bulk
+# load, so the coverage indexes are rebuilt once instead of per project.
 for project in ${projects[@]};
 do
-   matrix db --project "$COVERAGE_DIR/$project" "$DATABASE_PATH" > "$LOG_DIR/$project-db.logs" 2>&1
+   ln -s "$COVERAGE_DIR/$project" "$PROJECTS_DIR/$project"
 done
 
+matrix db --bulk-load --all "$PROJECTS_DIR" "$DATABASE_PATH" > "$LOG_DIR/db.logs" 2>&1
+
 matrix extract "$DATABASE_PATH" "$STATIC_DIR" > "$LOG_DIR/extract.logs" 2>&1
 
@@ -22,8 +22,13 @@ setup(
         'python-dotenv==0.15',
         'tqdm==4.62.3',
         'MarkupSafe==2.0.1',
-        'gunicorn==20.1.0'
+        'gunicorn==20.1.0',
+        'numpy>=1.22'
     ],
+    extras_require = {
+        # Encodes the JSON responses faster, the standard library is used without it.
+        'fast': ['orjson'],
+    },
     python_requires=">=3.8",
     tests_require = [
         'pytest',
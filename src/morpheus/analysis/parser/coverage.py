@@ -0,0 +1,101 @@
+import numpy as np
+from typing import List, Tuple
+from morpheus.database.models.methods import TestMethod
+
+
+class CoverageBatch():
+    """
+    Columnar representation of the lines covered by the tests of a single
+    tacoco run. Every covered line is one position in the parallel arrays.
+
+    - test_idx: index into `tests`
+    - source_idx: index into `source_files`
+    - line_number: covered line within the source file
+    - test_result: result of the test covering the line
+
+    The lines of a source file are contiguous, those of source i are the
+    positions source_ptr[i] to source_ptr[i + 1].
+    """
+    def __init__(self,
+            tests: List[Tuple[TestMethod, bool]],
+            source_files: List[str],
+            test_idx: np.ndarray,
+            source_idx: np.ndarray,
+            line_number: np.ndarray,
+            test_result: np.ndarray,
+            source_ptr: np.ndarray
+        ):
+        self.tests = tests
+        self.source_files = source_files
+        self.test_idx = test_idx
+        self.source_idx = source_idx
+        self.line_number = line_number
+        self.test_result = test_result
+        self.source_ptr = source_ptr
+
+    def __len__(self):
+        return len(self.line_number)
+
+
+class CoverageBatchBuilder():
+    """
+    Collects the coverage of tacoco sources one at a time and turns it into a
+    single CoverageBatch.
+    """
+    def __init__(self):
+        self.__source_files: List[str] = []
+        self.__test_ids: List[np.ndarray] = []
+        self.__source_ids: List[np.ndarray] = []
+        self.__line_numbers: List[np.ndarray] = []
+
+    def add_source(self, full_name: str, first_line: int, activating_tests: List[int], test_stmt_matrix: List[List[bool]], known_tests: np.ndarray):
+        if not activating_tests or not test_stmt_matrix:
+            return
+
+        matrix = self.__to_matrix(test_stmt_matrix)
+        activating = np.asarray(activating_tests[:len(matrix)], dtype=np.int64)
+
+        # Drop the rows of tests that could not be parsed.
+        known = np.isin(activating, known_tests)
+        rows, columns = np.nonzero(matrix[:len(activating)][known])
+
+        if len(rows) == 0:
+            return
+
+        source_id = len(self.__source_files)
+        self.__source_files.append(full_name)
+        self.__test_ids.append(activating[known][rows])
+        self.__source_ids.append(np.full(len(rows), source_id, dtype=np.int32))
+        self.__line_numbers.append((columns + first_line).astype(np.int32))
+
+    @staticmethod
+    def __to_matrix(test_stmt_matrix: List[List[bool]]) -> np.ndarray:
+        try:
+            return np.asarray(test_stmt_matrix, dtype=bool)
+        except ValueError:
+            # Rows of unequal length, pad them with uncovered lines.
+            matrix = np.zeros((len(test_stmt_matrix), max(map(len, test_stmt_matrix))), dtype=bool)
+            for i, row in enumerate(test_stmt_matrix):
+                matrix[i, :len(row)] = row
+            return matrix
+
+    def build(self, test_map: dict) -> CoverageBatch:
+        if not self.__line_numbers:
+            return CoverageBatch([], [], *(np.empty(0, dtype=dtype) for dtype in (np.int32, np.int32, np.int32, bool)), np.zeros(1, dtype=np.int64))
+
+        test_ids = np.concatenate(self.__test_ids)
+
+        # Only keep the tests that cover at least one line and renumber them.
+        unique_test_ids, test_idx = np.unique(test_ids, return_inverse=True)
+        tests = [test_map[test_id] for test_id in unique_test_ids.tolist()]
+        results = np.fromiter((result for _, result in tests), dtype=bool, count=len(tests))
+
+        return CoverageBatch(
+            tests=tests,
+            source_files=self.__source_files,
+            test_idx=test_idx.astype(np.int32),
+            source_idx=np.concatenate(self.__source_ids),
+            line_number=np.concatenate(self.__line_numbers),
+            test_result=results[test_idx],
+            source_ptr=np.concatenate(([0], np.cumsum([len(lines) for lines in self.__line_numbers])))
+        )
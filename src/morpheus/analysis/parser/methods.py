@@ -1,10 +1,20 @@
-from morpheus.database.models.methods import ProdMethod, ProdMethodVersion
+from morpheus.database.models.methods import CommitMethodVersion, ProdMethod, ProdMethodVersion, SourceFile
 from morpheus.database.models.repository import Commit, Project
+from morpheus.database.identity import ProjectIdentities
+from morpheus.database.util import insert_many
 from typing import Dict, List, Tuple
+import hashlib
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+COMMIT_METHOD_VERSION_COLUMNS = ('commit_id', 'method_version_id')
+
+# Keys of a version reported by the method parser, any other key is hashed as
+# further content of the version.
+VERSION_KEYS = ('lineStart', 'lineEnd', 'properties')
+
 class MethodParser():
 
     def __parse_single_method(self, method_dict : Dict) -> Tuple[ProdMethod, ProdMethodVersion]:
@@ -20,11 +30,34 @@ class MethodParser():
         version = ProdMethodVersion(
             line_start=int(versions['lineStart']),
             line_end=int(versions['lineEnd']),
-            file_path=method_dict['filePath'],
+            source_file=SourceFile(path=method_dict['filePath']),
+            content_hash=self.__content_hash(method_dict['filePath'], versions)
         )
 
         return prod_method, version
 
+    def __content_hash(self, file_path: str, version_dict: Dict) -> str:
+        """
+        Hash of everything known about the content of a method version. The
+        method parser does not report the body itself, so a body that changes
+        without changing the lines or the properties keeps its version, unless
+        the version reports more, e.g., a hash of the body.
+        """
+        content = [
+            file_path,
+            int(version_dict['lineStart']),
+            int(version_dict['lineEnd']),
+            version_dict.get('properties')
+        ]
+
+        # Only added when present, so the hashes of existing versions do not change.
+        if (extra := {key: value for key, value in version_dict.items() if key not in VERSION_KEYS}):
+            content.append(extra)
+
+        content = json.dumps(content, sort_keys=True)
+
+        return hashlib.sha1(content.encode()).hexdigest()
+
     def parse(self, methods_dict: List[Dict]) -> List[Tuple[ProdMethod, ProdMethodVersion]]:
         test_filter = lambda m: not "test" in m["filePath"]
         methods = list(filter(test_filter, methods_dict))
@@ -35,37 +68,46 @@ class MethodParser():
 
         return list(map(lambda method_dict : self.__parse_single_method(method_dict), methods))
 
-    def store(self, session, project: Project, commit: Commit, methods: List[Tuple[ProdMethod, ProdMethodVersion]]):
-        method_count = session.query(ProdMethod).count()
-        logger.info('Number of methods stored in DB: %s', method_count)
+    def store(self, session, project: Project, commit: Commit, methods: List[Tuple[ProdMethod, ProdMethodVersion]], identities: ProjectIdentities=None):
+        if identities is None:
+            identities = ProjectIdentities(project.id)
+
         logger.info('Number of methods in commit: %s', len(methods))
 
-        for method, _ in methods:
+        method_ids = identities.methods.resolve(session, [
+            {
+                'method_name': method.method_name,
+                'method_decl': method.method_decl,
+                'class_name': method.class_name,
+                'package_name': method.package_name,
+            }
+            for method, _ in methods
+        ])
+        logger.info('Number of methods stored in DB: %s', len(identities.methods))
+
+        source_file_ids = identities.source_files.resolve(session, [{'path': version.source_file.path} for _, version in methods])
+
+        versions = []
+        for (method, version), method_id, source_file_id in zip(methods, method_ids, source_file_ids):
             method.project_id = project.id # type: ignore
 
-            if (method_id := session.query(ProdMethod.id) \
-                .filter(
-                    ProdMethod.project_id==method.project_id,
-                    ProdMethod.method_name==method.method_name,
-                    ProdMethod.method_decl==method.method_decl,
-                    ProdMethod.class_name==method.class_name,
-                    ProdMethod.package_name==method.package_name,
-                ).scalar()) is None:
-
-                session.add(method)
-            else:
-                method.id = method_id
-        
-        session.commit()
-
-        for method, version in methods:
-            if method.id is None:
+            if method_id is None:
                 logger.error("Method not stored in database %s.%s.%s project_id: %s", method.package_name, method.class_name, method.method_decl, method.project_id)
                 continue
 
-            version.method_id = method.id # type: ignore
-            version.commit_id = commit.id # type: ignore
-
-            session.add(version)
-
-        session.commit()
+            method.id = method_id
+            versions.append({
+                'method_id': method_id,
+                'commit_id': commit.id,
+                'line_start': version.line_start,
+                'line_end': version.line_end,
+                'source_file_id': source_file_id,
+                'content_hash': version.content_hash,
+            })
+
+        # Versions of methods that did not change are shared with earlier commits.
+        version_ids = identities.versions.resolve(session, versions)
+        logger.info('Number of method versions stored in DB: %s', len(identities.versions))
+
+        members = sorted({(commit.id, version_id) for version_id in version_ids if version_id is not None})
+        insert_many(session, CommitMethodVersion.__table__, COMMIT_METHOD_VERSION_COLUMNS, members)
@@ -1,7 +1,8 @@
 import re
 from enum import Enum
+from functools import lru_cache
 import logging
-from typing import Tuple
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -13,53 +14,89 @@ class TestEngine(Enum):
     NOENGINE  = 'noengine',
 
 
+ENGINES = {
+    'junit-jupiter': TestEngine.JUPITER,
+    'junit-vintage': TestEngine.VINTAGE,
+}
+
+ENGINE_PATTERN = re.compile(r'engine:([a-zA-Z]+-*[a-zA-Z]+)')
+ENGINE_SEGMENT = '[engine:'
+SEGMENT_SEPARATOR = ']/['
+
+# Patterns applied to the value of a single segment, e.g., the value of
+# '[class:org.example.FooTest]' is 'org.example.FooTest'.
+CLASS_PATH_PATTERN = re.compile(r'[\w\._()$]+')
+NESTED_CLASS_PATTERN = re.compile(r'[\w_]+')
+INVOCATION_PATTERN = re.compile(r'#([0-9]+)')
+JUPITER_METHOD_PATTERN = re.compile(r'([\w%=,\-\.,\s\\]+)\([\w\s,.$]*\)')
+JUPITER_TEMPLATE_PATTERN = re.compile(r'([\w%=,\-\.,\s\\]+\([\w\s\-,.$]*\))')
+JUPITER_FACTORY_PATTERN = re.compile(r'([\w%=,\-\.,\s\\]+)\([\w\s\-,.$]*\)')
+VINTAGE_METHOD_PATTERN = re.compile(r'([\w%=,\-\.,\s\\;]+)\([\w\s,.$]*\)')
+VINTAGE_PARAMETER_PATTERN = re.compile(r'([\w%=,\-\.,\s\\\;]+)')
+
+# Patterns applied to the whole test string, without engine it is short.
+NOENGINE_PATH_PATTERN = re.compile(r'[\w\_]+\[*[0-9]*\]*\(([\w\.]+)\)')
+NOENGINE_METHOD_PATTERN = re.compile(r'([\w\_]+)\([\w\.]+\)')
+NOENGINE_PARAMETERIZED_PATTERN = re.compile(r'([\w%=,\-\.,\s\\]+\[[0-9]+\])\([\w\s\-,.$]*\)')
+
+FAILED_TEST_SUFFIX = '_F'
+
+# The same tests show up in every commit of a project.
+PARSE_CACHE_SIZE = 1 << 14
+
+Segments = Dict[str, List[str]]
+
+
 def determine_parsing_engine(test_string: str) -> TestEngine:
-    match_result = re.search(r'engine:([a-zA-Z]+-*[a-zA-Z]+)', test_string)
+    match_result = ENGINE_PATTERN.search(test_string)
 
     if match_result is None:
         return TestEngine.NOENGINE
 
-    engine = match_result.group(1)
-    match engine:
-        case 'junit-jupiter':
-            return TestEngine.JUPITER
-        case 'junit-vintage':
-            return TestEngine.VINTAGE
-        case _:
-            logger.warning("No test engine found: '%s'.", test_string)
-            return TestEngine.NOENGINE
-        
+    return _get_engine(match_result.group(1), test_string)
 
-def parse_tacoco_test_string(test_string: str) -> Tuple[str, str, str, bool]:
-    engine = determine_parsing_engine(test_string)
 
-    (package_name, class_name) = __parse_package_name(engine, test_string)
-    method_name = __parse_method_name(engine, test_string)
-    is_passing = __is_passing_test(test_string)
+def _get_engine(engine: str, test_string: str) -> TestEngine:
+    if (test_engine := ENGINES.get(engine)) is None:
+        logger.warning("No test engine found: '%s'.", test_string)
+        return TestEngine.NOENGINE
 
-    return package_name, class_name, method_name, is_passing
+    return test_engine
 
 
-def __parse_package_name(engine, test_method):
-    path: str = ''
-    nested = None
-    match engine:
-        case TestEngine.JUPITER:
-            path = re.search(r'class:([\w\._()$]+)', test_method).group(1)
-            if path is None:
-                path = re.search(r'runner:([\w\._()$]+)', test_method).group(1)
-
-            if (result := re.findall(r'nested-class:([\w_]+)', test_method)):
-                nested = [f'[{a}' for a in result]
-                nested.extend([']'] * len(result))
-                nested = ''.join(nested)
-
-        case TestEngine.VINTAGE:
-            path = re.search(r'runner:([\w\._()$]+)', test_method).group(1)
-        case TestEngine.NOENGINE:
-            if (path := re.search(r'[\w\_]+\[*[0-9]*\]*\(([\w\.]+)\)', test_method)) is not None:
-                path = path.group(1)
-    
+def _tokenize(test_string: str) -> Tuple[str | None, Segments]:
+    """
+    Split '<display name>.[engine:x]/[kind:value]/...' in its segments in a
+    single pass, returns the engine and the values of the segments per kind.
+    """
+    segments: Segments = {}
+
+    if (start := test_string.find(ENGINE_SEGMENT)) == -1:
+        return None, segments
+
+    end = len(test_string)
+    if test_string.endswith(FAILED_TEST_SUFFIX):
+        end -= len(FAILED_TEST_SUFFIX)
+    if test_string[end - 1] == ']':
+        end -= 1
+
+    for segment in test_string[start + 1:end].split(SEGMENT_SEPARATOR):
+        kind, _, value = segment.partition(':')
+        segments.setdefault(kind, []).append(value)
+
+    return segments['engine'][0], segments
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_tacoco_test_string(test_string: str) -> Tuple[str, str, str, bool]:
+    (engine, segments) = _tokenize(test_string)
+
+    parse = _parse_noengine
+    if engine is not None:
+        parse = ENGINE_PARSERS.get(_get_engine(engine, test_string), _parse_noengine)
+
+    (path, nested, method_name) = parse(test_string, segments)
+
     split_path = path.split('.')
 
     if nested is None:
@@ -67,52 +104,88 @@ def __parse_package_name(engine, test_method):
     else:
         class_name = f"{split_path[-1]}{nested}"
     package_name = '.'.join(split_path[0:len(split_path)-1])
-    return package_name, class_name
-
-
-def __parse_method_name(engine, test_method):
-    method_name = None
-
-    match engine:
-        case TestEngine.JUPITER:
-            # Regular test
-            if (result := re.search(r'method:([\w%=,\-\.,\s\\]+)\([\w\s,.$]*\)', test_method)) is not None:
-                return result.group(1)
-
-            # Parameterized Tests
-            elif (result := re.search(r'test-template:([\w%=,\-\.,\s\\]+\([\w\s\-,.$]*\))', test_method)) is not None:
-                method_name = result.group(1)
-                invocation_number = re.search(r'test-template-invocation:#([0-9]+)', test_method).group(1)
-                return f'{method_name}[{invocation_number}]'
-
-            elif (result := re.search(r'test-factory:([\w%=,\-\.,\s\\]+)\([\w\s\-,.$]*\)', test_method)) is not None:
-                method_name = result.group(1)
-                invocation_number = re.search(r'dynamic-test:#([0-9]+)', test_method).group(1)
-                return f'{method_name}[{invocation_number}]'
-
-        case TestEngine.VINTAGE:
-            results = re.findall(r'(test:)', test_method)
-            match len(results):
-                case 1:
-                    result = re.search(r'test:([\w%=,\-\.,\s\\;]+)\([\w\s,.$]*\)', test_method)
-                    return result.group(1)
-                case 2:
-                    # Paramterized test
-                    result_p1 = re.search(r'test:([\w%=,\-\.,\s\\;]+)\([\w\s,.$]*\)', test_method).group(1)
-                    result_p2 = re.search(r'test:([\w%=,\-\.,\s\\\;]+)', test_method).group(1)
-                    return f"{result_p1}[{result_p2}]"
-                case _:
-                    return test_method.split('.')[0]
-        case TestEngine.NOENGINE:
-            if (result := re.search(r'([\w\_]+)\([\w\.]+\)', test_method)) is not None:
-                return f"{result.group(1)}"
-
-            elif (result := re.search(r'([\w%=,\-\.,\s\\]+\[[0-9]+\])\([\w\s\-,.$]*\)', test_method)) is not None:
-                return f"{result.group(1)}"
+
+    is_passing = not test_string.endswith(FAILED_TEST_SUFFIX)
+
+    return package_name, class_name, method_name, is_passing
+
+
+def _first_match(pattern: re.Pattern, values: List[str]) -> re.Match | None:
+    for value in values:
+        if (result := pattern.match(value)) is not None:
+            return result
+    return None
+
+
+def _class_path(segments: Segments, kind: str) -> str:
+    if (result := _first_match(CLASS_PATH_PATTERN, segments.get(kind, []))) is None:
+        raise Exception(f"Unable to parse {kind}")
+    return result.group(0)
+
+
+def _invocation(segments: Segments, kind: str) -> str:
+    if (result := _first_match(INVOCATION_PATTERN, segments.get(kind, []))) is None:
+        raise Exception(f"Unable to parse {kind}")
+    return result.group(1)
+
+
+def _parse_jupiter(test_string: str, segments: Segments) -> Tuple[str, str | None, str]:
+    path = _class_path(segments, 'class')
+
+    nested = None
+    if (nested_classes := [result.group(0) for value in segments.get('nested-class', []) if (result := NESTED_CLASS_PATTERN.match(value))]):
+        nested = ''.join(f'[{nested_class}' for nested_class in nested_classes) + ']' * len(nested_classes)
+
+    # Regular test
+    if (result := _first_match(JUPITER_METHOD_PATTERN, segments.get('method', []))) is not None:
+        return path, nested, result.group(1)
+
+    # Parameterized Tests
+    elif (result := _first_match(JUPITER_TEMPLATE_PATTERN, segments.get('test-template', []))) is not None:
+        return path, nested, f"{result.group(1)}[{_invocation(segments, 'test-template-invocation')}]"
+
+    elif (result := _first_match(JUPITER_FACTORY_PATTERN, segments.get('test-factory', []))) is not None:
+        return path, nested, f"{result.group(1)}[{_invocation(segments, 'dynamic-test')}]"
+
+    raise Exception("Unable to parse method")
+
+
+def _parse_vintage(test_string: str, segments: Segments) -> Tuple[str, str | None, str]:
+    path = _class_path(segments, 'runner')
+
+    tests = segments.get('test', [])
+    match len(tests):
+        case 1:
+            if (result := _first_match(VINTAGE_METHOD_PATTERN, tests)) is not None:
+                return path, None, result.group(1)
+        case 2:
+            # Paramterized test
+            result_p1 = _first_match(VINTAGE_METHOD_PATTERN, tests)
+            result_p2 = _first_match(VINTAGE_PARAMETER_PATTERN, tests)
+            if result_p1 is not None and result_p2 is not None:
+                return path, None, f"{result_p1.group(1)}[{result_p2.group(1)}]"
+        case _:
+            return path, None, test_string.split('.')[0]
+
+    raise Exception("Unable to parse method")
+
+
+def _parse_noengine(test_string: str, segments: Segments) -> Tuple[str, str | None, str]:
+    if (result := NOENGINE_PATH_PATTERN.search(test_string)) is None:
+        raise Exception("Unable to parse class")
+    path = result.group(1)
+
+    if (result := NOENGINE_METHOD_PATTERN.search(test_string)) is not None:
+        return path, None, result.group(1)
+
+    elif (result := NOENGINE_PARAMETERIZED_PATTERN.search(test_string)) is not None:
+        return path, None, result.group(1)
 
     raise Exception("Unable to parse method")
 
 
-def __is_passing_test(test_method) -> bool:
-    # Parse if test passed or failed
-    return re.search(r'(_F$)', test_method) is None
+ENGINE_PARSERS = {
+    TestEngine.JUPITER: _parse_jupiter,
+    TestEngine.VINTAGE: _parse_vintage,
+    TestEngine.NOENGINE: _parse_noengine,
+}
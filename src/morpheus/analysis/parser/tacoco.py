@@ -1,95 +1,107 @@
-import re
-from sqlalchemy import and_
+import numpy as np
 from sqlalchemy import exc
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+from morpheus.analysis.parser.coverage import CoverageBatch, CoverageBatchBuilder
 from morpheus.analysis.parser.parsing_engines import parse_tacoco_test_string
-from morpheus.database.models.methods import ProdMethodVersion, TestMethod, LineCoverage
+from morpheus.database.models.methods import CommitMethodVersion, LineSet, ProdMethodVersion, TestMethod, LineCoverage
 from morpheus.database.models.repository import Commit, Project
+from morpheus.database.edges import EdgeWriter
+from morpheus.database.identity import ProjectIdentities
+from morpheus.database.lineset import LineCoverageFormat, encode_lines
+from morpheus.database.util import insert_many
 import logging
 import timeit
-from morpheus.analysis.util.memoize import memoize
+from morpheus.analysis.util.json_stream import stream_json_object
+from morpheus.analysis.util.method_index import MethodVersionIndex
 
 logger = logging.getLogger(__name__)
 
+LINE_COVERAGE_COLUMNS = ('commit_id', 'test_id', 'method_version_id', 'line_number', 'test_result', 'source_file_id')
+LINE_SET_COLUMNS = ('commit_id', 'test_id', 'method_version_id', 'lines')
+
 
 class TacocoParser():
-    def parse(self, tacoco_dict: Dict) -> List[Tuple[TestMethod, List[LineCoverage]]]:
+    STREAMED_KEYS = ('testsIndex', 'sources')
+
+    def parse(self, tacoco_dict: Dict) -> CoverageBatch:
+        def _events():
+            yield 'testCount', tacoco_dict.get('testCount', 0)
+            for key in TacocoParser.STREAMED_KEYS:
+                for value in tacoco_dict.get(key, []):
+                    yield key, value
+
+        return self.__parse_events(_events())
+
+    def parse_file(self, tacoco_file: Path) -> CoverageBatch:
+        """
+        Parse the coverage file one test and one source at a time, so the
+        whole file never has to be in memory.
+        """
+        return self.__parse_events(stream_json_object(tacoco_file, TacocoParser.STREAMED_KEYS))
+
+    def __parse_events(self, events: Iterator[Tuple[str, Any]]) -> CoverageBatch:
         logger.info("Start parsing tacoco data...")
 
-        if tacoco_dict.get('testCount', 0) <= 1:
+        test_count = 0
+        test_map: Dict[int, Tuple[TestMethod, bool]] = {}
+        test_idx = 0
+        known_tests = None
+        pending_sources = []
+        builder = CoverageBatchBuilder()
+
+        for key, value in events:
+            match key:
+                case 'testCount':
+                    test_count = value
+                    if test_count <= 1:
+                        logger.error("Bad coverage file")
+                        raise RuntimeError("Bad coverage file")
+
+                # Testcases
+                case 'testsIndex':
+                    try:
+                        test_map[test_idx] = self.__parse_test_method(value)
+                    except:
+                        logger.warning("Failed parsing: %s %s", test_idx, value)
+                    test_idx += 1
+
+                # Coverage, sources listed before the tests are kept until all tests are known.
+                case 'sources':
+                    if test_idx == 0:
+                        pending_sources.append(value)
+                        continue
+
+                    if known_tests is None:
+                        known_tests = np.fromiter(test_map.keys(), dtype=np.int64, count=len(test_map))
+
+                    self.__add_source(builder, value, known_tests)
+
+        if test_count <= 1:
             logger.error("Bad coverage file")
             raise RuntimeError("Bad coverage file")
 
-        # Testcases
-        test_map: Dict[int, Tuple[TestMethod, bool]] = {}
-        if 'testsIndex' in tacoco_dict:
-            for idx, test_string in enumerate(tacoco_dict['testsIndex']):
-                try:
-                    test, result = self.__parse_test_method(test_string)
-                except:
-                    logger.warning("Failed parsing: %s %s", idx, test_string)
-                    continue        
-                test_map[idx] = (test, result)
-        
-        # Coverage
-        coverage: Dict[int, List[LineCoverage]] = dict()
-        if 'sources' in tacoco_dict:
-            for source in tacoco_dict['sources']:
-                start_line: int = source["source"]["firstLine"]
-                
-                # create a map from test to covered lines.
-                testStmtMatrix = source['testStmtMatrix']
-                for test_id, matrix in zip(source['activatingTests'], testStmtMatrix):
-
-                    # Check if test_id is in the map, if not skip it
-                    if test_id not in test_map:
-                        continue
-                    
-                    # Create a representation for each line covered by the test
-                    for i, covered in enumerate(matrix):
-                        line_num = i + start_line
-
-                        #  Skip lines that are not not covered
-                        if not covered:
-                            continue
-
-                        line = LineCoverage(
-                            full_name=source["source"]["fullName"],
-                            line_number=line_num,
-                        )
-                        
-                        # If test case already in coverage add the line so we know it covers muliple lines.
-                        if test_id in coverage:
-                            lines = coverage[test_id]
-                            lines.append(line)
-                            coverage[test_id] = lines
-                        else:
-                            coverage[test_id] = [line]
-
-        # Merge to dictionaries and return a list of tuples
-        def _merge(idx) -> Tuple[TestMethod, List[LineCoverage]]:
-            test : TestMethod
-            test_result: bool
-
-            if idx in test_map and idx in coverage:
-                test, test_result = test_map[idx]
-                line_coverage: List[LineCoverage] = coverage[idx]
-
-                for line in line_coverage: 
-                    line.test_result = test_result # type: ignore
-
-                return test, line_coverage
-
-            raise RuntimeError("Index not found in method")
-
-        test_coverage_map: List[Tuple[TestMethod, List[LineCoverage]]] = list(map(_merge, coverage.keys()))
-        logger.debug("Finished parsing - total testcases:  %s", len(test_coverage_map))
-
-        if not test_coverage_map:
+        known_tests = np.fromiter(test_map.keys(), dtype=np.int64, count=len(test_map))
+        for source in pending_sources:
+            self.__add_source(builder, source, known_tests)
+
+        coverage = builder.build(test_map)
+        logger.debug("Finished parsing - total testcases:  %s, covered lines: %s", len(coverage.tests), len(coverage))
+
+        if not coverage.tests:
             logger.error("No test found by tacoco.")
             raise RuntimeError("No tests found by tacoco.")
 
-        return test_coverage_map
+        return coverage
+
+    def __add_source(self, builder: CoverageBatchBuilder, source: Dict, known_tests: np.ndarray):
+        builder.add_source(
+            full_name=source["source"]["fullName"],
+            first_line=source["source"]["firstLine"],
+            activating_tests=source['activatingTests'],
+            test_stmt_matrix=source['testStmtMatrix'],
+            known_tests=known_tests
+        )
 
     def __parse_test_method(self, test_method: str) -> Tuple[TestMethod, bool]:
         try:
@@ -105,76 +117,114 @@ class TacocoParser():
             session,
             project: Project,
             commit: Commit,
-            coverage: List[Tuple[TestMethod, List[LineCoverage]]]
+            coverage: CoverageBatch,
+            identities: ProjectIdentities=None,
+            line_coverage: LineCoverageFormat=LineCoverageFormat.ROWS,
+            edge_writer: EdgeWriter=None
         ):
+        if identities is None:
+            identities = ProjectIdentities(project.id)
+
+        if edge_writer is None:
+            edge_writer = EdgeWriter()
 
         start_time = timeit.default_timer()
-        for test, _ in coverage:
+        test_ids = identities.tests.resolve(session, [
+            {
+                'package_name': test.package_name,
+                'class_name': test.class_name,
+                'method_name': test.method_name,
+            }
+            for test, _ in coverage.tests
+        ])
+
+        for (test, _), test_id in zip(coverage.tests, test_ids):
             test.project_id = project.id # type: ignore
+            test.id = test_id
 
-            if (test_id := session.query(TestMethod.id)\
-                .filter(
-                    TestMethod.project_id==test.project_id,
-                    TestMethod.package_name==test.package_name,
-                    TestMethod.class_name==test.class_name,
-                    TestMethod.method_name==test.method_name,
-                ).scalar()) is None:
-                session.add(test)
-            else:
-                test.id = test_id
-
-        logger.debug('Iterating through tests: %s', timeit.default_timer() - start_time)
-
-        start_time = timeit.default_timer()
-        session.commit()
         logger.debug('Adding tests to database: %s', timeit.default_timer() - start_time)
 
         start_time = timeit.default_timer()
+        method_index = MethodVersionIndex.from_commit(session, commit.id)
+        logger.debug('Building method version index: %s', timeit.default_timer() - start_time)
 
-        @memoize
-        def __get_method_version_id(commid_id: int, full_name: str, line_number: int):
-            return session.query(ProdMethodVersion.id) \
-                    .filter(
-                        and_(
-                            ProdMethodVersion.commit_id == commid_id,
-                            ProdMethodVersion.file_path.contains(full_name),
-                            ProdMethodVersion.line_start <= line_number,
-                            ProdMethodVersion.line_end >= line_number,
-                        )
-                    ).first()
-
-        try:
-            lines_to_store = []
-            for test, lines in coverage:
-                if test.id is None:
-                    logger.error("Test not stored in database %s.%s.%s project_id: %s", test.package_name, test.class_name, test.method_name, test.project_id)
-                    continue
-
-                for line in lines:
-                    result = __get_method_version_id(commit.id, line.full_name, line.line_number)
-                    if result is None:
-                        # logger.warning("Line version not stored: %s, %s, %s, %s, %s, %s, %s", line.id, line.commit_id, line.test_id, line.method_version_id, line.test_result, line.full_name, line.line_number)
-                        continue
-
-                    try:
-                        (method_version_id,) = result
-                    except:
-                        raise
+        start_time = timeit.default_timer()
 
-                    line.commit_id = commit.id # type: ignore
-                    line.test_id = test.id # type: ignore
-                    line.method_version_id = method_version_id
+        test_ids = np.fromiter((-1 if test.id is None else test.id for test, _ in coverage.tests), dtype=np.int64, count=len(coverage.tests))
+        for test, _ in coverage.tests:
+            if test.id is None:
+                logger.error("Test not stored in database %s.%s.%s project_id: %s", test.package_name, test.class_name, test.method_name, test.project_id)
+
+        # Resolve every distinct line of a source file once.
+        method_version_ids = np.full(len(coverage), -1, dtype=np.int64)
+        for full_name, start, end in zip(coverage.source_files, coverage.source_ptr[:-1].tolist(), coverage.source_ptr[1:].tolist()):
+            lines, inverse = np.unique(coverage.line_number[start:end], return_inverse=True)
+            resolved = np.fromiter(
+                (-1 if (version_id := method_index.lookup(full_name, line)) is None else version_id for line in lines.tolist()),
+                dtype=np.int64,
+                count=len(lines)
+            )
+            method_version_ids[start:end] = resolved[inverse]
+
+        keep = np.flatnonzero((method_version_ids != -1) & (test_ids[coverage.test_idx] != -1))
+        kept_test_ids = test_ids[coverage.test_idx[keep]]
+        kept_version_ids = method_version_ids[keep]
+
+        # One edge per distinct test and method version, a test has the same result for all its lines.
+        (edges, edge_rows, edge_idx) = np.unique(np.stack([kept_test_ids, kept_version_ids]), axis=1, return_index=True, return_inverse=True)
+        method_ids: Dict[int, int] = dict(
+            session.query(ProdMethodVersion.id, ProdMethodVersion.method_id) \
+                .join(CommitMethodVersion, CommitMethodVersion.method_version_id == ProdMethodVersion.id) \
+                .filter(CommitMethodVersion.commit_id == commit.id) \
+                .all()
+        )
+
+        edges_to_store = [
+            (test_id, version_id, method_ids[version_id], test_result)
+            for test_id, version_id, test_result in zip(
+                edges[0].tolist(),
+                edges[1].tolist(),
+                coverage.test_result[keep[edge_rows]].tolist()
+            )
+        ]
+
+        lines_to_store = []
+        line_sets_to_store = []
+        match line_coverage:
+            case LineCoverageFormat.ROWS:
+                source_file_ids = np.array(identities.source_files.resolve(session, [{'path': full_name} for full_name in coverage.source_files]), dtype=np.int64)
+
+                # Insert in primary key order, appending to the clustered index.
+                order = keep[np.lexsort((coverage.line_number[keep], kept_version_ids, kept_test_ids))]
+                lines_to_store = list(zip(
+                    [commit.id] * len(order),
+                    test_ids[coverage.test_idx[order]].tolist(),
+                    method_version_ids[order].tolist(),
+                    coverage.line_number[order].tolist(),
+                    coverage.test_result[order].tolist(),
+                    source_file_ids[coverage.source_idx[order]].tolist(),
+                ))
+
+            case LineCoverageFormat.COMPRESSED:
+                # Group the lines per edge
+                edge_idx = edge_idx.reshape(-1)
+                order = np.argsort(edge_idx, kind='stable')
+                bounds = np.cumsum(np.bincount(edge_idx, minlength=edges.shape[1])).tolist()
+                kept_lines = coverage.line_number[keep][order]
+
+                line_sets_to_store = [
+                    (commit.id, test_id, version_id, encode_lines(kept_lines[start:end]))
+                    for test_id, version_id, start, end in zip(edges[0].tolist(), edges[1].tolist(), [0] + bounds[:-1], bounds)
+                ]
 
-                    lines_to_store.append(line)
+        logger.debug('Iterating through lines: %s', timeit.default_timer() - start_time)
 
-                    # if line.commit_id == 2 and line.test_id == 1 and line.method_version_id == 114  and line.line_number == 119:
-                    #     logger.debug("Test: %s, %s, %s, %s", test.id, test.method_name, test.class_name, test.package_name)
-            session.bulk_save_objects(lines_to_store)
+        start_time = timeit.default_timer()
+        try:
+            edge_writer.store(session, commit, edges_to_store)
+            insert_many(session, LineCoverage.__table__, LINE_COVERAGE_COLUMNS, lines_to_store)
+            insert_many(session, LineSet.__table__, LINE_SET_COLUMNS, line_sets_to_store)
         except exc.IntegrityError as e:
             logger.error(e)
 
-        logger.debug('Iterating through lines: %s', timeit.default_timer() - start_time)
-
-        start_time = timeit.default_timer()
-        session.commit()
-        logger.debug('Adding lines to database: %s', timeit.default_timer() - start_time)
+        logger.debug('Adding edges and lines to database: %s', timeit.default_timer() - start_time)
@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Tuple
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _JsonStream():
+    """
+    Buffered reader over a JSON file that decodes one value at a time, the
+    buffer only holds the value that is currently being decoded.
+    """
+    def __init__(self, f, chunk_size: int):
+        self.__file = f
+        self.__chunk_size = chunk_size
+        self.__decoder = json.JSONDecoder()
+        self.__buffer = ''
+        self.__pos = 0
+        self.__eof = False
+
+    def __read(self, size: int) -> bool:
+        if self.__eof:
+            return False
+
+        # Drop everything that has already been consumed.
+        self.__buffer = self.__buffer[self.__pos:]
+        self.__pos = 0
+
+        if not (chunk := self.__file.read(size)):
+            self.__eof = True
+            return False
+
+        self.__buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        """
+        Return the next non-whitespace character without consuming it.
+        """
+        while True:
+            while self.__pos < len(self.__buffer) and self.__buffer[self.__pos] in _WHITESPACE:
+                self.__pos += 1
+
+            if self.__pos < len(self.__buffer):
+                return self.__buffer[self.__pos]
+
+            if not self.__read(self.__chunk_size):
+                raise ValueError("Unexpected end of JSON file")
+
+    def expect(self, character: str):
+        if (found := self.peek()) != character:
+            raise ValueError(f"Expected '{character}' but found '{found}'")
+        self.__pos += 1
+
+    def decode(self) -> Any:
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+
+                # A number at the end of the buffer might continue in the next chunk.
+                if end < len(self.__buffer) or self.__eof:
+                    self.__pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+
+            # Value is incomplete, grow the buffer geometrically so large
+            # values are not decoded over and over again.
+            self.__read(max(self.__chunk_size, len(self.__buffer) - self.__pos))
+
+
+def stream_json_object(path: Path, streamed_keys: Iterable[str], chunk_size: int=1 << 16) -> Iterator[Tuple[str, Any]]:
+    """
+    Iterate over the (key, value) pairs of the top-level JSON object in the
+    file. The arrays of the streamed keys are not decoded as a whole, instead
+    a (key, element) pair is yielded for each of their elements.
+    """
+    streamed_keys = set(streamed_keys)
+
+    with open(path) as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect('{')
+
+        if stream.peek() == '}':
+            return
+
+        while True:
+            key = stream.decode()
+            stream.expect(':')
+
+            if key in streamed_keys and stream.peek() == '[':
+                stream.expect('[')
+                if stream.peek() != ']':
+                    while True:
+                        yield key, stream.decode()
+                        if stream.peek() != ',':
+                            break
+                        stream.expect(',')
+                stream.expect(']')
+            else:
+                yield key, stream.decode()
+
+            if stream.peek() != ',':
+                break
+            stream.expect(',')
+
+        stream.expect('}')
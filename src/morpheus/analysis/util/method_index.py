@@ -0,0 +1,97 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm.session import Session
+from morpheus.database.models.methods import CommitMethodVersion, ProdMethodVersion, SourceFile
+
+
+class _FileIntervals():
+    """
+    Sorted line intervals of the method versions within a single file.
+    """
+    def __init__(self, intervals: List[Tuple[int, int, int]]):
+        intervals.sort()
+
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end for _, end, _ in intervals]
+        self.ids = [version_id for _, _, version_id in intervals]
+
+        # Running maximum of the end lines, used to stop the backwards scan
+        # as soon as no earlier interval can contain the line anymore.
+        self.max_ends = []
+        max_end = None
+        for end in self.ends:
+            max_end = end if max_end is None else max(max_end, end)
+            self.max_ends.append(max_end)
+
+    def lookup(self, line_number: int) -> Optional[int]:
+        version = None
+
+        idx = bisect_right(self.starts, line_number) - 1
+        while idx >= 0 and self.max_ends[idx] >= line_number:
+            if self.ends[idx] >= line_number:
+                candidate = (self.starts[idx], -self.ends[idx], self.ids[idx])
+                if version is None or candidate < version:
+                    version = candidate
+            idx -= 1
+
+        return None if version is None else version[2]
+
+
+class MethodVersionIndex():
+    """
+    In-memory index that resolves a covered line to the method version
+    containing it, for all method versions of a single commit.
+    """
+    def __init__(self, versions: Iterable[Tuple[int, str, int, int]]):
+        intervals: Dict[str, List[Tuple[int, int, int]]] = {}
+        for version_id, file_path, line_start, line_end in versions:
+            intervals.setdefault(file_path, []).append((line_start, line_end, version_id))
+
+        self.__file_paths = list(intervals.keys())
+        self.__intervals = intervals
+        self.__resolved: Dict[str, Optional[_FileIntervals]] = {}
+
+    @staticmethod
+    def from_commit(session: Session, commit_id: int) -> 'MethodVersionIndex':
+        versions = session.query(
+                ProdMethodVersion.id,
+                SourceFile.path,
+                ProdMethodVersion.line_start,
+                ProdMethodVersion.line_end
+            ) \
+            .join(CommitMethodVersion, CommitMethodVersion.method_version_id == ProdMethodVersion.id) \
+            .join(SourceFile, SourceFile.id == ProdMethodVersion.source_file_id) \
+            .filter(CommitMethodVersion.commit_id == commit_id) \
+            .all()
+
+        return MethodVersionIndex(versions)
+
+    def __resolve_file(self, full_name: str) -> Optional[_FileIntervals]:
+        """
+        Tacoco reports paths relative to the source root, while the method
+        parser reports them relative to the repository. Prefer files that end
+        with the tacoco path and fall back to files containing it.
+        """
+        if full_name in self.__resolved:
+            return self.__resolved[full_name]
+
+        matches = [path for path in self.__file_paths if path.endswith(full_name)]
+        if not matches:
+            matches = [path for path in self.__file_paths if full_name in path]
+
+        file_intervals = None
+        if matches:
+            file_intervals = _FileIntervals([interval for path in matches for interval in self.__intervals[path]])
+
+        self.__resolved[full_name] = file_intervals
+        return file_intervals
+
+    def lookup(self, full_name: str, line_number: int) -> Optional[int]:
+        """
+        Return the id of the method version covering the line, if multiple
+        versions contain the line the outermost one is returned.
+        """
+        if (file_intervals := self.__resolve_file(full_name)) is None:
+            return None
+
+        return file_intervals.lookup(line_number)
@@ -3,12 +3,17 @@ from typing import Dict, List, Tuple
 from flask_restx.resource import Resource
 from morpheus.api.rest import api
 from morpheus.database.db import get_session
+from morpheus.database.edges import history_edges
 from morpheus.database.util import row2dict
 from morpheus.database.models.repository import Project, Commit
-from morpheus.database.models.methods import LineCoverage, ProdMethod, ProdMethodVersion, TestMethod
-from morpheus.api.logic.coverage import MethodCoverageQuery, CommitQuery, ProjectQuery, MethodQuery
+from morpheus.database.models.methods import ProdMethod, TestMethod
+from morpheus.api.logic.coverage import BatchQuery, HistoryQuery, LineCoverageQuery, MethodCoverageQuery, CommitQuery, ProjectQuery, MethodQuery
+from morpheus.api.logic.batch import requested_ids
+from morpheus.api.logic.admission import heavy
+from morpheus.api.logic.cache import cached
+from morpheus.api.logic.store import get_coverage_store
+from morpheus.api.logic.streaming import RowStream, is_streaming, streamed_response
 
-import time
 
 ns = api.namespace(
     name='coverage',
@@ -24,11 +29,18 @@ logger = logging.getLogger(__name__)
 # - Methods v. Tests (given commit)
 # - Tests v. Commits (given method)
 # - Methods v. Commits (given tests)
+# - Covered lines (given commit and test)
+# - Batches of the above (given many commits, methods or tests)
 ###############################################################
 
 @ns.route('/projects/<project_id>/commits/<commit_id>', '/projects/<project_id>/commits/<commit_id>/')
+@cached
+@heavy
 class MethodTestCoverageRoute(Resource):
     def get(self, project_id, commit_id):
+        if (store := get_coverage_store()) is not None and (response := store.commit_coverage(project_id, commit_id)) is not None:
+            return response
+
         Session = get_session()
         project: Project|None = ProjectQuery.get_project(Session, project_id)
 
@@ -40,39 +52,42 @@ class MethodTestCoverageRoute(Resource):
         if commit is None:
             return {"error": f"Commit with id '{commit_id}' was not found..."}, 404
 
-        # tic = time.perf_counter()
-        methods = MethodCoverageQuery.get_methods(Session, project, commit)
-        # toc = time.perf_counter()
-        # method_time = toc - tic
+        if is_streaming():
+            return streamed_response({
+                "project": row2dict(project),
+                "commit": row2dict(commit),
+                "coverage": {
+                    "methods": RowStream(MethodCoverageQuery.stream_methods(Session, project, commit)),
+                    "tests": RowStream(MethodCoverageQuery.stream_tests(Session, project, commit)),
+                    "edges": RowStream(MethodCoverageQuery.stream_edges(Session, commit)),
+                }
+            })
 
-        # tic = time.perf_counter()
+        methods = MethodCoverageQuery.get_methods(Session, project, commit)
         tests = MethodCoverageQuery.get_tests(Session, project, commit)
-        # toc = time.perf_counter()
-        # tests_time = toc - tic
-        
-        # tic = time.perf_counter()
         edges = MethodCoverageQuery.get_edges(Session, commit)
-        # toc = time.perf_counter()
-        # edges_time = toc - tic
 
-        # logger.debug("Timing: m:%s t:%s e:%s", method_time, tests_time, edges_time)
-        # logger.info("Methods: %s, Tests: %s, Edges: %s", len(methods), len(tests), len(edges))
         return {
             "project": row2dict(project),
             "commit": row2dict(commit),
             "coverage": {
-                "methods": list(map(row2dict, methods)),
-                "tests": list(map(row2dict, tests)),
+                "methods": methods,
+                "tests": tests,
                 "edges": edges,
             }
         }, 200
 
 
 @ns.route('/projects/<project_id>/methods/<method_id>', '/projects/<project_id>/methods/<method_id>/')
+@cached
+@heavy
 class ProdMethodHistoryRoute(Resource):
     @ns.response(200, 'Success')
     @ns.response(404, 'Method not found.')
     def get(self, project_id, method_id):
+        if (store := get_coverage_store()) is not None and (response := store.method_history(project_id, method_id)) is not None:
+            return response
+
         Session = get_session()
 
         project: Project|None = ProjectQuery.get_project(Session, project_id)
@@ -82,23 +97,13 @@ class ProdMethodHistoryRoute(Resource):
         if method is None:
             return {"msg": f'Method with id {method_id} not found...'}, 404
 
-        commits: List[Commit] = []
-
-        versions: List[Tuple[int, int]] = Session.query(ProdMethodVersion.id, ProdMethodVersion.commit_id)\
-            .filter(ProdMethodVersion.method_id==method_id)\
-            .all()
-
-        for _, commit_id in versions:
-            commits.append(CommitQuery.get_commit(Session, commit_id))
+        commits = HistoryQuery.get_method_commits(Session, method.id)
 
 
         if not commits:
             return {'msg': 'Commits not found...'}, 404
 
-        versions_ids = [version_id for version_id, _ in versions]
-        edges = Session.query(LineCoverage.test_id, LineCoverage.commit_id, LineCoverage.test_result) \
-            .filter(LineCoverage.method_version_id.in_(versions_ids)) \
-            .all()
+        edges = [(test_id, commit_id, test_result) for commit_id, (test_id, _, _, test_result) in history_edges(Session, method.project_id, 'method_id', method.id)]
 
         edges_formatted = [{'test_id': test_id, 'commit_id': commit_id, 'test_result': test_result} for test_id, commit_id, test_result in edges]
 
@@ -107,27 +112,29 @@ class ProdMethodHistoryRoute(Resource):
         
         test_ids = set(map(lambda edge: edge[0], edges))
 
-        tests = Session.query(TestMethod) \
-            .filter(TestMethod.project_id == project_id)\
-            .filter(TestMethod.id.in_(test_ids)) \
-            .all()
+        tests = HistoryQuery.get_tests(Session, project_id, test_ids)
 
         return {
             "project": row2dict(project),
             "method": row2dict(method),
             "coverage": {
-                "commits": list(map(row2dict, commits)),
-                "tests": list(map(row2dict, tests)),
+                "commits": commits,
+                "tests": tests,
                 "edges": edges_formatted
             }
         }, 200
 
 
 @ns.route('/projects/<project_id>/tests/<test_id>', '/projects/<project_id>/tests/<test_id>/')
+@cached
+@heavy
 class TestMethodHistoryRoute(Resource):
     @ns.response(200, 'Success')
     @ns.response(404, 'Test not found.')
     def get(self, project_id: int, test_id: int):
+        if (store := get_coverage_store()) is not None and (response := store.test_history(project_id, test_id)) is not None:
+            return response
+
         Session = get_session()
 
         project: Project|None = Session.query(Project) \
@@ -144,63 +151,133 @@ class TestMethodHistoryRoute(Resource):
         if test is None:
             return {"msg": f'Test was not found... test_id: {test_id}'}, 404
 
-        # Covered lines, but filtered to method and commit (so per pair only one covered line)
-        edges: List[Dict] = Session.query(LineCoverage.commit_id, LineCoverage.method_version_id, LineCoverage.test_result) \
-            .filter(LineCoverage.test_id == test.id) \
-            .group_by(LineCoverage.method_version_id, LineCoverage.commit_id) \
-            .all()
+        edges: List[Tuple[int, int, int, bool]] = [
+            (commit_id, method_version_id, method_id, test_result)
+            for commit_id, (_, method_version_id, method_id, test_result) in history_edges(Session, project.id, 'test_id', test.id)
+        ]
 
         if edges is None or len(edges) == 0:
             return {"msg": "Test is not covering any methods."}, 404
 
-        unique_method_version_id = set()
+        unique_method_ids = set()
         unique_commit_ids = set()
 
         edges_formatted = list()
-        for commit_id, method_version_id, result in edges:
-            unique_method_version_id.add(method_version_id)
+        for commit_id, method_version_id, method_id, result in edges:
+            unique_method_ids.add(method_id)
             unique_commit_ids.add(commit_id)
             edges_formatted.append({
                 "commit_id": commit_id,
                 "method_version_id": method_version_id,
+                "method_id": method_id,
                 "test_result": result
             })
 
-        method_query_result = Session.query(ProdMethod, ProdMethodVersion.id) \
-            .join(ProdMethodVersion, ProdMethod.id==ProdMethodVersion.method_id) \
-            .filter(ProdMethodVersion.id.in_(unique_method_version_id)) \
-            .group_by(ProdMethod.id, ProdMethodVersion.id) \
-            .all()
-
-        methods_version_to_global_id_map = {}
-
-        methods = list()
-        method_ids: List[int] = []
-        for method, version_id in method_query_result:
-            if version_id not in methods_version_to_global_id_map:
-                methods_version_to_global_id_map[version_id] = method.id
-
-            # Make sure to only return unique instances of methods.
-            if method.id not in method_ids:
-                methods.append(method)
-                method_ids.append(method.id)
-
-        commits = Session.query(Commit) \
-            .filter(
-                Commit.project_id==project.id,
-                Commit.id.in_(unique_commit_ids)
-            ).all()
-        
-        for edge in edges_formatted:
-            edge['method_id'] = methods_version_to_global_id_map[edge['method_version_id']]
+        methods = HistoryQuery.get_methods(Session, unique_method_ids)
+
+        commits = HistoryQuery.get_commits(Session, project.id, unique_commit_ids)
 
 
         return {
             "project": row2dict(project),
             "test": row2dict(test),
             "coverage": {
-                "commits": list(map(row2dict, commits)),
-                "methods": list(map(row2dict, methods)),
+                "commits": commits,
+                "methods": methods,
                 "edges": edges_formatted,
             }
         }, 200
+
+
+@ns.route('/projects/<project_id>/commits/<commit_id>/tests/<test_id>', '/projects/<project_id>/commits/<commit_id>/tests/<test_id>/')
+@cached
+@heavy
+class LineCoverageRoute(Resource):
+    @ns.response(200, 'Success')
+    @ns.response(404, 'Commit or test not found.')
+    def get(self, project_id: int, commit_id: int, test_id: int):
+        Session = get_session()
+
+        commit: Commit|None = Session.query(Commit) \
+            .filter(Commit.project_id == project_id, Commit.id == commit_id) \
+            .first()
+
+        if commit is None:
+            return {"msg": f"Commit was not found - id:{commit_id}"}, 404
+
+        test: TestMethod|None = Session.query(TestMethod) \
+            .filter(TestMethod.project_id == project_id, TestMethod.id == test_id) \
+            .first()
+
+        if test is None:
+            return {"msg": f'Test was not found... test_id: {test_id}'}, 404
+
+        lines = LineCoverageQuery.get_lines(Session, commit.id, test.id)
+
+        if not lines:
+            return {"msg": "No line coverage stored for test in commit."}, 404
+
+        return {
+            "commit": row2dict(commit),
+            "test": row2dict(test),
+            "coverage": {
+                "lines": [{"method_version_id": method_version_id, "lines": version_lines} for method_version_id, version_lines in lines.items()],
+            }
+        }, 200
+
+
+def batch_coverage(project_id, query):
+    ids = requested_ids()
+
+    Session = get_session()
+    project: Project|None = ProjectQuery.get_project(Session, project_id)
+
+    if project is None:
+        return {"error": f"Project with id '{project_id}' was not found..."}, 404
+
+    return {"project": row2dict(project), **query(Session, project.id, ids)}, 200
+
+
+@ns.route('/projects/<project_id>/commits', '/projects/<project_id>/commits/')
+@ns.doc(params={'ids': 'Comma separated commit ids, or a JSON body {"ids": [...]} with a POST'})
+@cached
+@heavy
+class BatchCommitCoverageRoute(Resource):
+    @ns.response(200, 'Success')
+    @ns.response(400, 'Invalid ids.')
+    @ns.response(404, 'Project not found.')
+    def get(self, project_id: int):
+        return batch_coverage(project_id, BatchQuery.get_commits_coverage)
+
+    def post(self, project_id: int):
+        return batch_coverage(project_id, BatchQuery.get_commits_coverage)
+
+
+@ns.route('/projects/<project_id>/methods', '/projects/<project_id>/methods/')
+@ns.doc(params={'ids': 'Comma separated method ids, or a JSON body {"ids": [...]} with a POST'})
+@cached
+@heavy
+class BatchMethodHistoryRoute(Resource):
+    @ns.response(200, 'Success')
+    @ns.response(400, 'Invalid ids.')
+    @ns.response(404, 'Project not found.')
+    def get(self, project_id: int):
+        return batch_coverage(project_id, BatchQuery.get_methods_coverage)
+
+    def post(self, project_id: int):
+        return batch_coverage(project_id, BatchQuery.get_methods_coverage)
+
+
+@ns.route('/projects/<project_id>/tests', '/projects/<project_id>/tests/')
+@ns.doc(params={'ids': 'Comma separated test ids, or a JSON body {"ids": [...]} with a POST'})
+@cached
+@heavy
+class BatchTestHistoryRoute(Resource):
+    @ns.response(200, 'Success')
+    @ns.response(400, 'Invalid ids.')
+    @ns.response(404, 'Project not found.')
+    def get(self, project_id: int):
+        return batch_coverage(project_id, BatchQuery.get_tests_coverage)
+
+    def post(self, project_id: int):
+        return batch_coverage(project_id, BatchQuery.get_tests_coverage)
@@ -5,6 +5,7 @@ from morpheus.database.db import get_session
 from morpheus.database.util import row2dict
 from morpheus.database.models.repository import Project, Commit
 from morpheus.api.logic.coverage import MethodCoverageQuery, CommitQuery, ProjectQuery
+from morpheus.api.logic.pagination import paginated, requested_page
 
 
 ns = api.namespace(
@@ -46,14 +47,10 @@ class MethodsInProjectRoute(Resource):
         if project is None:
             return {"error": f"Project '{project_id}' was not found..."}, 404
 
-        methods = MethodCoverageQuery.get_methods(Session, project)
+        page = requested_page()
+        methods = MethodCoverageQuery.get_methods(Session, project, page=page)
 
-        if not methods:
-            return {"methods": []}, 200
-
-        return {
-            "methods": list(map(row2dict, methods)),
-        }, 200
+        return paginated("methods", methods, page), 200
 
 @ns.route('/project/<project_id>/commits/<commit_id>', '/project/<project_id>/commits/<commit_id>/')
 class MethodsInCommitRoute(Resource):
@@ -72,11 +69,7 @@ class MethodsInCommitRoute(Resource):
         if commit is None:
             return {"error": f"Commit with id '{commit_id}' was not found..."}, 404
 
-        methods = MethodCoverageQuery.get_methods(Session, project, commit)
-
-        if not methods:
-            return {"methods": []}, 200
+        page = requested_page()
+        methods = MethodCoverageQuery.get_methods(Session, project, commit, page)
 
-        return {
-            "methods": list(map(row2dict, methods)),
-        }, 200
\ No newline at end of file
+        return paginated("methods", methods, page), 200
\ No newline at end of file
@@ -0,0 +1,22 @@
+from flask import Response
+from flask_restx.resource import Resource
+from morpheus.api.rest import api
+from morpheus.api.logic.metrics import get_metrics_exporter, render
+
+
+ns = api.namespace(
+    name='metrics',
+    description='Metrics of the server in the Prometheus text format.',
+    authorization=False
+)
+
+
+@ns.route('', '/')
+class MetricsRoute(Resource):
+    @ns.response(200, 'Success')
+    @ns.response(404, 'Metrics are not collected.')
+    def get(self):
+        if (exporter := get_metrics_exporter()) is None:
+            return {"msg": "Metrics are not collected."}, 404
+
+        return Response(render(exporter.collect()), mimetype='text/plain; version=0.0.4')
@@ -3,6 +3,8 @@ from morpheus.api.rest import api
 from morpheus.database.db import get_session
 from morpheus.database.util import row2dict
 from morpheus.database.models.repository import Project, Commit
+from morpheus.api.logic.coverage import CommitQuery
+from morpheus.api.logic.pagination import paginated, requested_page
 
 
 ns = api.namespace(
@@ -70,14 +72,14 @@ class CommitsRoute(Resource):
     @ns.response(404, "Commit not found.")
     def get(self, project_id):
         Session = get_session()
-        commits = Session.query(Commit) \
-            .filter(Commit.project_id == project_id) \
-            .all()
+        page = requested_page()
+        commits = CommitQuery.get_project_commits(Session, project_id, page)
 
-        if not commits:
+        # The pages after the last one are empty.
+        if not commits and page is None:
             return {"error": f"no commits found for project_id '{project_id}'"}, 404
 
-        return {"commits": list(map(row2dict, commits))}, 200
+        return paginated("commits", commits, page), 200
 
 @ns.route('/<project_id>/commits/<commit_id>', '/<project_id>/commits/<commit_id>/')
 @ns.doc(
@@ -1,9 +1,10 @@
 from flask_restx.resource import Resource
 from morpheus.api.rest import api
-from morpheus.database.db import Session, get_session
+from morpheus.database.db import get_session
 from morpheus.database.util import row2dict
 from morpheus.database.models.methods import TestMethod
-from morpheus.api.logic.coverage import ProjectQuery
+from morpheus.api.logic.coverage import ProjectQuery, TestQuery
+from morpheus.api.logic.pagination import paginated, requested_page
 
 ns = api.namespace(
     name='tests',
@@ -23,6 +24,7 @@ class SingleTestMethodRoute(Resource):
     @ns.response(200, 'Success')
     @ns.response(404, 'Method not found within given project and/or commit.')
     def get(self, test_id):
+        Session = get_session()
         test = Session.query(TestMethod) \
             .filter(TestMethod.id == test_id)\
             .first()
@@ -45,13 +47,7 @@ class TestMethodsInCommitRoute(Resource):
         if project is None:
             return {"error": f"Project '{project_id}' was not found..."}, 404
 
-        tests = Session.query(TestMethod)\
-            .filter(TestMethod.project_id == project_id)\
-            .all()
-
-        if not tests:
-            return {"tests": []}, 200
+        page = requested_page()
+        tests = TestQuery.get_project_tests(Session, project.id, page)
 
-        return {
-            "tests": list(map(row2dict, tests)),
-        }, 200
+        return paginated("tests", tests, page), 200
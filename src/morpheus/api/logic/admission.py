@@ -0,0 +1,122 @@
+import logging
+import threading
+from flask import Flask, g, request
+from morpheus.database.db import set_query_deadline
+
+logger = logging.getLogger(__name__)
+
+# Heavy requests served at once per worker, and waiting for their turn.
+# Together less than the threads of a worker, which leaves a thread for
+# the light requests.
+HEAVY_REQUESTS = 2
+HEAVY_QUEUE = 1
+
+# Seconds a heavy request waits for its turn before it is turned away.
+QUEUE_TIMEOUT = 5
+
+# Seconds the SQL queries of a request may take together.
+QUERY_DEADLINE = 10
+
+# Seconds a client is asked to wait before retrying a shed request.
+RETRY_AFTER = 1
+
+
+class AdmissionControl():
+    """
+    Limits the heavy requests a worker serves at once, so they cannot take
+    all threads from the light requests. A bounded amount of requests waits
+    for a turn, any further requests are rejected immediately.
+    """
+    def __init__(self, limit: int=HEAVY_REQUESTS, queue_size: int=HEAVY_QUEUE, timeout: float=QUEUE_TIMEOUT):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+        self.__turn = threading.Condition()
+
+    def acquire(self) -> bool:
+        with self.__turn:
+            if self.active >= self.limit:
+                if self.waiting >= self.queue_size:
+                    self.rejected += 1
+                    return False
+
+                self.waiting += 1
+                try:
+                    if not self.__turn.wait_for(lambda: self.active < self.limit, self.timeout):
+                        self.rejected += 1
+                        return False
+                finally:
+                    self.waiting -= 1
+
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self.__turn:
+            self.active -= 1
+            self.__turn.notify()
+
+
+def heavy(resource):
+    """
+    Mark the requests of a resource as heavy, they are subject to the
+    admission control of the worker.
+    """
+    resource.heavy = True
+    return resource
+
+
+def renew_query_deadline():
+    """
+    Restart the deadline of the queries of the current request. A streamed
+    response runs its queries while it is sent, every batch of it gets the
+    whole deadline, so a long stream is not cut off halfway.
+    """
+    set_query_deadline(g.get('query_deadline'))
+
+
+admission_control: AdmissionControl | None = None
+
+def get_admission_control() -> AdmissionControl | None:
+    return admission_control
+
+
+def init_admission_control(app: Flask, limit: int=HEAVY_REQUESTS, queue_size: int=HEAVY_QUEUE, deadline: float=QUERY_DEADLINE) -> AdmissionControl:
+    """
+    Shed heavy requests with a 503 once the worker is saturated, and
+    interrupt the queries of any request that exceed the deadline, 0
+    disables the deadline.
+    """
+    global admission_control
+
+    admission_control = AdmissionControl(limit, queue_size)
+
+    @app.before_request
+    def admit_request():
+        view = app.view_functions.get(request.endpoint)
+        if getattr(getattr(view, 'view_class', None), 'heavy', False):
+            if not admission_control.acquire():
+                logger.warning("Turn away request %s, %s heavy requests in progress", request.path, admission_control.active)
+                return {'message': 'The server is busy, try again later.'}, 503, {'Retry-After': str(RETRY_AFTER)}
+            g.admitted = True
+
+        # The time waiting for a turn does not count.
+        g.query_deadline = deadline or None
+        set_query_deadline(g.query_deadline)
+        return None
+
+    @app.teardown_request
+    def release_request(exception):
+        set_query_deadline(None)
+
+        if g.pop('admitted', False):
+            admission_control.release()
+
+    return admission_control
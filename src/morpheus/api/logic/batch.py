@@ -0,0 +1,28 @@
+from typing import List
+from flask import request
+from flask_restx import abort
+
+# Ids a single batch request asks for at most.
+MAX_BATCH_SIZE = 1000
+
+
+def requested_ids() -> List[int]:
+    """
+    The distinct ids a batch request asks for, as a comma separated ids
+    argument of a GET, or as the ids list of the JSON body of a POST.
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True) if request.is_json else None
+        ids = body.get('ids') if isinstance(body, dict) else None
+        if not isinstance(ids, list) or not all(type(value) is int for value in ids):
+            abort(400, 'The body has to be a JSON object with a list of integer ids, e.g., {"ids": [1, 2]}.')
+    else:
+        try:
+            ids = [int(value) for value in request.args.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            abort(400, 'The ids argument has to be a comma separated list of integers, e.g., ?ids=1,2.')
+
+    ids = sorted(set(ids))
+    if not 0 < len(ids) <= MAX_BATCH_SIZE:
+        abort(400, f'A batch has to ask for between 1 and {MAX_BATCH_SIZE} ids.')
+    return ids
@@ -0,0 +1,270 @@
+import gzip
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+from flask import Flask, Response, g, request
+from morpheus.api.logic.admission import RETRY_AFTER
+from morpheus.api.logic.flight import FLIGHT_TIMEOUT, FlightResult, SharedFlight, SingleFlight
+from morpheus.api.logic.formats import FORMATS, JSON, response_mediatype
+from morpheus.api.logic.streaming import is_streaming
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...], str]
+
+# Default size of the cached bodies in MiB.
+CACHE_SIZE = 128
+
+# Content encodings of the responses, each gets an ETag of its own.
+ENCODINGS = ('gzip', 'br')
+
+# Bookkeeping of an entry besides its body, e.g., the key and the headers.
+ENTRY_OVERHEAD = 256
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    status: int
+    mimetype: str
+    compressed: bool
+    # Bodies compressed for the clients, per encoding.
+    encodings: Dict[str, bytes]
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(map(len, self.encodings.values())) + ENTRY_OVERHEAD
+
+
+class ResponseCache():
+    """
+    Serialized responses of the least recently used requests, bounded by the
+    size of the bodies. A body is optionally stored gzip compressed, and sent
+    as is to the clients that accept it. The bodies compressed for clients
+    are kept with the response they belong to.
+    """
+    def __init__(self, max_bytes: int, compress: bool=False):
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+
+        self.__entries: OrderedDict[Key, CachedResponse] = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def size(self) -> int:
+        return self.__bytes
+
+    def get(self, key: Key) -> Optional[CachedResponse]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return entry
+
+    def revalidated(self):
+        with self.__lock:
+            self.not_modified += 1
+
+    def put(self, key: Key, body: bytes, status: int, mimetype: str, encodings: Dict[str, bytes] | None=None):
+        encodings = dict(encodings or {})
+        if self.compress:
+            body = encodings.pop('gzip', None) or gzip.compress(body, compresslevel=6)
+        entry = CachedResponse(body, status, mimetype, self.compress, encodings)
+
+        if entry.size > self.max_bytes:
+            return
+
+        with self.__lock:
+            if (previous := self.__entries.pop(key, None)) is not None:
+                self.__bytes -= previous.size
+
+            self.__entries[key] = entry
+            self.__bytes += entry.size
+            self.__evict()
+
+    def add_encoding(self, key: Key, encoding: str, body: bytes):
+        """
+        Keep the body of a cached response compressed in another encoding.
+        """
+        with self.__lock:
+            if (entry := self.__entries.get(key)) is None or encoding in entry.encodings or (entry.compressed and encoding == 'gzip'):
+                return
+
+            entry.encodings[encoding] = body
+            self.__bytes += len(body)
+            self.__evict()
+
+    def __evict(self):
+        while self.__bytes > self.max_bytes:
+            (_, evicted) = self.__entries.popitem(last=False)
+            self.__bytes -= evicted.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'not_modified': self.not_modified,
+                'entries': len(self.__entries),
+                'bytes': self.__bytes,
+            }
+
+
+def cached(resource):
+    """
+    Mark the GET responses of a resource as cacheable, they only depend on
+    the request and the database.
+    """
+    resource.cached = True
+    return resource
+
+
+response_cache: ResponseCache | None = None
+single_flight: SingleFlight | None = None
+shared_flight: SharedFlight | None = None
+
+def get_response_cache() -> ResponseCache | None:
+    return response_cache
+
+
+def init_response_cache(app: Flask, generation: str, max_bytes: int, compress: bool=False, shared_directory: Path | None=None) -> ResponseCache | None:
+    """
+    Answer the cacheable routes from the cache, and validate them with an
+    ETag of the database generation. The database may not change while it
+    is served, without a body cache (max_bytes of 0) only the ETags are used.
+
+    Concurrent misses of the same request are computed once per worker, and
+    once across the workers sharing a directory.
+    """
+    global response_cache, single_flight, shared_flight
+
+    response_cache = ResponseCache(max_bytes, compress) if max_bytes > 0 else None
+    single_flight = SingleFlight()
+    shared_flight = SharedFlight(shared_directory / generation) if shared_directory is not None else None
+
+    def is_cacheable() -> bool:
+        # A streamed response is never held in memory as a whole.
+        view = app.view_functions.get(request.endpoint)
+        return request.method == 'GET' and getattr(getattr(view, 'view_class', None), 'cached', False) and not is_streaming()
+
+    # Every format of a response has an ETag of its own, and so does every
+    # encoding of a format.
+    etags = {mediatype: generation if mediatype == JSON else f'{generation}-{name}' for name, mediatype in FORMATS.items()}
+
+    def encoded_etag(encoding: str | None) -> str:
+        etag = etags[response_mediatype()]
+        return f'{etag}-{encoding}' if encoding is not None else etag
+
+    def matching_etag() -> str | None:
+        # The data of all encodings is the same, any of them is still valid.
+        return next((etag for etag in map(encoded_etag, (None, *ENCODINGS)) if request.if_none_match.contains(etag)), None)
+
+    def cache_key() -> Key:
+        return (request.path, tuple(sorted(request.args.items(multi=True))), response_mediatype())
+
+    def cached_response(entry: CachedResponse) -> Response:
+        body = entry.body
+        if entry.compressed and 'gzip' not in request.accept_encodings:
+            body = gzip.decompress(body)
+
+        response = Response(body, status=entry.status, mimetype=entry.mimetype)
+        if entry.compressed and body is entry.body:
+            response.headers['Content-Encoding'] = 'gzip'
+        g.cached_encodings = entry.encodings
+        return response
+
+    def coalesced_response(result: FlightResult) -> Response:
+        g.response_cache = 'COALESCED'
+        return Response(result.body, status=result.status, mimetype=result.mimetype)
+
+    def finish_flight(result: Optional[FlightResult]):
+        if (lock := g.pop('response_lock', None)) is not None:
+            shared_flight.release(g.response_key, lock, result)
+        if (flight := g.pop('response_flight', None)) is not None:
+            single_flight.finish(g.response_key, flight, result)
+
+    @app.before_request
+    def answer_from_cache():
+        if not is_cacheable():
+            return None
+
+        if (etag := matching_etag()) is not None:
+            if response_cache is not None:
+                response_cache.revalidated()
+            (g.response_cache, g.response_etag) = ('REVALIDATED', etag)
+            return Response(status=304)
+
+        key = cache_key()
+        if response_cache is not None and (entry := response_cache.get(key)) is not None:
+            g.response_cache = 'HIT'
+            return cached_response(entry)
+
+        g.response_cache = 'MISS'
+        (flight, leader) = single_flight.join(key)
+        if not leader:
+            # Computed by the request in progress, unless it failed.
+            if (result := flight.wait(FLIGHT_TIMEOUT)) is not None:
+                return coalesced_response(result)
+            if not flight.done.is_set():
+                logger.warning("Turn away request %s, an identical request is in progress for over %s seconds", request.path, FLIGHT_TIMEOUT)
+                return {'message': 'The server is busy, try again later.'}, 503, {'Retry-After': str(RETRY_AFTER)}
+            return None
+
+        (g.response_key, g.response_flight) = (key, flight)
+        if shared_flight is not None:
+            (g.response_lock, result) = shared_flight.acquire(key)
+            if result is not None:
+                finish_flight(result)
+                return coalesced_response(result)
+        return None
+
+    @app.after_request
+    def store_in_cache(response: Response):
+        if (state := g.pop('response_cache', None)) is None:
+            return response
+
+        # Compressed for the client after the response was computed or cached.
+        (encoding, body, reused) = g.pop('compressed_response', (None, None, True))
+        encodings = {encoding: response.get_data()} if encoding is not None else {}
+
+        if state == 'MISS' and not response.direct_passthrough:
+            body = body if body is not None else response.get_data()
+            if response_cache is not None and response.status_code == 200:
+                response_cache.put(cache_key(), body, response.status_code, response.mimetype, encodings)
+            # Errors are not shared, the waiting requests try themselves.
+            finish_flight(FlightResult(body, response.status_code, response.mimetype) if response.status_code < 500 else None)
+        elif state == 'HIT' and not reused:
+            response_cache.add_encoding(cache_key(), encoding, encodings[encoding])
+
+        if response.status_code == 304 and 'response_etag' in g:
+            response.set_etag(g.pop('response_etag'))
+        elif response.status_code == 200:
+            response.set_etag(encoded_etag(response.headers.get('Content-Encoding')))
+        response.headers['X-Cache'] = state
+        response.vary.add('Accept')
+        if response_cache is not None and response_cache.compress:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    @app.teardown_request
+    def abandon_flight(exception):
+        # The waiting requests compute the response themselves.
+        finish_flight(None)
+
+    return response_cache
@@ -0,0 +1,114 @@
+import gzip
+import logging
+import threading
+import time
+from typing import Dict, List
+from flask import Flask, Response, g, request
+from morpheus.api.logic.formats import FORMATS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Compression level of gzip and quality of brotli, 0 disables compression.
+COMPRESS_LEVEL = 6
+
+# Bodies smaller than this many bytes are sent as they are.
+MIN_SIZE = 1024
+
+
+class Compressor():
+    """
+    Compresses response bodies in the encoding a client prefers, brotli only
+    when it is installed. Keeps track of the bytes before and after, and the
+    time spent, per encoding.
+    """
+    def __init__(self, level: int=COMPRESS_LEVEL, min_size: int=MIN_SIZE):
+        self.level = level
+        self.min_size = min_size
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+        # Compressed responses, those reusing a cached body, bytes in, bytes out and seconds.
+        self.statistics: Dict[str, List[float]] = {encoding: [0, 0, 0, 0, 0.0] for encoding in self.encodings}
+        self.__lock = threading.Lock()
+
+    def negotiate(self) -> str | None:
+        return request.accept_encodings.best_match(self.encodings)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        start_time = time.process_time()
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=self.level)
+        else:
+            # Without a timestamp, so every worker compresses a body the same.
+            compressed = gzip.compress(body, compresslevel=min(self.level, 9), mtime=0)
+        duration = time.process_time() - start_time
+
+        with self.__lock:
+            statistics = self.statistics[encoding]
+            statistics[0] += 1
+            statistics[2] += len(body)
+            statistics[3] += len(compressed)
+            statistics[4] += duration
+        return compressed
+
+    def reused(self, encoding: str):
+        with self.__lock:
+            self.statistics[encoding][1] += 1
+
+
+def is_compressible(mimetype: str) -> bool:
+    return mimetype.startswith('text/') or mimetype in FORMATS.values() or mimetype.endswith(('+json', '/javascript'))
+
+
+compressor: Compressor | None = None
+
+def get_compressor() -> Compressor | None:
+    return compressor
+
+
+def init_compression(app: Flask, level: int=COMPRESS_LEVEL, min_size: int=MIN_SIZE) -> Compressor | None:
+    """
+    Compress the responses for the clients accepting it. Has to be
+    initialized after the response cache, which keeps the compressed bodies
+    next to the uncompressed ones, so a cached response is compressed at
+    most once per encoding.
+    """
+    global compressor
+
+    compressor = Compressor(level, min_size) if level > 0 else None
+    if compressor is None:
+        return None
+
+    @app.after_request
+    def compress_response(response: Response):
+        if response.direct_passthrough or response.is_streamed or not 200 <= response.status_code < 300 or response.status_code == 204 \
+                or 'Content-Encoding' in response.headers or not is_compressible(response.mimetype):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if (encoding := compressor.negotiate()) is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < compressor.min_size:
+            return response
+
+        if (compressed := g.get('cached_encodings', {}).get(encoding)) is not None:
+            compressor.reused(encoding)
+            reused = True
+        else:
+            compressed = compressor.compress(body, encoding)
+            reused = False
+
+        # The response cache keeps both bodies.
+        g.compressed_response = (encoding, body, reused)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return compressor
@@ -1,9 +1,14 @@
 import logging
-from typing import Dict, List, Tuple
-from morpheus.database.models.methods import LineCoverage, TestMethod, ProdMethod, ProdMethodVersion
+from typing import Dict, Iterable, Iterator, List, Tuple
+from morpheus.database.edges import commit_edges, history_edges
+from morpheus.database.lineset import decode_lines
+from morpheus.database.models.methods import CommitMethodVersion, CoverageEdge, LineCoverage, LineSet, TestMethod, ProdMethod, ProdMethodVersion
 from morpheus.database.models.repository import Project, Commit
-from sqlalchemy import and_
-from sqlalchemy.orm.query import Query
+from morpheus.api.logic.pagination import Page
+from morpheus.api.logic.streaming import STREAM_BATCH
+from morpheus.database.util import public_columns, rows2dicts
+from sqlalchemy import and_, bindparam, select
+from sqlalchemy.sql import Select
 from sqlalchemy.orm.session import Session
 
 logger = logging.getLogger(__name__)
@@ -23,6 +28,16 @@ class CommitQuery():
             .filter(Commit.id==commit_id)\
             .first()
 
+    @staticmethod
+    def get_project_commits(session, project_id: int, page: Page | None=None) -> List[Dict]:
+        return COMMITS.dicts(_execute(session, PROJECT_COMMITS, {'project_id': project_id}, page))
+
+
+class TestQuery():
+    @staticmethod
+    def get_project_tests(session, project_id: int, page: Page | None=None) -> List[Dict]:
+        return TESTS.dicts(_execute(session, PROJECT_TESTS, {'project_id': project_id}, page))
+
 
 class ProjectQuery():
     @staticmethod
@@ -57,65 +72,350 @@ class MethodQuery():
             .all()
 
 
+class Projection():
+    """
+    The columns of a model selected as plain tuples, i.e., without loading
+    entities, and converted to dicts as row2dict converts an entity.
+    """
+    def __init__(self, model):
+        self.columns = tuple(public_columns(model.__table__))
+        self.keys = tuple(column.name for column in self.columns)
+
+    def select(self) -> Select:
+        return select(*self.columns)
+
+    def dicts(self, rows) -> List[Dict]:
+        return rows2dicts(rows, self.keys)
+
+
+COMMITS = Projection(Commit)
+METHODS = Projection(ProdMethod)
+TESTS = Projection(TestMethod)
+
+METHOD_ORDER = (ProdMethod.package_name.desc(), ProdMethod.class_name.desc(), ProdMethod.method_decl.desc())
+TEST_ORDER = (TestMethod.package_name.desc(), TestMethod.class_name.desc(), TestMethod.method_name.desc())
+
+# Statements of the hot routes, built once so their compiled form is cached.
+PROJECT_METHODS = METHODS.select() \
+    .join(ProdMethodVersion, ProdMethodVersion.method_id==ProdMethod.id) \
+    .where(ProdMethod.project_id==bindparam('project_id')) \
+    .distinct() \
+    .order_by(*METHOD_ORDER)
+
+COMMIT_METHODS = METHODS.select() \
+    .join(ProdMethodVersion, ProdMethodVersion.method_id==ProdMethod.id) \
+    .join(CommitMethodVersion, CommitMethodVersion.method_version_id==ProdMethodVersion.id) \
+    .where(ProdMethod.project_id==bindparam('project_id'), CommitMethodVersion.commit_id==bindparam('commit_id')) \
+    .distinct() \
+    .order_by(*METHOD_ORDER)
+
+COMMIT_TESTS = TESTS.select() \
+    .join(CoverageEdge, CoverageEdge.test_id==TestMethod.id) \
+    .where(TestMethod.project_id==bindparam('project_id'), CoverageEdge.commit_id==bindparam('commit_id')) \
+    .distinct() \
+    .order_by(*TEST_ORDER)
+
+COMMIT_EDGES = select(CoverageEdge.test_id, CoverageEdge.method_id, CoverageEdge.test_result) \
+    .where(CoverageEdge.commit_id==bindparam('commit_id'))
+
+TESTS_BY_ID = TESTS.select() \
+    .where(TestMethod.project_id==bindparam('project_id'), TestMethod.id.in_(bindparam('test_ids', expanding=True)))
+
+METHODS_BY_ID = METHODS.select() \
+    .where(ProdMethod.id.in_(bindparam('method_ids', expanding=True)))
+
+COMMITS_BY_ID = COMMITS.select() \
+    .where(Commit.project_id==bindparam('project_id'), Commit.id.in_(bindparam('commit_ids', expanding=True)))
+
+PROJECT_TESTS = TESTS.select() \
+    .where(TestMethod.project_id==bindparam('project_id'))
+
+PROJECT_COMMITS = COMMITS.select() \
+    .where(Commit.project_id==bindparam('project_id'))
+
+METHOD_COMMITS = COMMITS.select() \
+    .join(CommitMethodVersion, CommitMethodVersion.commit_id==Commit.id) \
+    .join(ProdMethodVersion, ProdMethodVersion.id==CommitMethodVersion.method_version_id) \
+    .where(ProdMethodVersion.method_id==bindparam('method_id')) \
+    .distinct() \
+    .order_by(Commit.id)
+
+
+PROJECT_METHODS_BY_ID = METHODS.select() \
+    .where(ProdMethod.project_id==bindparam('project_id'), ProdMethod.id.in_(bindparam('method_ids', expanding=True)))
+
+COMMITS_METHODS = METHODS.select() \
+    .join(ProdMethodVersion, ProdMethodVersion.method_id==ProdMethod.id) \
+    .join(CommitMethodVersion, CommitMethodVersion.method_version_id==ProdMethodVersion.id) \
+    .where(ProdMethod.project_id==bindparam('project_id'), CommitMethodVersion.commit_id.in_(bindparam('commit_ids', expanding=True))) \
+    .distinct() \
+    .order_by(*METHOD_ORDER)
+
+COMMITS_METHOD_IDS = select(CommitMethodVersion.commit_id, ProdMethodVersion.method_id) \
+    .join(ProdMethodVersion, ProdMethodVersion.id==CommitMethodVersion.method_version_id) \
+    .where(CommitMethodVersion.commit_id.in_(bindparam('commit_ids', expanding=True))) \
+    .distinct() \
+    .order_by(CommitMethodVersion.commit_id, ProdMethodVersion.method_id)
+
+DELTA_COMMIT_IDS = select(Commit.id) \
+    .where(Commit.id.in_(bindparam('commit_ids', expanding=True)), Commit.edge_base_id != None)
+
+COMMITS_EDGES = select(CoverageEdge.commit_id, CoverageEdge.test_id, CoverageEdge.method_id, CoverageEdge.test_result) \
+    .where(CoverageEdge.commit_id.in_(bindparam('commit_ids', expanding=True)))
+
+METHODS_COMMITS = COMMITS.select() \
+    .join(CommitMethodVersion, CommitMethodVersion.commit_id==Commit.id) \
+    .join(ProdMethodVersion, ProdMethodVersion.id==CommitMethodVersion.method_version_id) \
+    .where(ProdMethodVersion.method_id.in_(bindparam('method_ids', expanding=True))) \
+    .distinct() \
+    .order_by(Commit.id)
+
+
+def _paged(statement: Select, column) -> Select:
+    """
+    A page of the rows of a statement, ordered by the id column.
+    """
+    return statement \
+        .order_by(None) \
+        .where(column > bindparam('after')) \
+        .order_by(column) \
+        .limit(bindparam('limit'))
+
+
+PAGED_STATEMENTS = {
+    statement: _paged(statement, column) for statement, column in (
+        (PROJECT_METHODS, ProdMethod.id),
+        (COMMIT_METHODS, ProdMethod.id),
+        (PROJECT_TESTS, TestMethod.id),
+        (PROJECT_COMMITS, Commit.id),
+    )
+}
+
+
+def _execute(session, statement: Select, parameters: Dict, page: Page | None=None):
+    if page is None:
+        return session.execute(statement, parameters)
+    return session.execute(PAGED_STATEMENTS[statement], {**parameters, 'after': page.after, 'limit': page.limit})
+
+
+def _stream(session, statement: Select, parameters: Dict) -> Iterator[List[Tuple]]:
+    """
+    The rows of a statement in batches, fetched from the cursor as they are consumed.
+    """
+    result = session.execute(statement, parameters, execution_options={'yield_per': STREAM_BATCH})
+    yield from result.partitions()
+
+
+def _tests_statement(session, project: Project, commit: Commit) -> Tuple[Select, Dict]:
+    # Edges stored relative to another commit are only known after rebuilding them.
+    if commit.edge_base_id is None:
+        return (COMMIT_TESTS, {'project_id': project.id, 'commit_id': commit.id})
+
+    test_ids = {test_id for test_id, *_ in commit_edges(session, commit.id)}
+    return (TESTS_BY_ID.order_by(*TEST_ORDER), {'project_id': project.id, 'test_ids': list(test_ids)})
+
+
+def _methods_statement(project: Project, commit: Commit | None) -> Tuple[Select, Dict]:
+    # This returns all the methods, but the edges point to method versions...
+    if commit is None:
+        return (PROJECT_METHODS, {'project_id': project.id})
+    return (COMMIT_METHODS, {'project_id': project.id, 'commit_id': commit.id})
+
+
+def _edge_dicts(edges: Iterable[Tuple[int, int, bool]]) -> List[Dict]:
+    return [{'test_id': test_id, 'method_id': method_id, 'test_result': test_result} for test_id, method_id, test_result in edges]
+
+
 class MethodCoverageQuery():
     @staticmethod
-    def get_tests(session, project, commit)-> List[TestMethod]:
-        return session.query(TestMethod) \
-            .join(LineCoverage, (LineCoverage.test_id==TestMethod.id)) \
-            .filter(and_(
-                TestMethod.project_id==project.id,
-                LineCoverage.commit_id==commit.id
-            ))\
-            .order_by(
-                    TestMethod.package_name.desc(),
-                    TestMethod.class_name.desc(),
-                    TestMethod.method_name.desc()
-            )\
-            .all()
+    def get_tests(session, project: Project, commit: Commit) -> List[Dict]:
+        return TESTS.dicts(session.execute(*_tests_statement(session, project, commit)))
 
     @staticmethod
-    def get_methods(session: Session, project: Project, commit: Commit=None)-> List[ProdMethod]:
-        # This returns all the methods, but the edges point to method versions...
-        query: Query = session.query(ProdMethod) \
-            .join(ProdMethodVersion, (ProdMethodVersion.method_id==ProdMethod.id))\
-            .filter(ProdMethod.project_id==project.id)
-        
-        if commit is not None:
-            query = query.filter(ProdMethodVersion.commit_id==commit.id)
-
-        return query.order_by(
-                ProdMethod.package_name.desc(),
-                ProdMethod.class_name.desc(),
-                ProdMethod.method_decl.desc()
-        ).all()
+    def get_methods(session: Session, project: Project, commit: Commit=None, page: Page | None=None) -> List[Dict]:
+        return METHODS.dicts(_execute(session, *_methods_statement(project, commit), page))
 
     @staticmethod
     def get_edges(session, commit: Commit) -> List[Dict]:
-        result = session.query(LineCoverage.test_id, ProdMethodVersion.method_id, LineCoverage.test_result) \
-            .join(ProdMethodVersion, (ProdMethodVersion.id==LineCoverage.method_version_id))\
-            .filter(LineCoverage.commit_id==commit.id)\
-            .group_by(LineCoverage.test_id, LineCoverage.method_version_id)\
-            .all()
-        
-        edge_2_dict = lambda e: {'test_id': e[0], 'method_id': e[1], 'test_result': e[2]}
+        if commit.edge_base_id is None:
+            result = session.execute(COMMIT_EDGES, {'commit_id': commit.id})
+        else:
+            result = [(test_id, method_id, test_result) for test_id, _, method_id, test_result in commit_edges(session, commit.id)]
+
+        return _edge_dicts(result)
+
+    @staticmethod
+    def stream_tests(session, project: Project, commit: Commit) -> Iterator[List[Dict]]:
+        for rows in _stream(session, *_tests_statement(session, project, commit)):
+            yield TESTS.dicts(rows)
+
+    @staticmethod
+    def stream_methods(session, project: Project, commit: Commit) -> Iterator[List[Dict]]:
+        for rows in _stream(session, *_methods_statement(project, commit)):
+            yield METHODS.dicts(rows)
+
+    @staticmethod
+    def stream_edges(session, commit: Commit) -> Iterator[List[Dict]]:
+        if commit.edge_base_id is None:
+            batches = _stream(session, COMMIT_EDGES, {'commit_id': commit.id})
+        else:
+            # Rebuilt in memory anyway, sent in batches all the same.
+            edges = [(test_id, method_id, test_result) for test_id, _, method_id, test_result in commit_edges(session, commit.id)]
+            batches = (edges[start:start + STREAM_BATCH] for start in range(0, len(edges), STREAM_BATCH))
 
-        return list(map(edge_2_dict, result))
+        for batch in batches:
+            yield _edge_dicts(batch)
 
 class HistoryQuery():
     @staticmethod
-    def get_method_history(session, method: ProdMethod) -> List[Tuple[TestMethod, LineCoverage]]:
+    def get_method_history(session, method: ProdMethod) -> List[Tuple[TestMethod, CoverageEdge]]:
         version: ProdMethodVersion
         result = []
         for version in method.versions:
-            coverage = session.query(TestMethod, LineCoverage) \
-                .join(LineCoverage, TestMethod.id == LineCoverage.test_id)\
-                .filter(LineCoverage.method_version_id==version.id)\
+            coverage = session.query(TestMethod, CoverageEdge) \
+                .join(CoverageEdge, TestMethod.id == CoverageEdge.test_id)\
+                .filter(CoverageEdge.method_version_id==version.id)\
                 .all()
 
             result.append(coverage)
 
         return result
 
+    @staticmethod
+    def get_method_commits(session, method_id: int) -> List[Dict]:
+        return COMMITS.dicts(session.execute(METHOD_COMMITS, {'method_id': method_id}))
+
+    @staticmethod
+    def get_tests(session, project_id: int, test_ids: Iterable[int]) -> List[Dict]:
+        return TESTS.dicts(session.execute(TESTS_BY_ID, {'project_id': project_id, 'test_ids': list(test_ids)}))
+
+    @staticmethod
+    def get_methods(session, method_ids: Iterable[int]) -> List[Dict]:
+        return METHODS.dicts(session.execute(METHODS_BY_ID, {'method_ids': list(method_ids)}))
+
+    @staticmethod
+    def get_commits(session, project_id: int, commit_ids: Iterable[int]) -> List[Dict]:
+        return COMMITS.dicts(session.execute(COMMITS_BY_ID, {'project_id': project_id, 'commit_ids': list(commit_ids)}))
+
+class BatchQuery():
+    """
+    The coverage of many commits, methods or tests of a project at once, with
+    every commit, method and test in it only once. Ids that are not found in
+    the project are listed as missing.
+    """
+    @staticmethod
+    def get_commits_coverage(session, project_id: int, commit_ids: List[int]) -> Dict:
+        commits = COMMITS.dicts(session.execute(COMMITS_BY_ID.order_by(Commit.id), {'project_id': project_id, 'commit_ids': commit_ids}))
+        found = [commit['id'] for commit in commits]
+
+        # Edges stored relative to another commit are only known after rebuilding them.
+        delta_ids = set(session.execute(DELTA_COMMIT_IDS, {'commit_ids': found}).scalars())
+        edges = list(session.execute(COMMITS_EDGES, {'commit_ids': [commit_id for commit_id in found if commit_id not in delta_ids]}))
+        for commit_id in sorted(delta_ids):
+            edges.extend((commit_id, test_id, method_id, test_result) for test_id, _, method_id, test_result in commit_edges(session, commit_id))
+
+        test_ids = sorted({test_id for _, test_id, _, _ in edges})
+        tests = TESTS.dicts(session.execute(TESTS_BY_ID.order_by(*TEST_ORDER), {'project_id': project_id, 'test_ids': test_ids}))
+        methods = METHODS.dicts(session.execute(COMMITS_METHODS, {'project_id': project_id, 'commit_ids': found}))
+
+        commit_methods: Dict[int, List[int]] = {}
+        for commit_id, method_id in session.execute(COMMITS_METHOD_IDS, {'commit_ids': found}):
+            commit_methods.setdefault(commit_id, []).append(method_id)
+
+        return {
+            "coverage": {
+                "commits": commits,
+                "methods": methods,
+                "tests": tests,
+                "commit_methods": [{'commit_id': commit_id, 'method_ids': method_ids} for commit_id, method_ids in commit_methods.items()],
+                "edges": [
+                    {'commit_id': commit_id, 'test_id': test_id, 'method_id': method_id, 'test_result': test_result}
+                    for commit_id, test_id, method_id, test_result in sorted(edges)
+                ],
+            },
+            "missing": sorted(set(commit_ids) - set(found)),
+        }
+
+    @staticmethod
+    def get_methods_coverage(session, project_id: int, method_ids: List[int]) -> Dict:
+        methods = METHODS.dicts(session.execute(PROJECT_METHODS_BY_ID, {'project_id': project_id, 'method_ids': method_ids}))
+        found = [method['id'] for method in methods]
+
+        edges = sorted(
+            (method_id, commit_id, test_id, test_result)
+            for commit_id, (test_id, _, method_id, test_result) in (history_edges(session, project_id, 'method_id', found) if found else [])
+        )
+
+        test_ids = sorted({test_id for _, _, test_id, _ in edges})
+        tests = TESTS.dicts(session.execute(TESTS_BY_ID, {'project_id': project_id, 'test_ids': test_ids}))
+        commits = COMMITS.dicts(session.execute(METHODS_COMMITS, {'method_ids': found}))
+
+        return {
+            "coverage": {
+                "methods": methods,
+                "commits": commits,
+                "tests": tests,
+                "edges": [
+                    {'method_id': method_id, 'commit_id': commit_id, 'test_id': test_id, 'test_result': test_result}
+                    for method_id, commit_id, test_id, test_result in edges
+                ],
+            },
+            "missing": sorted(set(method_ids) - set(found)),
+        }
+
+    @staticmethod
+    def get_tests_coverage(session, project_id: int, test_ids: List[int]) -> Dict:
+        tests = TESTS.dicts(session.execute(TESTS_BY_ID, {'project_id': project_id, 'test_ids': test_ids}))
+        found = [test['id'] for test in tests]
+
+        edges = sorted(
+            (test_id, commit_id, method_version_id, method_id, test_result)
+            for commit_id, (test_id, method_version_id, method_id, test_result) in (history_edges(session, project_id, 'test_id', found) if found else [])
+        )
+
+        method_ids = sorted({method_id for _, _, _, method_id, _ in edges})
+        commit_ids = sorted({commit_id for _, commit_id, _, _, _ in edges})
+        methods = METHODS.dicts(session.execute(METHODS_BY_ID, {'method_ids': method_ids}))
+        commits = COMMITS.dicts(session.execute(COMMITS_BY_ID, {'project_id': project_id, 'commit_ids': commit_ids}))
+
+        return {
+            "coverage": {
+                "tests": tests,
+                "commits": commits,
+                "methods": methods,
+                "edges": [
+                    {'test_id': test_id, 'commit_id': commit_id, 'method_version_id': method_version_id, 'method_id': method_id, 'test_result': test_result}
+                    for test_id, commit_id, method_version_id, method_id, test_result in edges
+                ],
+            },
+            "missing": sorted(set(test_ids) - set(found)),
+        }
+
+class LineCoverageQuery():
+    @staticmethod
+    def get_lines(session, commit_id: int, test_id: int) -> Dict[int, List[int]]:
+        """
+        The lines covered by a test per method version, from the compressed
+        line sets or otherwise from the line coverage rows.
+        """
+        line_sets = session.query(LineSet.method_version_id, LineSet.lines) \
+            .filter(LineSet.commit_id==commit_id, LineSet.test_id==test_id) \
+            .all()
+
+        if line_sets:
+            return {method_version_id: decode_lines(lines) for method_version_id, lines in line_sets}
+
+        rows = session.query(LineCoverage.method_version_id, LineCoverage.line_number) \
+            .filter(LineCoverage.commit_id==commit_id, LineCoverage.test_id==test_id) \
+            .order_by(LineCoverage.method_version_id, LineCoverage.line_number) \
+            .all()
+
+        lines: Dict[int, List[int]] = {}
+        for method_version_id, line_number in rows:
+            lines.setdefault(method_version_id, []).append(line_number)
+
+        return lines
+
 class MethodVersionQuery():
 
     @staticmethod
@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, Hashable, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds a request waits for an identical request in progress, as long as a
+# heavy request waits for its turn, before it is turned away. The waiting
+# requests are not subject to admission control, so a slow request cannot
+# hold the threads of a worker for long.
+FLIGHT_TIMEOUT = 5
+
+# Seconds the response of a worker is reused by the other workers.
+SHARED_RESULT_TTL = 10
+
+# Seconds a worker waits for the lock of another worker, as long as a heavy
+# request waits for its turn, before it computes the response itself.
+LOCK_TIMEOUT = 5
+
+# Seconds between attempts to take the lock of another worker.
+LOCK_POLL_INTERVAL = 0.02
+
+
+class FlightResult(NamedTuple):
+    body: bytes
+    status: int
+    mimetype: str
+
+
+class Flight():
+    """
+    A response being computed, the requests joining it wait for the result of
+    the first request.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: FlightResult | None = None
+
+    def wait(self, timeout: float=FLIGHT_TIMEOUT) -> Optional[FlightResult]:
+        self.done.wait(timeout)
+        return self.result
+
+
+class SingleFlight():
+    """
+    Coalesces identical requests within a worker, only the first request of
+    concurrent requests for the same key computes the response.
+    """
+    def __init__(self):
+        self.coalesced = 0
+
+        self.__flights: Dict[Hashable, Flight] = {}
+        self.__lock = threading.Lock()
+
+    def join(self, key: Hashable) -> Tuple[Flight, bool]:
+        """
+        The flight of the key and whether the caller leads it, i.e., has to
+        finish it.
+        """
+        with self.__lock:
+            if (flight := self.__flights.get(key)) is not None:
+                self.coalesced += 1
+                return (flight, False)
+
+            flight = self.__flights[key] = Flight()
+            return (flight, True)
+
+    def finish(self, key: Hashable, flight: Flight, result: Optional[FlightResult]):
+        """
+        Hand the result, None when computing it failed, to the waiting requests.
+        """
+        with self.__lock:
+            if self.__flights.get(key) is flight:
+                del self.__flights[key]
+
+        flight.result = result
+        flight.done.set()
+
+
+class SharedFlight():
+    """
+    Coalesces identical requests across the workers of a server with a lock
+    file per key in a directory they share. The worker holding the lock
+    leaves its result next to it for the workers waiting on it. Workers wait
+    a bounded time for a lock, and the files of keys no longer in use are
+    removed.
+    """
+    def __init__(self, directory: Path, ttl: float=SHARED_RESULT_TTL, timeout: float=LOCK_TIMEOUT):
+        if fcntl is None:
+            logger.error("Coalescing requests across workers requires file locks, which are not supported on this platform")
+            raise RuntimeError("Coalescing requests across workers requires file locks, which are not supported on this platform")
+
+        self.directory = directory
+        self.ttl = ttl
+        self.timeout = timeout
+        self.coalesced = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __path(self, key: Hashable) -> Path:
+        return self.directory / hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def acquire(self, key: Hashable) -> Tuple[Optional[BinaryIO], Optional[FlightResult]]:
+        """
+        Either the recent result of another worker, or the lock of the key
+        to release once the result is computed. Neither when the lock is not
+        taken in time, the caller then computes the result without it.
+        """
+        path = self.__path(key)
+        if (lock := self.__lock(path.with_suffix('.lock'))) is None:
+            logger.warning("Stop waiting for another worker computing %s", key)
+            return (None, None)
+
+        if (result := self.__read(path.with_suffix('.response'))) is not None:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+            self.coalesced += 1
+            return (None, result)
+
+        return (lock, None)
+
+    def __lock(self, path: Path) -> Optional[BinaryIO]:
+        deadline = time.monotonic() + self.timeout
+        lock = None
+        while True:
+            if lock is None:
+                lock = open(path, 'ab')
+
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    lock.close()
+                    return None
+                time.sleep(LOCK_POLL_INTERVAL)
+                continue
+
+            # The lock file is removed when it is unused, a lock taken on a
+            # removed file does not exclude anyone.
+            if _is_same_file(lock, path):
+                return lock
+
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+            lock = None
+
+    def release(self, key: Hashable, lock: BinaryIO, result: Optional[FlightResult]):
+        try:
+            if result is not None:
+                self.__write(self.__path(key).with_suffix('.response'), result)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+
+    def __read(self, path: Path) -> Optional[FlightResult]:
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return None
+
+            with open(path, 'rb') as f:
+                (status, mimetype) = f.readline().decode().split()
+                return FlightResult(f.read(), int(status), mimetype)
+        except FileNotFoundError:
+            return None
+
+    def __write(self, path: Path, result: FlightResult):
+        temporary_path = path.with_suffix(f'.{os.getpid()}')
+        with open(temporary_path, 'wb') as f:
+            f.write(f'{result.status} {result.mimetype}\n'.encode())
+            f.write(result.body)
+        os.replace(temporary_path, path)
+
+        self.__remove_expired()
+
+    def __remove_expired(self):
+        expired = time.time() - self.ttl
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime >= expired:
+                        continue
+                except FileNotFoundError:
+                    continue
+
+                if entry.name.endswith('.response'):
+                    Path(entry.path).unlink(missing_ok=True)
+                elif entry.name.endswith('.lock'):
+                    _remove_unused_lock(Path(entry.path))
+
+
+def _is_same_file(file: BinaryIO, path: Path) -> bool:
+    try:
+        return os.fstat(file.fileno()).st_ino == path.stat().st_ino
+    except FileNotFoundError:
+        return False
+
+
+def _remove_unused_lock(path: Path):
+    """
+    Remove a lock file unless a worker holds it, a worker that opened it
+    before takes it afterwards and finds it removed.
+    """
+    try:
+        lock = open(path, 'ab')
+    except OSError:
+        return
+
+    with lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+
+        if _is_same_file(lock, path):
+            path.unlink(missing_ok=True)
+        fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,132 @@
+import json
+import struct
+import sys
+from array import array
+from typing import List
+from flask import current_app, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON = 'application/json'
+COLUMNAR = 'application/vnd.morpheus.columnar+json'
+BINARY = 'application/vnd.morpheus.columnar+binary'
+
+# Formats a client selects with the format argument instead of the Accept header.
+FORMATS = {'json': JSON, 'columnar': COLUMNAR, 'binary': BINARY}
+
+# Alignment of the arrays in a binary body, enough for any typed array.
+ALIGNMENT = 8
+
+# Type codes of the typed arrays in a binary body.
+TYPED_ARRAYS = {'uint8': 'B', 'int32': 'i', 'float64': 'd'}
+
+INT32_RANGE = (-2**31, 2**31 - 1)
+
+
+def response_mediatype() -> str:
+    """
+    The format of the response, selected by the format argument of the
+    request, otherwise by its Accept header, and JSON by default.
+    """
+    if (mediatype := FORMATS.get(request.args.get('format'))) is not None:
+        return mediatype
+    return request.accept_mimetypes.best_match(FORMATS.values(), default=JSON)
+
+
+def dump_json(data) -> bytes:
+    """
+    Encode a response straight to bytes, with orjson when it is installed.
+    """
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if current_app.debug:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=options)
+
+    if current_app.debug:
+        return (json.dumps(data, indent=4, ensure_ascii=False) + '\n').encode()
+    return (json.dumps(data, separators=(',', ':'), ensure_ascii=False, check_circular=False) + '\n').encode()
+
+
+def encode_json(data) -> bytes:
+    """
+    Compact JSON of the data without a trailing newline, e.g., a part of a
+    streamed response.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, check_circular=False).encode()
+
+
+def columnar(data):
+    """
+    The tables of a response as columns, i.e., a list of rows becomes a list
+    per key, in which the rows without the key are None. The edges of the
+    coverage become parallel lists of test, method and result.
+    """
+    if isinstance(data, dict):
+        return {key: columnar(value) for key, value in data.items()}
+
+    if isinstance(data, list) and data and all(isinstance(row, dict) for row in data):
+        keys = dict.fromkeys(key for row in data for key in row)
+        return {key: [row.get(key) for row in data] for key in keys}
+
+    return data
+
+
+def _typed_array(values: list) -> str | None:
+    if not values:
+        return None
+
+    types = set(map(type, values))
+    if types == {bool}:
+        return 'uint8'
+    if types == {int}:
+        return 'int32' if INT32_RANGE[0] <= min(values) and max(values) <= INT32_RANGE[1] else 'float64'
+    if types <= {int, float}:
+        return 'float64'
+    return None
+
+
+def pack_binary(data) -> bytes:
+    """
+    The columnar form of a response with its numeric lists as typed arrays,
+    which a browser reads without copying them, e.g., as an Int32Array.
+
+    The body starts with the length of a JSON header as a little endian
+    unsigned 32-bit integer, followed by the header and the arrays. The
+    header is the columnar response in which every numeric list is replaced
+    by {"$array": <type>, "offset": <bytes>, "length": <items>}, with the
+    offset relative to the end of the header. The header is padded, so the
+    arrays are little endian and aligned to 8 bytes.
+    """
+    buffers: List[bytes] = []
+    size = 0
+
+    def extract(value):
+        nonlocal size
+        if isinstance(value, dict):
+            return {key: extract(item) for key, item in value.items()}
+        if not isinstance(value, list):
+            return value
+        if (kind := _typed_array(value)) is None:
+            return [extract(item) for item in value]
+
+        values = array(TYPED_ARRAYS[kind], value)
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        buffer = values.tobytes()
+        buffer += bytes(-len(buffer) % ALIGNMENT)
+        buffers.append(buffer)
+
+        reference = {'$array': kind, 'offset': size, 'length': len(value)}
+        size += len(buffer)
+        return reference
+
+    header = dump_json(extract(columnar(data)))
+    header += b' ' * (-(4 + len(header)) % ALIGNMENT)
+    return struct.pack('<I', len(header)) + header + b''.join(buffers)
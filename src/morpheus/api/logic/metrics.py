@@ -0,0 +1,301 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+from flask import Flask, Response, g, request
+from morpheus.api.logic import admission, cache, compression
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Upper bounds of the buckets of the histograms.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Seconds between writing the metrics of a worker to the shared directory.
+FLUSH_INTERVAL = 1
+
+# Name, type, help and buckets of every metric.
+METRICS = {
+    'morpheus_requests_total': ('counter', 'Requests served per route, method and status.', None),
+    'morpheus_request_duration_seconds': ('histogram', 'Time to serve a request per route.', LATENCY_BUCKETS),
+    'morpheus_response_size_bytes': ('histogram', 'Size of the response bodies per route.', SIZE_BUCKETS),
+    'morpheus_db_duration_seconds': ('histogram', 'Time spent on database queries per request per route.', LATENCY_BUCKETS),
+    'morpheus_db_queries_total': ('counter', 'Database queries run per route.', None),
+    'morpheus_requests_in_flight': ('gauge', 'Requests being served.', None),
+    'morpheus_cache_requests_total': ('counter', 'Cacheable requests per result, i.e., hit, miss, not_modified or coalesced.', None),
+    'morpheus_cache_evictions_total': ('counter', 'Responses evicted from the response cache.', None),
+    'morpheus_cache_bytes': ('gauge', 'Size of the responses in the response cache.', None),
+    'morpheus_cache_hit_ratio': ('gauge', 'Share of the cacheable requests answered without computing the response.', None),
+    'morpheus_admission_total': ('counter', 'Heavy requests per decision, i.e., admitted or rejected.', None),
+    'morpheus_compressed_responses_total': ('counter', 'Compressed responses per encoding, and whether the body was compressed or cached.', None),
+    'morpheus_compression_input_bytes_total': ('counter', 'Bytes of the bodies before compression per encoding.', None),
+    'morpheus_compression_output_bytes_total': ('counter', 'Bytes of the bodies after compression per encoding.', None),
+    'morpheus_compression_cpu_seconds_total': ('counter', 'CPU time spent compressing per encoding.', None),
+    'morpheus_compression_ratio': ('gauge', 'Size of the compressed bodies relative to the uncompressed ones per encoding.', None),
+}
+
+
+class WorkerMetrics():
+    """
+    The metrics of a single worker. A counter or gauge is a value per label
+    set, a histogram the count per bucket followed by the sum and the count.
+    """
+    def __init__(self):
+        self.values: Dict[str, Dict[Labels, float | List[float]]] = defaultdict(dict)
+        self.lock = threading.Lock()
+
+    def inc(self, name: str, labels: Labels, amount: float=1):
+        with self.lock:
+            self.values[name][labels] = self.values[name].get(labels, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float):
+        buckets = METRICS[name][2]
+        with self.lock:
+            if (histogram := self.values[name].get(labels)) is None:
+                histogram = self.values[name][labels] = [0] * (len(buckets) + 3)
+
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self) -> Dict[str, List]:
+        with self.lock:
+            return {name: [[list(map(list, labels)), value] for labels, value in values.items()] for name, values in self.values.items()}
+
+
+def merge(snapshots: Iterable[Dict[str, List]]) -> Dict[str, Dict[Labels, float | List[float]]]:
+    """
+    Sum the metrics of the workers.
+    """
+    merged = defaultdict(dict)
+    for snapshot in snapshots:
+        for name, values in snapshot.items():
+            for labels, value in values:
+                labels = tuple(map(tuple, labels))
+                if (previous := merged[name].get(labels)) is None:
+                    merged[name][labels] = value
+                elif isinstance(value, list):
+                    merged[name][labels] = [a + b for a, b in zip(previous, value)]
+                else:
+                    merged[name][labels] = previous + value
+    return merged
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def render(metrics: Dict[str, Dict[Labels, float | List[float]]]) -> str:
+    """
+    The metrics in the Prometheus text format.
+    """
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        if not (values := metrics.get(name)):
+            continue
+
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(values.items()):
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter():
+    """
+    Exports the metrics of all workers of a server. Every worker writes its
+    metrics to a file of its own in a shared directory, without a directory
+    the exporter only knows the metrics of its own process. The metrics of
+    workers that stopped keep counting, except for their gauges.
+    """
+    def __init__(self, directory: Path | None=None):
+        self.directory = directory
+        self.worker = WorkerMetrics()
+
+        self.__pid = None
+        self.__dirty = threading.Event()
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for path in self.directory.glob('*.json'):
+                if not _is_alive(int(path.stem)):
+                    path.unlink(missing_ok=True)
+
+    def changed(self):
+        """
+        Write the metrics of the worker soon, once a worker starts serving it
+        writes its metrics in the background.
+        """
+        if self.directory is None:
+            return
+
+        if self.__pid != os.getpid():
+            self.__pid = os.getpid()
+            threading.Thread(target=self.__flush_periodically, daemon=True).start()
+        self.__dirty.set()
+
+    def __flush_periodically(self):
+        while True:
+            self.__dirty.wait()
+            self.__dirty.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning("Unable to write metrics: %s", e)
+            time.sleep(FLUSH_INTERVAL)
+
+    def flush(self):
+        path = self.directory / f'{os.getpid()}.json'
+        temporary_path = path.with_suffix('.tmp')
+        with open(temporary_path, 'w') as f:
+            json.dump(self.__worker_snapshot(), f)
+        os.replace(temporary_path, path)
+
+    def __worker_snapshot(self) -> Dict[str, List]:
+        """
+        The metrics of the worker, including those of the caches and
+        admission control of the worker.
+        """
+        snapshot = self.worker.snapshot()
+        def add(name: str, labels: Labels, value: float):
+            snapshot.setdefault(name, []).append([list(map(list, labels)), value])
+
+        # Coalesced requests missed the cache first.
+        coalesced = sum(flight.coalesced for flight in (cache.single_flight, cache.shared_flight) if flight is not None)
+        if cache.single_flight is not None:
+            add('morpheus_cache_requests_total', (('result', 'coalesced'),), coalesced)
+
+        if (response_cache := cache.get_response_cache()) is not None:
+            stats = response_cache.stats()
+            add('morpheus_cache_requests_total', (('result', 'hit'),), stats['hits'])
+            add('morpheus_cache_requests_total', (('result', 'miss'),), max(stats['misses'] - coalesced, 0))
+            add('morpheus_cache_requests_total', (('result', 'not_modified'),), stats['not_modified'])
+            add('morpheus_cache_evictions_total', (), stats['evictions'])
+            add('morpheus_cache_bytes', (), stats['bytes'])
+
+        if (admission_control := admission.get_admission_control()) is not None:
+            add('morpheus_admission_total', (('decision', 'admitted'),), admission_control.admitted)
+            add('morpheus_admission_total', (('decision', 'rejected'),), admission_control.rejected)
+
+        if (compressor := compression.get_compressor()) is not None:
+            for encoding, (compressed, reused, input_bytes, output_bytes, duration) in compressor.statistics.items():
+                labels = (('encoding', encoding),)
+                add('morpheus_compressed_responses_total', labels + (('source', 'compressed'),), compressed)
+                add('morpheus_compressed_responses_total', labels + (('source', 'cached'),), reused)
+                add('morpheus_compression_input_bytes_total', labels, input_bytes)
+                add('morpheus_compression_output_bytes_total', labels, output_bytes)
+                add('morpheus_compression_cpu_seconds_total', labels, duration)
+
+        return snapshot
+
+    def collect(self) -> Dict[str, Dict[Labels, float | List[float]]]:
+        snapshots = [self.__worker_snapshot()]
+
+        if self.directory is not None:
+            for path in self.directory.glob('*.json'):
+                pid = int(path.stem)
+                if pid == os.getpid():
+                    continue
+
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+
+                # Nothing is in flight in a stopped worker.
+                if not _is_alive(pid):
+                    snapshot = {name: values for name, values in snapshot.items() if METRICS[name][0] != 'gauge'}
+                snapshots.append(snapshot)
+
+        metrics = merge(snapshots)
+
+        requests = metrics.get('morpheus_cache_requests_total', {})
+        total = sum(requests.values())
+        if total:
+            answered = sum(value for labels, value in requests.items() if labels != (('result', 'miss'),))
+            metrics['morpheus_cache_hit_ratio'] = {(): answered / total}
+
+        output_bytes = metrics.get('morpheus_compression_output_bytes_total', {})
+        ratios = {labels: output_bytes.get(labels, 0) / value for labels, value in metrics.get('morpheus_compression_input_bytes_total', {}).items() if value}
+        if ratios:
+            metrics['morpheus_compression_ratio'] = ratios
+
+        return metrics
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+metrics_exporter: MetricsExporter | None = None
+
+def get_metrics_exporter() -> MetricsExporter | None:
+    return metrics_exporter
+
+
+def init_metrics(app: Flask, directory: Path | None=None) -> MetricsExporter:
+    """
+    Record the requests of every route, after the request timing so the
+    database time of a request is known.
+    """
+    global metrics_exporter
+
+    metrics_exporter = MetricsExporter(directory)
+    worker = metrics_exporter.worker
+
+    @app.before_request
+    def start_request():
+        g.metrics_start_time = time.perf_counter()
+        worker.inc('morpheus_requests_in_flight', ())
+
+    @app.after_request
+    def record_request(response: Response):
+        if (start_time := g.get('metrics_start_time')) is None:
+            return response
+
+        route = (('route', request.url_rule.rule if request.url_rule is not None else 'unmatched'),)
+        worker.inc('morpheus_requests_total', route + (('method', request.method), ('status', str(response.status_code))))
+        worker.observe('morpheus_request_duration_seconds', route, time.perf_counter() - start_time)
+
+        if response.content_length is not None:
+            worker.observe('morpheus_response_size_bytes', route, response.content_length)
+
+        if (statistics := g.get('query_statistics')) is not None:
+            worker.observe('morpheus_db_duration_seconds', route, statistics.duration)
+            worker.inc('morpheus_db_queries_total', route, statistics.queries)
+        return response
+
+    @app.teardown_request
+    def finish_request(exception):
+        if g.pop('metrics_start_time', None) is not None:
+            worker.inc('morpheus_requests_in_flight', (), -1)
+            metrics_exporter.changed()
+
+    return metrics_exporter
@@ -0,0 +1,43 @@
+from typing import NamedTuple
+from flask import has_request_context, request
+from flask_restx import abort
+
+# Items of a page when the client does not set a limit, and the most it may ask for.
+PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+class Page(NamedTuple):
+    # Id of the last item of the previous page.
+    after: int
+    limit: int
+
+
+def requested_page() -> Page | None:
+    """
+    The page of a list the request asks for with the after and limit
+    arguments, None for the whole list, also outside of a request. The pages
+    are ordered by id.
+    """
+    if not has_request_context() or ('after' not in request.args and 'limit' not in request.args):
+        return None
+
+    try:
+        page = Page(int(request.args.get('after', 0)), int(request.args.get('limit', PAGE_SIZE)))
+    except ValueError:
+        abort(400, 'The after and limit arguments have to be integers.')
+
+    if not 0 < page.limit <= MAX_PAGE_SIZE:
+        abort(400, f'The limit has to be between 1 and {MAX_PAGE_SIZE}.')
+    return page
+
+
+def paginated(name: str, items: list, page: Page | None) -> dict:
+    """
+    The items of a list response, with the cursor of the next page when
+    the list is paginated, None on the last page.
+    """
+    if page is None:
+        return {name: items}
+
+    return {name: items, 'next': items[-1]['id'] if len(items) == page.limit else None}
@@ -0,0 +1,317 @@
+import logging
+import timeit
+import numpy as np
+from itertools import chain
+from typing import Callable, Dict, List, Optional, Tuple
+from morpheus.database.edges import project_edges
+from morpheus.database.models.methods import CommitMethodVersion, ProdMethod, ProdMethodVersion, TestMethod
+from morpheus.database.models.repository import Commit, Project
+from morpheus.database.util import public_columns, row2dict, rows2dicts
+
+logger = logging.getLogger(__name__)
+
+Response = Tuple[Dict, int]
+
+# Rows fetched at once while streaming the method versions of the commits.
+FETCH_SIZE = 10000
+
+
+def _pointers(keys: np.ndarray, size: int) -> np.ndarray:
+    """
+    Offsets of the runs of every key within the sorted keys, i.e., the index
+    pointer of a compressed sparse matrix.
+    """
+    return np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=size))]).astype(np.int64)
+
+
+class _Column():
+    """
+    The values of a single column of all rows. Integers are kept as an
+    array and text as a single string, UTF-8 encoded unless it is ASCII,
+    with the offsets of the values. So there is no Python object per row
+    whose reference count would copy the pages of a forked worker. None
+    values are masked.
+    """
+    def __init__(self, values: List):
+        self.present = np.array([value is not None for value in values], dtype=bool) if None in values else None
+        self.text: str | bytes | None = None
+
+        if all(value is None or isinstance(value, str) for value in values):
+            encoded = [value.encode() if value is not None else b'' for value in values]
+            self.text = b''.join(encoded)
+            if self.text.isascii():
+                self.text = self.text.decode()
+            self.offsets = np.concatenate([[0], np.cumsum([len(value) for value in encoded])]).astype(np.int64)
+        elif all(value is None or type(value) is int for value in values):
+            self.values = np.array([0 if value is None else value for value in values], dtype=np.int64)
+        else:
+            self.values = values
+
+    def get(self, rows: np.ndarray) -> List:
+        if isinstance(self.text, str):
+            values = [self.text[start:end] for start, end in zip(self.offsets[rows].tolist(), self.offsets[rows + 1].tolist())]
+        elif self.text is not None:
+            values = [self.text[start:end].decode() for start, end in zip(self.offsets[rows].tolist(), self.offsets[rows + 1].tolist())]
+        elif isinstance(self.values, np.ndarray):
+            values = self.values[rows].tolist()
+        else:
+            values = [self.values[row] for row in rows.tolist()]
+
+        if self.present is not None:
+            values = [value if is_present else None for value, is_present in zip(values, self.present[rows].tolist())]
+        return values
+
+
+class _Entities():
+    """
+    The rows of a single model of a project sorted by id, an id is mapped to
+    its row with a binary search. The rank of a row is its position in the
+    order the routes list the entities in. The rows are kept as columns, the
+    dicts of a response are built from them when it is answered.
+    """
+    def __init__(self, model, rows: List, order_key: Callable | None=None):
+        rows = sorted(rows, key=lambda row: row.id)
+
+        self.ids = np.array([row.id for row in rows], dtype=np.int64)
+        self.keys = tuple(column.name for column in public_columns(model.__table__))
+        self.columns = [_Column([getattr(row, key) for row in rows]) for key in self.keys]
+
+        self.by_rank = np.arange(len(rows), dtype=np.int64)
+        if order_key is not None:
+            self.by_rank = np.array(sorted(range(len(rows)), key=lambda i: order_key(rows[i]), reverse=True), dtype=np.int64)
+
+        self.rank = np.empty(len(rows), dtype=np.int64)
+        self.rank[self.by_rank] = np.arange(len(rows))
+
+    def dicts(self, rows: np.ndarray) -> List[Dict]:
+        """
+        The rows as row2dict converts their entities.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        values = zip(*(column.get(rows) for column in self.columns))
+        if any(column.present is not None for column in self.columns):
+            return rows2dicts(values, self.keys)
+        return [dict(zip(self.keys, row)) for row in values]
+
+    def dict(self, row: int) -> Dict:
+        return self.dicts(np.array([row], dtype=np.int64))[0]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, entity_id: int) -> Optional[int]:
+        idx = int(np.searchsorted(self.ids, entity_id))
+        if idx < len(self.ids) and self.ids[idx] == entity_id:
+            return idx
+        return None
+
+    def rows(self, entity_ids: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.ids, entity_ids)
+
+
+class _ProjectCoverage():
+    """
+    The coverage of a single project. The edges are kept in three orders:
+    per commit sorted by test and method, i.e., a CSR matrix of tests by
+    methods per commit, per method sorted by commit and test, i.e., the CSC
+    matrices of all commits stacked, and per test sorted by commit and
+    method version.
+    """
+    def __init__(self, session, project: Project):
+        self.project = row2dict(project)
+
+        self.tests = _Entities(
+            TestMethod,
+            session.query(TestMethod).filter(TestMethod.project_id == project.id).all(),
+            lambda test: (test.package_name, test.class_name, test.method_name)
+        )
+        self.methods = _Entities(
+            ProdMethod,
+            session.query(ProdMethod).filter(ProdMethod.project_id == project.id).all(),
+            lambda method: (method.package_name, method.class_name, method.method_decl)
+        )
+        self.commits = _Entities(Commit, session.query(Commit).filter(Commit.project_id == project.id).all())
+
+        self.__load_members(session, project)
+        self.__load_edges(session, project)
+
+    def __load_members(self, session, project: Project):
+        """
+        The methods of every commit, in the order of the commit coverage
+        route, and the commits of every method.
+        """
+        rows = session.query(CommitMethodVersion.commit_id, ProdMethodVersion.method_id) \
+            .join(ProdMethodVersion, ProdMethodVersion.id == CommitMethodVersion.method_version_id) \
+            .join(Commit, Commit.id == CommitMethodVersion.commit_id) \
+            .filter(Commit.project_id == project.id) \
+            .yield_per(FETCH_SIZE)
+
+        members = np.fromiter(chain.from_iterable(rows), dtype=np.int64).reshape(-1, 2)
+        members = np.unique(np.stack([self.commits.rows(members[:, 0]), self.methods.rows(members[:, 1])], axis=1), axis=0)
+        (commit_rows, method_rows) = (members[:, 0], members[:, 1])
+
+        order = np.lexsort((self.methods.rank[method_rows], commit_rows))
+        self.commit_methods = method_rows[order]
+        self.commit_methods_ptr = _pointers(commit_rows, len(self.commits))
+
+        order = np.lexsort((commit_rows, method_rows))
+        self.method_commits = commit_rows[order]
+        self.method_commits_ptr = _pointers(method_rows, len(self.methods))
+
+    def __load_edges(self, session, project: Project):
+        commit_ids = []
+        edges = []
+        for commit_id, commit_edges in project_edges(session, project.id):
+            commit_ids.append(np.full(len(commit_edges), commit_id, dtype=np.int64))
+            edges.append(np.array(list(commit_edges), dtype=np.int64).reshape(-1, 4))
+
+        commit_ids = np.concatenate(commit_ids) if commit_ids else np.empty(0, dtype=np.int64)
+        edges = np.concatenate(edges) if edges else np.empty((0, 4), dtype=np.int64)
+
+        self.edge_commit = self.commits.rows(commit_ids)
+        self.edge_test = self.tests.rows(edges[:, 0])
+        self.edge_version = edges[:, 1]
+        self.edge_method = self.methods.rows(edges[:, 2])
+        self.edge_result = edges[:, 3].astype(bool)
+
+        self.by_commit = np.lexsort((self.edge_version, self.edge_result, self.edge_method, self.edge_test, self.edge_commit))
+        self.by_commit_ptr = _pointers(self.edge_commit, len(self.commits))
+
+        self.by_method = np.lexsort((self.edge_version, self.edge_test, self.edge_commit, self.edge_method))
+        self.by_method_ptr = _pointers(self.edge_method, len(self.methods))
+
+        self.by_test = np.lexsort((self.edge_version, self.edge_commit, self.edge_test))
+        self.by_test_ptr = _pointers(self.edge_test, len(self.tests))
+
+    def commit_coverage(self, commit_id: int) -> Optional[Response]:
+        if (commit := self.commits.row(commit_id)) is None:
+            return None
+
+        methods = self.commit_methods[self.commit_methods_ptr[commit]:self.commit_methods_ptr[commit + 1]]
+        edges = self.by_commit[self.by_commit_ptr[commit]:self.by_commit_ptr[commit + 1]]
+        tests = self.tests.by_rank[np.unique(self.tests.rank[self.edge_test[edges]])]
+
+        return {
+            "project": self.project,
+            "commit": self.commits.dict(commit),
+            "coverage": {
+                "methods": self.methods.dicts(methods),
+                "tests": self.tests.dicts(tests),
+                "edges": [
+                    {'test_id': test_id, 'method_id': method_id, 'test_result': test_result}
+                    for test_id, method_id, test_result in zip(
+                        self.tests.ids[self.edge_test[edges]].tolist(),
+                        self.methods.ids[self.edge_method[edges]].tolist(),
+                        self.edge_result[edges].tolist()
+                    )
+                ],
+            }
+        }, 200
+
+    def method_history(self, method_id: int) -> Optional[Response]:
+        if (method := self.methods.row(method_id)) is None:
+            return None
+
+        commits = self.method_commits[self.method_commits_ptr[method]:self.method_commits_ptr[method + 1]]
+        if not len(commits):
+            return {'msg': 'Commits not found...'}, 404
+
+        edges = self.by_method[self.by_method_ptr[method]:self.by_method_ptr[method + 1]]
+        if not len(edges):
+            return {'msg': 'Method is not covered by any test case.'}, 404
+
+        return {
+            "project": self.project,
+            "method": self.methods.dict(method),
+            "coverage": {
+                "commits": self.commits.dicts(commits),
+                "tests": self.tests.dicts(np.unique(self.edge_test[edges])),
+                "edges": [
+                    {'test_id': test_id, 'commit_id': commit_id, 'test_result': test_result}
+                    for test_id, commit_id, test_result in zip(
+                        self.tests.ids[self.edge_test[edges]].tolist(),
+                        self.commits.ids[self.edge_commit[edges]].tolist(),
+                        self.edge_result[edges].tolist()
+                    )
+                ],
+            }
+        }, 200
+
+    def test_history(self, test_id: int) -> Optional[Response]:
+        if (test := self.tests.row(test_id)) is None:
+            return None
+
+        edges = self.by_test[self.by_test_ptr[test]:self.by_test_ptr[test + 1]]
+        if not len(edges):
+            return {"msg": "Test is not covering any methods."}, 404
+
+        return {
+            "project": self.project,
+            "test": self.tests.dict(test),
+            "coverage": {
+                "commits": self.commits.dicts(np.unique(self.edge_commit[edges])),
+                "methods": self.methods.dicts(np.unique(self.edge_method[edges])),
+                "edges": [
+                    {"commit_id": commit_id, "method_version_id": method_version_id, "method_id": method_id, "test_result": test_result}
+                    for commit_id, method_version_id, method_id, test_result in zip(
+                        self.commits.ids[self.edge_commit[edges]].tolist(),
+                        self.edge_version[edges].tolist(),
+                        self.methods.ids[self.edge_method[edges]].tolist(),
+                        self.edge_result[edges].tolist()
+                    )
+                ],
+            }
+        }, 200
+
+
+class CoverageStore():
+    """
+    All coverage of a read-only database in memory, the coverage routes are
+    answered by slicing arrays instead of querying the database. Anything
+    the store does not know about is left to the database, i.e., None is
+    returned.
+    """
+    def __init__(self, projects: Dict[int, _ProjectCoverage]):
+        self.__projects = projects
+
+    @staticmethod
+    def load(session) -> 'CoverageStore':
+        start_time = timeit.default_timer()
+
+        projects = {project.id: _ProjectCoverage(session, project) for project in session.query(Project).all()}
+
+        logger.info('Loading coverage of %s projects in memory: %s', len(projects), timeit.default_timer() - start_time)
+        return CoverageStore(projects)
+
+    def __project(self, project_id) -> Optional[_ProjectCoverage]:
+        try:
+            return self.__projects.get(int(project_id))
+        except ValueError:
+            return None
+
+    def commit_coverage(self, project_id, commit_id) -> Optional[Response]:
+        if (project := self.__project(project_id)) is None or not str(commit_id).isdigit():
+            return None
+        return project.commit_coverage(int(commit_id))
+
+    def method_history(self, project_id, method_id) -> Optional[Response]:
+        if (project := self.__project(project_id)) is None or not str(method_id).isdigit():
+            return None
+        return project.method_history(int(method_id))
+
+    def test_history(self, project_id, test_id) -> Optional[Response]:
+        if (project := self.__project(project_id)) is None or not str(test_id).isdigit():
+            return None
+        return project.test_history(int(test_id))
+
+
+coverage_store: CoverageStore | None = None
+
+def load_coverage_store(session) -> CoverageStore:
+    global coverage_store
+
+    coverage_store = CoverageStore.load(session)
+    return coverage_store
+
+def get_coverage_store() -> CoverageStore | None:
+    return coverage_store
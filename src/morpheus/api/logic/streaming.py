@@ -0,0 +1,75 @@
+from typing import Iterable, Iterator, List
+from flask import Response, has_request_context, request, stream_with_context
+from morpheus.api.logic.admission import renew_query_deadline
+from morpheus.api.logic.formats import JSON, encode_json, response_mediatype
+
+# Rows fetched from the database at once while streaming.
+STREAM_BATCH = 1000
+
+# Bytes of a response collected before they are sent.
+STREAM_BUFFER = 1 << 16
+
+
+class RowStream():
+    """
+    A list of a streamed response, produced in batches while it is sent.
+    """
+    def __init__(self, batches: Iterable[List]):
+        self.batches = batches
+
+
+def is_streaming() -> bool:
+    """
+    Whether the client asked to stream the response, only JSON is streamed.
+    Routes called outside of a request, e.g., to extract static files, are
+    never streamed.
+    """
+    if not has_request_context():
+        return False
+    return request.args.get('stream', '').lower() in ('1', 'true') and response_mediatype() == JSON
+
+
+def _encode(data) -> Iterator[bytes]:
+    if isinstance(data, RowStream):
+        yield b'['
+        separator = b''
+        batches = iter(data.batches)
+        while True:
+            # The queries of a batch run when it is taken from the stream.
+            renew_query_deadline()
+            if (batch := next(batches, None)) is None:
+                break
+            if batch:
+                # The items of the batch without the brackets of the list.
+                yield separator + encode_json(batch)[1:-1]
+                separator = b','
+        yield b']'
+    elif isinstance(data, dict):
+        yield b'{'
+        for index, (key, value) in enumerate(data.items()):
+            yield (b',' if index else b'') + encode_json(str(key)) + b':'
+            yield from _encode(value)
+        yield b'}'
+    else:
+        yield encode_json(data)
+
+
+def _buffered(chunks: Iterator[bytes], size: int=STREAM_BUFFER) -> Iterator[bytes]:
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= size:
+            yield bytes(buffer)
+            buffer.clear()
+    yield bytes(buffer) + b'\n'
+
+
+def streamed_response(data: dict, status: int=200) -> Response:
+    """
+    Send the JSON of the data while it is encoded, the row streams in it
+    are consumed one batch at a time. The request, and its session, last
+    until the response is sent.
+    """
+    response = Response(stream_with_context(_buffered(_encode(data))), status=status, mimetype=JSON)
+    response.vary.add('Accept')
+    return response
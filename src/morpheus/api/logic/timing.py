@@ -0,0 +1,65 @@
+import functools
+import logging
+import time
+from flask import Flask, Response, g, request
+from flask_restx import Api
+from morpheus.database.instrumentation import collect_statistics, stop_statistics
+
+logger = logging.getLogger(__name__)
+
+
+def timed_representation(representation):
+    """
+    Keep track of the time spent serializing the response of the request.
+    """
+    @functools.wraps(representation)
+    def represent(data, code, headers=None):
+        start_time = time.perf_counter()
+        response = representation(data, code, headers)
+        g.serialization_time = g.get('serialization_time', 0.0) + time.perf_counter() - start_time
+        return response
+
+    represent.timed = True
+    return represent
+
+
+def init_request_timing(app: Flask, api: Api):
+    """
+    Report the queries, rows, and time spent on the database and on
+    serializing of every request, in a Server-Timing header and a log line.
+    Has to be initialized before any other request hooks, so it includes them.
+    """
+    for mediatype, representation in api.representations.items():
+        if not getattr(representation, 'timed', False):
+            api.representations[mediatype] = timed_representation(representation)
+
+    @app.before_request
+    def start_timing():
+        g.request_start_time = time.perf_counter()
+        g.query_statistics = collect_statistics()
+
+    @app.after_request
+    def report_timing(response: Response):
+        if (start_time := g.pop('request_start_time', None)) is None:
+            return response
+
+        total = time.perf_counter() - start_time
+        statistics = g.pop('query_statistics')
+        serialization = g.pop('serialization_time', 0.0)
+
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={statistics.duration * 1000:.2f};desc="{statistics.queries} queries, {statistics.rows} rows"',
+            f'serialize;dur={serialization * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+        logger.info(
+            "request method=%s path=%s status=%s cache=%s queries=%s rows=%s db_ms=%.2f serialize_ms=%.2f total_ms=%.2f",
+            request.method, request.path, response.status_code, response.headers.get('X-Cache', '-'),
+            statistics.queries, statistics.rows, statistics.duration * 1000, serialization * 1000, total * 1000
+        )
+        return response
+
+    @app.teardown_request
+    def stop_timing(exception):
+        stop_statistics()
@@ -1,12 +1,53 @@
 import logging
-from flask import Blueprint
+from flask import Blueprint, make_response
 from flask_restx import Api
 from . import API_CONSTANTS
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm.exc import NoResultFound
+from morpheus.api.logic.admission import RETRY_AFTER
+from morpheus.api.logic.formats import BINARY, COLUMNAR, JSON, columnar, dump_json, pack_binary, response_mediatype
+from morpheus.database.db import is_interrupted
 
 logger = logging.getLogger(__name__)
 
-api: Api = Api(**API_CONSTANTS)
+
+class MorpheusApi(Api):
+    """
+    Selects the representation of a response by the format argument of the
+    request as well as by its Accept header.
+    """
+    def make_response(self, data, *args, **kwargs):
+        kwargs.pop('fallback_mediatype', None)
+
+        mediatype = response_mediatype()
+        response = self.representations[mediatype](data, *args, **kwargs)
+        response.headers['Content-Type'] = mediatype
+        response.vary.add('Accept')
+        return response
+
+
+api: Api = MorpheusApi(**API_CONSTANTS)
+
+
+def _encoded_response(body: bytes, code, headers):
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    return response
+
+
+@api.representation(JSON)
+def output_json(data, code, headers=None):
+    return _encoded_response(dump_json(data), code, headers)
+
+
+@api.representation(COLUMNAR)
+def output_columnar(data, code, headers=None):
+    return _encoded_response(dump_json(columnar(data)), code, headers)
+
+
+@api.representation(BINARY)
+def output_binary(data, code, headers=None):
+    return _encoded_response(pack_binary(data), code, headers)
 
 
 @api.errorhandler
@@ -20,4 +61,16 @@ def default_error_handler(e):
 @api.errorhandler(NoResultFound)
 def database_not_found_error_handler(e):
     logger.warning("Database not found...")
-    return {'message': 'A database result was required but none was found.'}, 404
\ No newline at end of file
+    return {'message': 'A database result was required but none was found.'}, 404
+
+
+@api.errorhandler(OperationalError)
+def database_error_handler(e):
+    # Logged by flask-restx as any server error.
+    if is_interrupted(e):
+        return {'message': 'The request took too long, try again later.'}, 503, {'Retry-After': str(RETRY_AFTER)}
+
+    message = 'An unhandled exception occurred.'
+    logger.exception(message)
+
+    return {'message': message}, 500
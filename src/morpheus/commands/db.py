@@ -1,18 +1,33 @@
+import hashlib
 import logging
 import json
 import os
 from pathlib import Path
 from os.path import isdir, realpath, join, sep
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterator, List, Tuple
 from tqdm import tqdm
+from morpheus.analysis.parser.coverage import CoverageBatch
 from morpheus.analysis.parser.methods import MethodParser
 from morpheus.analysis.parser.tacoco import TacocoParser
 from morpheus.config import Config
+from morpheus.database.models.methods import CoverageEdge, CoverageEdgeDelta, LineCoverage, LineSet, ProdMethod, ProdMethodVersion
 from morpheus.database.models.repository import Project, Commit
-from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.db import create_engine_and_session, deferred_indexes, init_db
+from morpheus.database.edges import KEYFRAME_INTERVAL, EdgeStorageFormat, EdgeWriter
+from morpheus.database.identity import ProjectIdentities
+from morpheus.database.lineset import LineCoverageFormat
+from morpheus.database.util import delete_commit_data
 
 logger = logging.getLogger(__name__)
 
+# Commit json, checksum, methods and coverage of a single commit
+ParsedCommit = Tuple[Dict, str, List[Tuple[ProdMethod, ProdMethodVersion]], CoverageBatch]
+
+# Analysis files of a commit, in the order they are checksummed
+COMMIT_FILES = ('commits.json', 'methods.json', 'coverage-cov-matrix.json')
+
 def get_directories(root_path) -> list[tuple[str, Path]]:
     projects = []
 
@@ -32,7 +47,7 @@ def load_json(path):
     with open(path) as f:
         return json.load(f)
 
-def create_database(input_directory, database_path: Path, is_single_project: bool):
+def create_database(input_directory, database_path: Path, is_single_project: bool, bulk_load: bool=False, jobs: int=1, line_coverage: LineCoverageFormat=LineCoverageFormat.ROWS, edge_storage: EdgeStorageFormat=EdgeStorageFormat.FULL, keyframe_interval: int=KEYFRAME_INTERVAL):
 
     # Update configuration
     if database_path is not None:
@@ -41,7 +56,7 @@ def create_database(input_directory, database_path: Path, is_single_project: boo
     logger.debug("Database path: %s", Config.DATABASE_PATH)
 
     logger.info("Initialize database")
-    (engine, Session) = create_engine_and_session()
+    (engine, Session) = create_engine_and_session(bulk_load=bulk_load)
     
     init_db(engine)
 
@@ -61,81 +76,204 @@ def create_database(input_directory, database_path: Path, is_single_project: boo
     else:
         logger.debug("Project(s) found: %s", projects)
 
-    # Iterate over project and directory name tuple
-    for (project_name, project_path) in tqdm(projects):
-        add_project(Session, project_name, project_path)
+    # Secondary indexes of the coverage are only needed when querying, when
+    # bulk loading they are dropped and rebuild once all data is stored.
+    deferred_tables = [LineCoverage.__table__, CoverageEdge.__table__, CoverageEdgeDelta.__table__, LineSet.__table__] if bulk_load else []
+
+    with deferred_indexes(engine, deferred_tables):
+        # Iterate over project and directory name tuple
+        for (project_name, project_path) in tqdm(projects):
+            add_project(Session, project_name, project_path, jobs, line_coverage, EdgeWriter(edge_storage, keyframe_interval))
 
 
-def add_project(Session, project_name, project_path):
+def add_project(Session, project_name, project_path, jobs: int=1, line_coverage: LineCoverageFormat=LineCoverageFormat.ROWS, edge_writer: EdgeWriter=None):
     logger.info(f"Start storing project '{project_name}' in database.")
 
     # Store Project
     project_json = load_json( project_path / 'project.json')
-    project = Project(**project_json)
 
-    if Session.query(Project).filter(Project.project_name==project_name).first() is None:
+    if (project := Session.query(Project).filter(Project.project_name==project_name).first()) is None:
+        project = Project(**project_json)
         Session.add(project)
         Session.commit()
 
-    for (commit_sha, commit_path) in tqdm(get_directories(project_path)):
+    # Remove the data of commits of which the storing was interrupted, they
+    # are stored again below.
+    incomplete_commits = Session.query(Commit.id, Commit.sha) \
+        .filter(Commit.project_id == project.id, Commit.complete == False) \
+        .all()
+
+    for (commit_id, commit_sha) in incomplete_commits:
+        logger.warning("Remove partially stored commit %s", commit_sha)
+        delete_commit_data(Session, commit_id)
+    Session.commit()
+
+    # Checksums of the commits that are completely stored
+    stored_commits: Dict[str, str] = dict(
+        Session.query(Commit.sha, Commit.checksum) \
+            .filter(Commit.project_id == project.id, Commit.complete == True) \
+            .all()
+    )
+
+    # Keep the method and test ids of the project around for all commits
+    identities = ProjectIdentities(project.id)
+
+    if edge_writer is None:
+        edge_writer = EdgeWriter()
+    edge_writer.reset()
+
+    commits = get_directories(project_path)
+    for (commit_sha, parsed_commit) in tqdm(_parse_commits(commits, stored_commits, jobs), total=len(commits)):
         try:
-            __analyze_commit(Session, project, commit_sha, commit_path)
+            if isinstance(parsed_commit, Exception):
+                raise parsed_commit
+
+            if parsed_commit is None:
+                logger.info("Commit %s is already stored, skip it", commit_sha)
+                continue
+
+            __store_commit(Session, project, commit_sha, parsed_commit, identities, line_coverage, edge_writer)
         except:
             logger.error("Failed to store commit %s in database", commit_sha)
+            identities.reset()
+            edge_writer.reset()
             continue
 
-def __analyze_commit(Session, project: Project, commit_sha: str, commit_path: Path):
-    logger.info(f"Start storing commit '{commit_sha}'/{commit_path}")
 
-    # Store Commit
-    commit_json = load_json(commit_path / 'commits.json')
-    commit = Commit(**commit_json, project_id=project.id)
+def _parse_commits(commits: List[Tuple[str, Path]], stored_commits: Dict[str, str], jobs: int) -> Iterator[Tuple[str, ParsedCommit | None | Exception]]:
+    """
+    Parse the commits in a pool of processes, while the results are yielded
+    in order to a single writer. At most two commits per process are parsed
+    ahead of the writer to bound the memory that is used.
+    """
+    if jobs <= 1:
+        for (commit_sha, commit_path) in commits:
+            try:
+                yield commit_sha, _parse_commit(commit_sha, commit_path, stored_commits.get(commit_sha))
+            except Exception as e:
+                yield commit_sha, e
+        return
 
-    Session.add(commit)
-    Session.commit()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: Deque[Tuple[str, Future]] = deque()
+        remaining = iter(commits)
+
+        while True:
+            while len(pending) < 2 * jobs and (commit := next(remaining, None)) is not None:
+                (commit_sha, commit_path) = commit
+                pending.append((commit_sha, executor.submit(_parse_commit, commit_sha, commit_path, stored_commits.get(commit_sha))))
+
+            if not pending:
+                break
+
+            (commit_sha, future) = pending.popleft()
+            try:
+                yield commit_sha, future.result()
+            except Exception as e:
+                yield commit_sha, e
+
+
+def _checksum(commit_path: Path) -> str:
+    checksum = hashlib.sha256()
+
+    for file_name in COMMIT_FILES:
+        with open(commit_path / file_name, 'rb') as f:
+            while (chunk := f.read(1 << 20)):
+                checksum.update(chunk)
+
+    return checksum.hexdigest()
+
+
+def _parse_commit(commit_sha: str, commit_path: Path, stored_checksum: str | None=None) -> ParsedCommit | None:
+    """
+    Parse the analysis files of a commit, returns None if the commit has
+    already been stored from the same files.
+    """
+    methods_file = commit_path / 'methods.json'
+    tacoco_file = commit_path / 'coverage-cov-matrix.json'
 
-    parsed_methods = []
-    parsed_coverage = []
-    
-    #  Parse Methods
     try:
-        methods_file = commit_path / 'methods.json'
-        tacoco_file = commit_path / 'coverage-cov-matrix.json'
+        checksum = _checksum(commit_path)
+        if checksum == stored_checksum:
+            return None
 
+        logger.info(f"Start parsing commit '{commit_sha}'/{commit_path}")
         logger.debug("Parse methods/tacoco json: %s %s", methods_file, tacoco_file)
 
-        methods_json = load_json(methods_file)
+        commit_json = load_json(commit_path / 'commits.json')
+
         parsed_methods = MethodParser()\
-            .parse(methods_json)
+            .parse(load_json(methods_file))
 
-        coverage_json = load_json(tacoco_file)
         parsed_coverage =  TacocoParser()\
-            .parse(coverage_json)
-
+            .parse_file(tacoco_file)
     except:
-        logger.critical("Failing to parse tacoco/methods file - commit: %s", commit.id)
-        Session.delete(commit)
-        Session.flush()
+        logger.critical("Failing to parse tacoco/methods file - commit: %s", commit_sha)
         raise
 
-    #  Parse Coverage.
+    return commit_json, checksum, parsed_methods, parsed_coverage
+
+
+def __store_commit(Session, project: Project, commit_sha: str, parsed_commit: ParsedCommit, identities: ProjectIdentities, line_coverage: LineCoverageFormat=LineCoverageFormat.ROWS, edge_writer: EdgeWriter=None):
+    logger.info(f"Start storing commit '{commit_sha}'")
+
+    (commit_json, checksum, parsed_methods, parsed_coverage) = parsed_commit
+
+    # The commit is marked incomplete in a transaction of its own. When a
+    # run is interrupted while storing it, e.g., a crash while bulk loading
+    # keeps no journal to roll back, the next run removes what was stored.
     try:
+        if (commit := Session.query(Commit).filter(Commit.project_id == project.id, Commit.sha == commit_json['sha']).first()) is None:
+            commit = Commit(**commit_json, project_id=project.id)
+            Session.add(commit)
+            is_stored = False
+        else:
+            is_stored = True
+
+        commit.complete = False
+        Session.commit()
+    except Exception as exc:
+        logger.critical("Failed to store data in database - commit: %s, Exception: %s", commit_sha, exc)
+        Session.rollback()
+        raise
+
+    #  Store the commit, its methods and coverage within a single transaction.
+    try:
+        # Commits that were stored before are replaced, but keep their id.
+        if is_stored:
+            logger.info("Replace previously stored commit %s", commit.sha)
+            delete_commit_data(Session, commit.id)
+
+            # Versions that only this commit had are gone
+            identities.versions.reset()
+
+            for key, value in commit_json.items():
+                setattr(commit, key, value)
+
+        commit.checksum = checksum
+        Session.flush()
+
         MethodParser().store(
             session=Session,
             project=project,
             commit=commit,
-            methods=parsed_methods
+            methods=parsed_methods,
+            identities=identities
         )
 
         TacocoParser().store(
             session=Session,
             project=project,
             commit=commit,
-            coverage=parsed_coverage
+            coverage=parsed_coverage,
+            identities=identities,
+            line_coverage=line_coverage,
+            edge_writer=edge_writer
         )
 
-    except:
-        logger.critical("Failed to store data in database - commit: %s, Exception: %s", commit.id, exc)
-        Session.delete(commit)
-        Session.flush()
+        commit.complete = True
+        Session.commit()
+    except Exception as exc:
+        logger.critical("Failed to store data in database - commit: %s, Exception: %s", commit_sha, exc)
+        Session.rollback()
         raise
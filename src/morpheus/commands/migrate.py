@@ -0,0 +1,30 @@
+import logging
+from os.path import isfile
+from pathlib import Path
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db, migrate_db, requires_migration
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_database(database_path: Path):
+    """
+    Bring a database created by an older version up to date, and reclaim the
+    space freed by the rebuilt tables.
+    """
+    if not isfile(database_path):
+        logger.error("Database doesn't exist, %s", database_path)
+        return 1
+
+    Config.DATABASE_PATH = str(database_path.resolve())
+    (engine, _) = create_engine_and_session()
+
+    if requires_migration(engine):
+        migrate_db(engine)
+
+    init_db(engine)
+
+    logger.info("Compact database")
+    with engine.execution_options(isolation_level='AUTOCOMMIT').connect() as connection:
+        connection.exec_driver_sql("VACUUM")
+        connection.exec_driver_sql("ANALYZE")
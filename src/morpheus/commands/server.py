@@ -1,5 +1,7 @@
+import gc
 import logging
 from pathlib import Path
+from typing import NamedTuple
 from flask import Flask
 from flask_cors import CORS
 from morpheus.api.rest import api
@@ -8,20 +10,76 @@ from morpheus.api.endpoints.methods_routes import ns as methods_routes
 from morpheus.api.endpoints.tests_routes import ns as tests_namespace
 from morpheus.api.endpoints.coverage_routes import ns as coverage_namespace
 from morpheus.api.endpoints.general_routes import ns as health_namespace
+from morpheus.api.endpoints.metrics_routes import ns as metrics_namespace
+from morpheus.api.logic.admission import HEAVY_QUEUE, HEAVY_REQUESTS, QUERY_DEADLINE, init_admission_control
+from morpheus.api.logic.cache import CACHE_SIZE, init_response_cache
+from morpheus.api.logic.compression import COMPRESS_LEVEL, MIN_SIZE, init_compression
+from morpheus.api.logic.metrics import init_metrics
+from morpheus.api.logic.store import load_coverage_store
+from morpheus.api.logic.timing import init_request_timing
 from morpheus.config import Config
 
-from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.db import create_engine_and_session, database_generation, enable_query_deadlines, init_db
+from morpheus.database.instrumentation import instrument_engine
 
 logger = logging.getLogger(__name__)
 
-def create_morpheus_backend(database: Path):
+class ServerOptions(NamedTuple):
+    """Options of the server besides its database, defaults to serving it read-write without a cache."""
+    read_only: bool = False
+    preload: bool = False
+    # MiB of responses cached per worker.
+    cache_size: int = CACHE_SIZE
+    cache_compress: bool = False
+    coalesce_directory: Path | None = None
+    heavy_requests: int = HEAVY_REQUESTS
+    heavy_queue: int = HEAVY_QUEUE
+    query_deadline: float = QUERY_DEADLINE
+    slow_query_ms: float | None = None
+    metrics_directory: Path | None = None
+    compress_level: int = COMPRESS_LEVEL
+    compress_min_size: int = MIN_SIZE
+
+def create_morpheus_backend(database: Path, options: ServerOptions=ServerOptions()):
     """Initialize the server with all the REST endpoints"""
+    if options.preload and not options.read_only:
+        logger.error("Preloading the coverage requires serving the database read-only")
+        raise RuntimeError("Preloading the coverage requires serving the database read-only")
+
     app =  Flask(__name__)
     CORS(app)
 
     Config.DATABASE_PATH = database.resolve()
-    (engine, Session) = create_engine_and_session()
-    init_db(engine)
+    (engine, Session) = create_engine_and_session(read_only=options.read_only)
+    instrument_engine(engine, options.slow_query_ms)
+    init_db(engine, options.read_only)
+    enable_query_deadlines(engine)
+
+    # Loaded before gunicorn forks, the workers share the arrays of the
+    # store. The garbage collector leaves the objects loaded so far alone,
+    # as collecting them would copy their pages into every worker.
+    if options.preload:
+        load_coverage_store(Session)
+        Session.remove()
+        gc.collect()
+        gc.freeze()
+
+    # Connections must not be shared with the forked workers.
+    engine.dispose()
+
+    # First, so the timing includes the other request hooks.
+    init_request_timing(app, api)
+    init_metrics(app, options.metrics_directory)
+
+    # Responses only stay valid as long as the database does not change.
+    if options.read_only:
+        init_response_cache(app, database_generation(Config.DATABASE_PATH), options.cache_size << 20, options.cache_compress, options.coalesce_directory)
+
+    # After the cache, requests answered from memory are always admitted.
+    init_admission_control(app, options.heavy_requests, options.heavy_queue, options.query_deadline)
+
+    # After the cache, which keeps the compressed bodies.
+    init_compression(app, options.compress_level, options.compress_min_size)
 
     # Add routes
     api.init_app(app)
@@ -30,6 +88,7 @@ def create_morpheus_backend(database: Path):
     api.add_namespace(tests_namespace)
     api.add_namespace(coverage_namespace)
     api.add_namespace(health_namespace)
+    api.add_namespace(metrics_namespace)
 
     # Remove database after using it.
     @app.teardown_appcontext
@@ -38,9 +97,9 @@ def create_morpheus_backend(database: Path):
 
     return app
 
-def start_morpheus_backend(database: Path, host, port, debug=True):
+def start_morpheus_backend(database: Path, host, port, debug=True, options: ServerOptions=ServerOptions()):
     """Start morpheus server"""
-    app = create_morpheus_backend(database)
+    app = create_morpheus_backend(database, options)
 
     app.run(
         host=str(host),
@@ -48,8 +107,10 @@ def start_morpheus_backend(database: Path, host, port, debug=True):
         debug=debug
     )
 
-def start_gunicorn(database):
-    """Start morpheus server using gunicorn"""
+def start_gunicorn(database, **options):
+    """Start morpheus server using gunicorn, with the options of ServerOptions as keyword arguments"""
 
-    database_path = Path(database)
-    return create_morpheus_backend(database_path)
+    for name in ('coalesce_directory', 'metrics_directory'):
+        if options.get(name) is not None:
+            options[name] = Path(options[name])
+    return create_morpheus_backend(Path(database), ServerOptions(**options))
@@ -1,14 +1,88 @@
-from typing import Tuple
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Set, Tuple
+from urllib.parse import quote
 from sqlalchemy.engine.base import Engine
 from morpheus.config import Config
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, Table, create_engine, event, inspect
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import QueuePool
 
+logger = logging.getLogger(__name__)
+
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': -512000,
+    'temp_store': 'MEMORY',
+}
+
+# Serving never writes, read pages straight from the memory mapped file and
+# keep a warm page cache per connection.
+READ_ONLY_PRAGMAS = {
+    'query_only': 'ON',
+    'mmap_size': 1 << 30,
+    'cache_size': -65536,
+    'temp_store': 'MEMORY',
+}
+
+# Connections a read-only server keeps open per process, as many as the
+# threads of a gunicorn worker. Further threads, e.g., of the development
+# server, open a connection that is closed once they return it.
+READ_ONLY_POOL_SIZE = 4
+
+# Columns added to existing tables, the definition includes the value used
+# for the rows that already exist.
+COLUMN_UPGRADES = {
+    'commits': {
+        'checksum': 'VARCHAR',
+        'complete': 'BOOLEAN NOT NULL DEFAULT 1',
+        'edge_base_id': 'INTEGER',
+    },
+    'method_versions': {
+        'content_hash': 'VARCHAR',
+    },
+}
+
+# Tables derived from other tables, filled when they are added to an
+# existing database.
+TABLE_BACKFILLS = {
+    'coverage_edges': """
+        INSERT INTO coverage_edges (commit_id, test_id, method_version_id, method_id, test_result)
+        SELECT linecoverage.commit_id, linecoverage.test_id, linecoverage.method_version_id, method_versions.method_id, MIN(linecoverage.test_result)
+        FROM linecoverage JOIN method_versions ON method_versions.id = linecoverage.method_version_id
+        GROUP BY linecoverage.commit_id, linecoverage.test_id, linecoverage.method_version_id
+    """,
+    'commit_method_versions': """
+        INSERT INTO commit_method_versions (commit_id, method_version_id)
+        SELECT commit_id, id FROM method_versions
+    """,
+}
+
+# Tables of which the schema changed in a way ALTER TABLE cannot express,
+# they are rebuilt by `matrix migrate`. Per table the path column of the
+# old schema that became a source file reference, and how to join the
+# project of a row.
+TABLE_REBUILDS = {
+    'method_versions': ('file_path', 'JOIN prodmethods ON prodmethods.id = old.method_id', 'prodmethods.project_id'),
+    'linecoverage': ('full_name', 'JOIN commits ON commits.id = old.commit_id', 'commits.project_id'),
+}
+
+# Virtual machine instructions SQLite executes between checks of the
+# query deadline.
+PROGRESS_INTERVAL = 10000
 
 engine: Engine
 session: Session
 
+query_deadline = threading.local()
+
 def get_session() -> Session:
     global session
 
@@ -25,20 +99,253 @@ def get_engine():
 
     return engine
 
-def create_engine_and_session() -> Tuple[Engine, Session]:
+def create_engine_and_session(bulk_load: bool=False, read_only: bool=False) -> Tuple[Engine, Session]:
     global engine 
     global session
 
-    engine = create_engine(f"{Config.SQLALCHEMY_DATABASE_TYPE}{Config.DATABASE_PATH}")
+    if read_only:
+        # The database file is not allowed to change while it is served, so
+        # SQLite can skip all locking. The threads share a pool of
+        # connections, a connection is used by one thread at a time.
+        engine = create_engine(
+            f"{Config.SQLALCHEMY_DATABASE_TYPE}file:{quote(str(Config.DATABASE_PATH))}?mode=ro&immutable=1&uri=true",
+            connect_args={'check_same_thread': False},
+            poolclass=QueuePool,
+            pool_size=READ_ONLY_POOL_SIZE,
+            max_overflow=-1
+        )
+        event.listen(engine, 'connect', _set_read_only_pragmas)
+    else:
+        engine = create_engine(f"{Config.SQLALCHEMY_DATABASE_TYPE}{Config.DATABASE_PATH}")
+
     session = scoped_session(sessionmaker(bind=engine))
 
+    if bulk_load:
+        event.listen(engine, 'connect', _set_bulk_load_pragmas)
+
     return (engine, session)
 
 
+def _set_bulk_load_pragmas(dbapi_connection, connection_record):
+    """
+    Trade durability for speed while loading, a crash during the load
+    requires the database to be rebuild.
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma, value in BULK_LOAD_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def _set_read_only_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in READ_ONLY_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def database_generation(path) -> str:
+    """
+    Identifier of the current contents of a database, derived from the file
+    change counter SQLite keeps in the header and the state of the file.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(100)
+    stat = os.stat(path)
+
+    generation = hashlib.sha1(header[24:28] + f'{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return generation.hexdigest()[:16]
+
+
+def set_query_deadline(seconds: float | None):
+    """
+    Interrupt the queries of the current thread that run after the given
+    amount of seconds, None removes the deadline.
+    """
+    query_deadline.at = time.monotonic() + seconds if seconds is not None else None
+
+
+def enable_query_deadlines(engine: Engine):
+    event.listen(engine, 'connect', _set_progress_handler)
+
+
+def _set_progress_handler(dbapi_connection, connection_record):
+    dbapi_connection.set_progress_handler(_query_deadline_exceeded, PROGRESS_INTERVAL)
+
+
+def _query_deadline_exceeded() -> int:
+    # SQLite aborts the query with an 'interrupted' error on a non-zero value.
+    deadline = getattr(query_deadline, 'at', None)
+    return int(deadline is not None and time.monotonic() > deadline)
+
+
+def is_interrupted(error: Exception) -> bool:
+    return isinstance(error, OperationalError) and 'interrupted' in str(error.orig)
+
+
+@contextmanager
+def deferred_indexes(engine: Engine, tables: List[Table]):
+    """
+    Drop the secondary indexes of the tables and rebuild them once all data
+    has been loaded.
+    """
+    indexes = [index for table in tables for index in table.indexes]
+
+    for index in indexes:
+        index.drop(bind=engine, checkfirst=True)
+
+    try:
+        yield
+    finally:
+        for index in indexes:
+            logger.info("Rebuilding index %s", index.name)
+            index.create(bind=engine, checkfirst=True)
+
+        if indexes:
+            with engine.connect() as connection:
+                connection.exec_driver_sql("ANALYZE")
+
+
 
-def init_db(engine):
+def init_db(engine, read_only: bool=False):
     import morpheus.database.models.repository
     import morpheus.database.models.methods
     from morpheus.database.models import Base
 
+    if requires_migration(engine):
+        logger.error("Database uses an outdated schema, run 'matrix migrate' first")
+        raise RuntimeError("Database uses an outdated schema, run 'matrix migrate' first")
+
+    # A read-only database cannot be upgraded, it has to be up to date.
+    if read_only:
+        if (missing := missing_schema(engine, Base.metadata)):
+            logger.error("Database misses %s, run 'matrix migrate' first", ', '.join(missing))
+            raise RuntimeError("Database uses an outdated schema, run 'matrix migrate' first")
+        return
+
+    existing_tables = set(inspect(engine).get_table_names())
+
     Base.metadata.create_all(bind=engine)
+
+    upgrade_db(engine, Base.metadata, existing_tables)
+
+
+def upgrade_db(engine, metadata: MetaData, existing_tables: Set[str]):
+    """
+    Add the columns, tables and indexes that were introduced after a
+    database was created.
+    """
+    with engine.begin() as connection:
+        # Nothing to derive from in a new database.
+        if existing_tables:
+            for table_name, statement in TABLE_BACKFILLS.items():
+                if table_name not in existing_tables:
+                    logger.info("Fill table %s from existing data", table_name)
+                    connection.exec_driver_sql(statement)
+
+        for table_name, columns in COLUMN_UPGRADES.items():
+            existing_columns = {column['name'] for column in inspect(connection).get_columns(table_name)}
+
+            for column_name, definition in columns.items():
+                if column_name not in existing_columns:
+                    logger.info("Add column %s.%s to database", table_name, column_name)
+                    connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+
+        for table_name in existing_tables & set(metadata.tables):
+            for index in metadata.tables[table_name].indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
+def missing_schema(engine, metadata: MetaData) -> List[str]:
+    """
+    The tables and columns of the models that are not in the database.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    missing = []
+    for table_name, table in metadata.tables.items():
+        if table_name not in existing_tables:
+            missing.append(table_name)
+            continue
+
+        existing_columns = {column['name'] for column in inspector.get_columns(table_name)}
+        missing.extend(f'{table_name}.{column.name}' for column in table.columns if column.name not in existing_columns)
+
+    return missing
+
+
+def requires_migration(engine) -> bool:
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    return any(
+        path_column in {column['name'] for column in inspector.get_columns(table_name)}
+        for table_name, (path_column, _, _) in TABLE_REBUILDS.items()
+        if table_name in existing_tables
+    )
+
+
+def migrate_db(engine):
+    """
+    Rebuild the tables with an outdated schema, replacing the paths by
+    references to the source files. All tables are rebuilt in a single
+    transaction.
+    """
+    from morpheus.database.models import Base
+
+    with engine.execution_options(isolation_level='AUTOCOMMIT').connect() as connection:
+        # Keep the foreign keys of other tables pointing to the rebuilt tables.
+        connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+
+        # The driver does not start a transaction for schema changes itself.
+        with connection.begin():
+            connection.exec_driver_sql("BEGIN")
+
+            Base.metadata.tables['source_files'].create(bind=connection, checkfirst=True)
+
+            for table_name, (path_column, project_join, project_column) in TABLE_REBUILDS.items():
+                old_columns = {column['name'] for column in inspect(connection).get_columns(table_name)}
+                if path_column not in old_columns:
+                    continue
+
+                logger.info("Rebuild table %s", table_name)
+                table = Base.metadata.tables[table_name]
+
+                connection.exec_driver_sql(f"ALTER TABLE {table_name} RENAME TO {table_name}_old")
+                old_indexes = connection.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (f'{table_name}_old',)
+                ).scalars().all()
+                for index_name in old_indexes:
+                    connection.exec_driver_sql(f"DROP INDEX {index_name}")
+
+                table.create(bind=connection)
+
+                connection.exec_driver_sql(f"""
+                    INSERT OR IGNORE INTO source_files (project_id, path)
+                    SELECT DISTINCT {project_column}, old.{path_column} FROM {table_name}_old AS old {project_join}
+                """)
+
+                columns = [column.name for column in table.columns if column.name in old_columns]
+                primary_key = [column.name for column in table.primary_key.columns]
+                (rows, unique_rows) = connection.exec_driver_sql(f"""
+                    SELECT (SELECT COUNT(*) FROM {table_name}_old),
+                        (SELECT COUNT(*) FROM (SELECT DISTINCT {', '.join(columns)}, {path_column} FROM {table_name}_old))
+                """).one()
+                copied_rows = connection.exec_driver_sql(f"""
+                    INSERT OR IGNORE INTO {table_name} ({', '.join(columns)}, source_file_id)
+                    SELECT {', '.join(f'old.{column}' for column in columns)}, source_files.id
+                    FROM {table_name}_old AS old {project_join}
+                    JOIN source_files ON source_files.project_id = {project_column} AND source_files.path = old.{path_column}
+                    ORDER BY {', '.join(f'old.{column}' for column in primary_key)}
+                """).rowcount
+
+                # Only rows of which an identical copy exists may be left out,
+                # any other row conflicting with the new schema is an error.
+                if copied_rows != unique_rows:
+                    logger.error("Migrating table %s would lose %s of its %s rows, the database is left as it was", table_name, unique_rows - copied_rows, rows)
+                    raise RuntimeError(f"Rows of table {table_name} conflict with the new schema")
+                if rows != unique_rows:
+                    logger.warning("Left out %s duplicate rows of table %s", rows - unique_rows, table_name)
+
+                connection.exec_driver_sql(f"DROP TABLE {table_name}_old")
@@ -0,0 +1,218 @@
+import logging
+from enum import Enum
+from typing import Collection, Dict, Iterable, Iterator, List, Set, Tuple
+from morpheus.database.models.methods import CoverageEdge, CoverageEdgeDelta
+from morpheus.database.models.repository import Commit
+from morpheus.database.util import insert_many
+
+logger = logging.getLogger(__name__)
+
+# test_id, method_version_id, method_id, test_result
+Edge = Tuple[int, int, int, bool]
+
+EDGE_COLUMNS = ('test_id', 'method_version_id', 'method_id', 'test_result')
+
+# Maximum number of commits from a delta to its keyframe.
+KEYFRAME_INTERVAL = 32
+
+
+class EdgeStorageFormat(Enum):
+    FULL  = 'full'   # All edges of every commit
+    DELTA = 'delta'  # Edges added and removed since the previous commit, with periodic keyframes
+
+
+class _Frame():
+    def __init__(self, commit_id: int, edges: Set[Edge], chain_length: int):
+        self.commit_id = commit_id
+        self.edges = edges
+        self.chain_length = chain_length
+
+
+class EdgeWriter():
+    """
+    Stores the coverage edges of the commits of a project in the order they
+    are stored. In delta mode a commit only stores the difference with the
+    previously stored commit, unless the chain of deltas gets too long or
+    the difference is larger than the commit itself.
+    """
+    def __init__(self, storage: EdgeStorageFormat=EdgeStorageFormat.FULL, keyframe_interval: int=KEYFRAME_INTERVAL):
+        self.__storage = storage
+        self.__keyframe_interval = keyframe_interval
+        self.__previous: _Frame | None = None
+
+    def reset(self):
+        self.__previous = None
+
+    def store(self, session, commit: Commit, edges: Iterable[Edge]):
+        edges = set(edges)
+        base = self.__previous
+
+        if self.__storage == EdgeStorageFormat.DELTA \
+                and base is not None \
+                and base.chain_length + 1 < self.__keyframe_interval:
+            added = edges - base.edges
+            removed = base.edges - edges
+
+            if len(added) + len(removed) < len(edges):
+                insert_many(session, CoverageEdgeDelta.__table__, ('commit_id', *EDGE_COLUMNS, 'added'), [
+                    *((commit.id, *edge, True) for edge in added),
+                    *((commit.id, *edge, False) for edge in removed),
+                ])
+
+                commit.edge_base_id = base.commit_id
+                self.__previous = _Frame(commit.id, edges, base.chain_length + 1)
+                return
+
+        insert_many(session, CoverageEdge.__table__, ('commit_id', *EDGE_COLUMNS), [(commit.id, *edge) for edge in edges])
+
+        commit.edge_base_id = None
+        self.__previous = _Frame(commit.id, edges, 0)
+
+
+def _apply(edges: Set[Edge], deltas: List[Tuple[Edge, bool]]) -> Set[Edge]:
+    edges = set(edges)
+    for edge, added in deltas:
+        if added:
+            edges.add(edge)
+        else:
+            edges.discard(edge)
+    return edges
+
+
+def commit_edges(session, commit_id: int) -> Set[Edge]:
+    """
+    Rebuild the edges of a commit from its keyframe and the deltas after it.
+    """
+    chain = [commit_id]
+    while (base_id := session.query(Commit.edge_base_id).filter(Commit.id == chain[-1]).scalar()) is not None:
+        chain.append(base_id)
+
+    (keyframe_id, *delta_ids) = reversed(chain)
+
+    edges: Set[Edge] = set(map(tuple, session.query(*(getattr(CoverageEdge, column) for column in EDGE_COLUMNS)) \
+        .filter(CoverageEdge.commit_id == keyframe_id) \
+        .all()))
+
+    if not delta_ids:
+        return edges
+
+    deltas: Dict[int, List[Tuple[Edge, bool]]] = {}
+    rows = session.query(CoverageEdgeDelta.commit_id, *(getattr(CoverageEdgeDelta, column) for column in EDGE_COLUMNS), CoverageEdgeDelta.added) \
+        .filter(CoverageEdgeDelta.commit_id.in_(delta_ids)) \
+        .all()
+
+    for delta_commit_id, *edge, added in rows:
+        deltas.setdefault(delta_commit_id, []).append((tuple(edge), added))
+
+    for delta_id in delta_ids:
+        edges = _apply(edges, deltas.get(delta_id, []))
+
+    return edges
+
+
+def history_edges(session, project_id: int, column: str, value: int | Collection[int]) -> List[Tuple[int, Edge]]:
+    """
+    The (commit, edge) pairs of all commits of a project for the edges of
+    which the column, i.e., 'test_id' or 'method_id', has the given value,
+    or any of the given values.
+    """
+    values = [value] if isinstance(value, int) else list(value)
+
+    keyframes: Dict[int, Set[Edge]] = {}
+    rows = session.query(CoverageEdge.commit_id, *(getattr(CoverageEdge, c) for c in EDGE_COLUMNS)) \
+        .filter(getattr(CoverageEdge, column).in_(values)) \
+        .all()
+
+    for commit_id, *edge in rows:
+        keyframes.setdefault(commit_id, set()).add(tuple(edge))
+
+    bases: Dict[int, int] = dict(
+        session.query(Commit.id, Commit.edge_base_id) \
+            .filter(Commit.project_id == project_id, Commit.edge_base_id != None) \
+            .all()
+    )
+
+    if not bases:
+        return [(commit_id, edge) for commit_id, edges in keyframes.items() for edge in edges]
+
+    deltas: Dict[int, List[Tuple[Edge, bool]]] = {}
+    rows = session.query(CoverageEdgeDelta.commit_id, *(getattr(CoverageEdgeDelta, c) for c in EDGE_COLUMNS), CoverageEdgeDelta.added) \
+        .filter(getattr(CoverageEdgeDelta, column).in_(values)) \
+        .all()
+
+    for commit_id, *edge, added in rows:
+        deltas.setdefault(commit_id, []).append((tuple(edge), added))
+
+    children: Dict[int, List[int]] = {}
+    for commit_id, base_id in bases.items():
+        children.setdefault(base_id, []).append(commit_id)
+
+    # Replay the deltas from every keyframe, depth first.
+    result = [(commit_id, edge) for commit_id, edges in keyframes.items() for edge in edges]
+    stack = [(child_id, keyframes.get(commit_id, set())) for commit_id in children if commit_id not in bases for child_id in children[commit_id]]
+    while stack:
+        (commit_id, base_edges) = stack.pop()
+        edges = _apply(base_edges, deltas.get(commit_id, []))
+
+        result.extend((commit_id, edge) for edge in edges)
+        stack.extend((child_id, edges) for child_id in children.get(commit_id, []))
+
+    return result
+
+
+def project_edges(session, project_id: int) -> Iterator[Tuple[int, Set[Edge]]]:
+    """
+    The edges of every commit of a project, one commit at a time. Delta
+    commits are rebuilt from the edges of the commit they are stored
+    relative to, which are only kept until all its dependents are done.
+    """
+    commits = session.query(Commit.id, Commit.edge_base_id) \
+        .filter(Commit.project_id == project_id) \
+        .order_by(Commit.id) \
+        .all()
+
+    children: Dict[int, List[int]] = {}
+    for commit_id, base_id in commits:
+        if base_id is not None:
+            children.setdefault(base_id, []).append(commit_id)
+
+    stack: List[Tuple[int, Set[Edge] | None]] = [(commit_id, None) for commit_id, base_id in reversed(commits) if base_id is None]
+    while stack:
+        (commit_id, base_edges) = stack.pop()
+
+        if base_edges is None:
+            edges = set(map(tuple, session.query(*(getattr(CoverageEdge, column) for column in EDGE_COLUMNS)) \
+                .filter(CoverageEdge.commit_id == commit_id) \
+                .all()))
+        else:
+            rows = session.query(*(getattr(CoverageEdgeDelta, column) for column in EDGE_COLUMNS), CoverageEdgeDelta.added) \
+                .filter(CoverageEdgeDelta.commit_id == commit_id) \
+                .all()
+            edges = _apply(base_edges, [(tuple(edge), added) for *edge, added in rows])
+
+        yield commit_id, edges
+        stack.extend((child_id, edges) for child_id in reversed(children.get(commit_id, [])))
+
+
+def materialize_dependents(session, commit_id: int):
+    """
+    Turn the commits storing their edges relative to the commit into
+    keyframes, so the commit can be removed or replaced.
+    """
+    dependents = session.query(Commit) \
+        .filter(Commit.edge_base_id == commit_id) \
+        .all()
+
+    for dependent in dependents:
+        edges = commit_edges(session, dependent.id)
+
+        session.query(CoverageEdgeDelta) \
+            .filter(CoverageEdgeDelta.commit_id == dependent.id) \
+            .delete(synchronize_session=False)
+
+        insert_many(session, CoverageEdge.__table__, ('commit_id', *EDGE_COLUMNS), [(dependent.id, *edge) for edge in edges])
+        dependent.edge_base_id = None
+
+    if dependents:
+        logger.info("Stored %s commits depending on commit %s as keyframe", len(dependents), commit_id)
+        session.flush()
@@ -0,0 +1,121 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.dialects.sqlite import insert
+from morpheus.database.models.methods import ProdMethod, ProdMethodVersion, SourceFile, TestMethod
+
+logger = logging.getLogger(__name__)
+
+
+class NaturalKeyResolver():
+    """
+    Maps the natural key of a project entity, e.g., (package, class, method),
+    to its database id. The existing ids are loaded once and new entities are
+    inserted in batches, so resolving a whole commit costs a handful of
+    queries instead of one per entity.
+    """
+    BATCH_SIZE = 500
+
+    def __init__(self, model, key_columns: Tuple[str, ...], project_id: int):
+        self.__model = model
+        self.__key_columns = key_columns
+        self.__project_id = project_id
+        self.__ids: Dict[Tuple, int] = {}
+        self.__last_id = 0
+        self.__loaded = False
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def reset(self):
+        self.__ids = {}
+        self.__last_id = 0
+        self.__loaded = False
+
+    def __load(self, session):
+        """
+        Load all ids that were added since the last load.
+        """
+        columns = [getattr(self.__model, column) for column in self.__key_columns]
+
+        rows = self._filter_project(session.query(self.__model.id, *columns), self.__project_id) \
+            .filter(self.__model.id > self.__last_id) \
+            .all()
+
+        for entity_id, *key in rows:
+            self.__ids[tuple(key)] = entity_id
+            self.__last_id = max(self.__last_id, entity_id)
+
+        self.__loaded = True
+
+    def resolve(self, session, entities: List[Dict]) -> List[Optional[int]]:
+        if not self.__loaded:
+            self.__load(session)
+
+        new_entities: Dict[Tuple, Dict] = {}
+        for entity in entities:
+            key = tuple(entity[column] for column in self.__key_columns)
+            if key not in self.__ids and key not in new_entities:
+                new_entities[key] = self._new_row(entity, self.__project_id)
+
+        if new_entities:
+            statement = insert(self.__model.__table__) \
+                .on_conflict_do_nothing(index_elements=self._conflict_columns(self.__key_columns))
+
+            values = list(new_entities.values())
+            for i in range(0, len(values), self.BATCH_SIZE):
+                session.execute(statement, values[i:i + self.BATCH_SIZE])
+
+            self.__load(session)
+            logger.debug("Inserted %s new %s", len(new_entities), self.__model.__tablename__)
+
+        return [self.__ids.get(tuple(entity[column] for column in self.__key_columns)) for entity in entities]
+
+    def _filter_project(self, query, project_id: int):
+        return query.filter(self.__model.project_id == project_id)
+
+    def _new_row(self, entity: Dict, project_id: int) -> Dict:
+        return dict(entity, project_id=project_id)
+
+    def _conflict_columns(self, key_columns: Tuple[str, ...]) -> List[str]:
+        return ['project_id', *key_columns]
+
+
+class MethodVersionResolver(NaturalKeyResolver):
+    """
+    Maps a method and the hash of its content to the method version, so a
+    method that did not change between commits keeps its version.
+    """
+    def __init__(self, project_id: int):
+        super().__init__(ProdMethodVersion, ('method_id', 'content_hash'), project_id)
+
+    def _filter_project(self, query, project_id: int):
+        # Versions stored before content hashing are never shared.
+        return query.join(ProdMethod, ProdMethod.id == ProdMethodVersion.method_id) \
+            .filter(
+                ProdMethod.project_id == project_id,
+                ProdMethodVersion.content_hash != None
+            )
+
+    def _new_row(self, entity: Dict, project_id: int) -> Dict:
+        return dict(entity)
+
+    def _conflict_columns(self, key_columns: Tuple[str, ...]) -> List[str]:
+        return list(key_columns)
+
+
+class ProjectIdentities():
+    """
+    Identity resolvers of all entities of a single project, kept alive while
+    storing all the commits of the project.
+    """
+    def __init__(self, project_id: int):
+        self.methods = NaturalKeyResolver(ProdMethod, ('package_name', 'class_name', 'method_decl'), project_id)
+        self.tests = NaturalKeyResolver(TestMethod, ('package_name', 'class_name', 'method_name'), project_id)
+        self.versions = MethodVersionResolver(project_id)
+        self.source_files = NaturalKeyResolver(SourceFile, ('path',), project_id)
+
+    def reset(self):
+        self.methods.reset()
+        self.tests.reset()
+        self.versions.reset()
+        self.source_files.reset()
@@ -0,0 +1,135 @@
+import logging
+import sqlite3
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine.base import Engine
+
+logger = logging.getLogger(__name__)
+
+statistics = threading.local()
+
+
+class QueryStatistics():
+    """
+    The queries a thread ran since it started collecting, the time includes
+    fetching the rows, since SQLite computes most rows while they are fetched.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.rows = 0
+
+
+def collect_statistics() -> QueryStatistics:
+    """
+    Collect the statistics of the queries of the current thread from now on.
+    """
+    statistics.current = QueryStatistics()
+    return statistics.current
+
+
+def stop_statistics():
+    statistics.current = None
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor keeping track of the rows it returns and the time spent on them.
+    """
+    statement: str | None = None
+    parameters = None
+    duration = 0.0
+
+    def fetchone(self):
+        start_time = time.perf_counter()
+        row = super().fetchone()
+        self.__fetched(start_time, row is not None)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        rows = super().fetchmany(*args, **kwargs)
+        self.__fetched(start_time, len(rows))
+        return rows
+
+    def fetchall(self):
+        start_time = time.perf_counter()
+        rows = super().fetchall()
+        self.__fetched(start_time, len(rows))
+        return rows
+
+    def close(self):
+        if self.statement is not None:
+            _log_slow_query(self)
+            self.statement = None
+        super().close()
+
+    def __fetched(self, start_time: float, rows: int):
+        duration = time.perf_counter() - start_time
+        self.duration += duration
+
+        # Only the statements executed through the engine, i.e., not those of
+        # the dialect inspecting a new connection.
+        if self.statement is not None and (current := getattr(statistics, 'current', None)) is not None:
+            current.duration += duration
+            current.rows += rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+# Seconds after which a query is logged with its plan, None disables the log.
+slow_query_time: float | None = None
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float | None=None):
+    """
+    Record the queries of the engine, and optionally log the queries that
+    take longer than the given milliseconds. Has to be called before the
+    engine connects.
+    """
+    global slow_query_time
+    slow_query_time = slow_query_ms / 1000 if slow_query_ms else None
+
+    event.listen(engine, 'do_connect', _use_instrumented_connection)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _use_instrumented_connection(dialect, connection_record, cargs, cparams):
+    cparams['factory'] = InstrumentedConnection
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    connection.info['query_start_time'] = time.perf_counter()
+
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - connection.info.pop('query_start_time')
+
+    if isinstance(cursor, InstrumentedCursor):
+        (cursor.statement, cursor.parameters, cursor.duration) = (statement, parameters, duration)
+
+    if (current := getattr(statistics, 'current', None)) is not None:
+        current.queries += 1
+        current.duration += duration
+
+
+def _log_slow_query(cursor: InstrumentedCursor):
+    if slow_query_time is None or cursor.duration < slow_query_time or cursor.statement.lstrip().upper().startswith('EXPLAIN'):
+        return
+
+    try:
+        plan_cursor = sqlite3.Cursor(cursor.connection)
+        plan = [row[-1] for row in plan_cursor.execute(f"EXPLAIN QUERY PLAN {cursor.statement}", cursor.parameters or ()).fetchall()]
+        plan_cursor.close()
+    except sqlite3.Error as e:
+        plan = [f'unavailable: {e}']
+
+    logger.warning(
+        "Slow query of %.1f ms: %s\nparameters: %s\nplan:\n  %s",
+        cursor.duration * 1000, cursor.statement, cursor.parameters, '\n  '.join(plan)
+    )
@@ -0,0 +1,86 @@
+from enum import Enum, IntEnum
+from typing import Iterable, List, Tuple
+import numpy as np
+
+
+class LineSetEncoding(IntEnum):
+    """
+    Encoding of a line set, stored in its first byte.
+    """
+    BITMAP = 0
+    DELTAS = 1
+
+
+class LineCoverageFormat(Enum):
+    ROWS       = 'rows'        # One LineCoverage row per covered line
+    COMPRESSED = 'compressed'  # One LineSet row per test and method version
+    NONE       = 'none'        # Only the coverage edges
+
+
+def _encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(blob: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = blob[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_lines(lines: Iterable[int]) -> bytes:
+    """
+    Pack a set of line numbers as the first line followed by either a bitmap
+    of the lines relative to the first line or the varint encoded gaps
+    between the lines, whichever is smaller.
+    """
+    lines = np.unique(np.fromiter(lines, dtype=np.int64))
+    if len(lines) == 0:
+        return b''
+
+    base = int(lines[0])
+    if base < 0:
+        raise ValueError(f"Line numbers must be positive, got {base}")
+
+    header = bytearray()
+    _encode_varint(base, header)
+
+    deltas = bytearray()
+    for delta in np.diff(lines).tolist():
+        _encode_varint(delta, deltas)
+
+    bitmap_size = (int(lines[-1]) - base) // 8 + 1
+    if bitmap_size < len(deltas):
+        bits = np.zeros(int(lines[-1]) - base + 1, dtype=np.uint8)
+        bits[lines - base] = 1
+        return bytes([LineSetEncoding.BITMAP]) + bytes(header) + np.packbits(bits, bitorder='little').tobytes()
+
+    return bytes([LineSetEncoding.DELTAS]) + bytes(header) + bytes(deltas)
+
+
+def decode_lines(blob: bytes) -> List[int]:
+    if not blob:
+        return []
+
+    (base, pos) = _decode_varint(blob, 1)
+
+    match blob[0]:
+        case LineSetEncoding.BITMAP:
+            bits = np.unpackbits(np.frombuffer(blob, dtype=np.uint8, offset=pos), bitorder='little')
+            return (np.flatnonzero(bits) + base).tolist()
+        case LineSetEncoding.DELTAS:
+            lines = [base]
+            while pos < len(blob):
+                (delta, pos) = _decode_varint(blob, pos)
+                lines.append(lines[-1] + delta)
+            return lines
+        case encoding:
+            raise ValueError(f"Unknown line set encoding: {encoding}")
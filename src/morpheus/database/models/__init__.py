@@ -2,5 +2,5 @@ from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
-from .methods import ProdMethod, ProdMethodVersion, TestMethod, LineCoverage
+from .methods import SourceFile, ProdMethod, ProdMethodVersion, CommitMethodVersion, TestMethod, LineCoverage, CoverageEdge, CoverageEdgeDelta, LineSet
 from .repository import Commit, Project
\ No newline at end of file
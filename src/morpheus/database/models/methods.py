@@ -1,5 +1,6 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String, Boolean, UniqueConstraint
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import Index
 from . import Base
 
@@ -17,20 +18,56 @@ class ProdMethod(Base):
     UniqueConstraint(project_id, package_name, class_name, method_decl)
 
 
+class SourceFile(Base):
+    """
+    Path of a source file within a project, stored once and referenced by
+    the method versions and the line coverage.
+    """
+    __tablename__ = 'source_files'
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
+    path = Column(String, nullable=False)
+
+    UniqueConstraint(project_id, path)
+
+
 class ProdMethodVersion(Base):
     __tablename__ = 'method_versions'
     
     id = Column(Integer, primary_key=True)
     method_id = Column(Integer, ForeignKey('prodmethods.id'), index=True, nullable=False)
+    # Commit in which the version was first stored, the commits containing
+    # the version are in CommitMethodVersion.
     commit_id = Column(Integer, ForeignKey('commits.id'), index=True, nullable=False)
     line_start = Column(Integer, nullable=False, index=True)
     line_end = Column(Integer, nullable=False, index=True)
-    file_path = Column(String, nullable=False, index=True)
+    source_file_id = Column(Integer, ForeignKey('source_files.id'), index=True, nullable=False)
+    content_hash = Column(String, nullable=True)
 
-    UniqueConstraint(method_id, commit_id, file_path)
+    source_file = relationship(SourceFile)
+
+    UniqueConstraint(method_id, commit_id, source_file_id)
+
+    @declared_attr
+    def __table_args__(cls):
+        return (
+            Index('content_idx_%s' % cls.__tablename__, 'method_id', 'content_hash', unique=True),
+        )
 
     def __str__(self):
-        return f"{self.id} {self.method_id} {self.commit_id} {self.line_start} {self.line_end} {self.file_path}"
+        return f"{self.id} {self.method_id} {self.commit_id} {self.line_start} {self.line_end} {self.source_file_id}"
+
+class CommitMethodVersion(Base):
+    """
+    The method versions that are part of a commit, unchanged methods share
+    the same version across commits.
+    """
+    __tablename__ = 'commit_method_versions'
+
+    commit_id = Column(Integer, primary_key=True)
+    method_version_id = Column(Integer, primary_key=True, index=True)
+
 
 class TestMethod(Base):
     __tablename__ = 'testcases'
@@ -47,20 +84,79 @@ class TestMethod(Base):
 class LineCoverage(Base):
     __tablename__ = 'linecoverage'
 
+    # Clustered on the lookup of the lines of a test within a commit, the
+    # rows are stored in the primary key index itself.
+    commit_id = Column(Integer, primary_key=True)
+    test_id = Column(Integer, primary_key=True)
+    method_version_id = Column(Integer, primary_key=True)
+    line_number = Column(Integer, primary_key=True)
+    test_result = Column(Boolean, nullable=False)
+    source_file_id = Column(Integer, ForeignKey('source_files.id'), nullable=False)
+
+    __table_args__ = {'sqlite_with_rowid': False}
+
+
+class CoverageEdge(Base):
+    """
+    A test covering a method version within a commit, i.e., the distinct
+    (commit, test, method version) triples of the line coverage.
+    """
+    __tablename__ = 'coverage_edges'
+
+    id = Column(Integer, primary_key=True)
+    commit_id = Column(Integer, nullable=False)
+    test_id = Column(Integer, nullable=False)
+    method_version_id = Column(Integer, nullable=False)
+    method_id = Column(Integer, nullable=False)
+    test_result = Column(Boolean, nullable=False)
+
+    UniqueConstraint(commit_id, test_id, method_version_id)
+
+    # Covering indexes for the commit, method history and test history routes.
+    @declared_attr
+    def __table_args__(cls):
+        return (
+            Index('commit_edge_idx_%s' % cls.__tablename__, 'commit_id', 'test_id', 'method_id', 'test_result'),
+            Index('method_history_edge_idx_%s' % cls.__tablename__, 'method_id', 'commit_id', 'test_id', 'test_result'),
+            Index('test_history_edge_idx_%s' % cls.__tablename__, 'test_id', 'commit_id', 'method_version_id', 'method_id', 'test_result'),
+        )
+
+
+class CoverageEdgeDelta(Base):
+    """
+    An edge added to or removed from the edges of the commit the commit is
+    stored relative to, see Commit.edge_base_id.
+    """
+    __tablename__ = 'coverage_edge_deltas'
+
     id = Column(Integer, primary_key=True)
     commit_id = Column(Integer, nullable=False, index=True)
-    test_id = Column(Integer, nullable=False, index=True)
-    method_version_id = Column(Integer, nullable=False, index=True)
+    test_id = Column(Integer, nullable=False)
+    method_version_id = Column(Integer, nullable=False)
+    method_id = Column(Integer, nullable=False)
     test_result = Column(Boolean, nullable=False)
-    full_name = Column(String, nullable=False)
-    line_number = Column(Integer, nullable=False)
-    
-    UniqueConstraint(commit_id, test_id, method_version_id, line_number)
+    added = Column(Boolean, nullable=False)
 
     @declared_attr
     def __table_args__(cls):
         return (
-            Index('test_history_edge_idx_%s' % cls.__tablename__, 'commit_id', 'method_version_id', 'test_result'),
-            Index('test_history_edge_sort_idx_%s' % cls.__tablename__, 'method_version_id', 'commit_id'),
-            Index('method_history_edge_sort_idx_%s' % cls.__tablename__, 'method_version_id', 'test_id'),
+            Index('method_history_edge_idx_%s' % cls.__tablename__, 'method_id', 'commit_id'),
+            Index('test_history_edge_idx_%s' % cls.__tablename__, 'test_id', 'commit_id'),
         )
+
+
+class LineSet(Base):
+    """
+    The lines of a method version covered by a test within a commit, packed
+    in a single blob, see morpheus.database.lineset.
+    """
+    __tablename__ = 'coverage_linesets'
+
+    id = Column(Integer, primary_key=True)
+    commit_id = Column(Integer, nullable=False)
+    test_id = Column(Integer, nullable=False)
+    method_version_id = Column(Integer, nullable=False)
+    lines = Column(LargeBinary, nullable=False)
+
+    # Also serves the lookup of the lines of a test within a commit.
+    UniqueConstraint(commit_id, test_id, method_version_id)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.sql.sqltypes import DateTime
 from . import Base
@@ -27,6 +27,15 @@ class Commit(Base):
     author = Column(String, nullable=False)
     datetime = Column(String, nullable=False)
 
+    # Checksum of the analysis files the commit was stored from, and whether
+    # all its data has been stored. Internal columns are left out of responses.
+    checksum = Column(String, nullable=True, info={'internal': True})
+    complete = Column(Boolean, nullable=False, default=False, info={'internal': True})
+
+    # Commit the coverage edges are stored relative to, none if all edges
+    # of the commit are stored.
+    edge_base_id = Column(Integer, nullable=True, info={'internal': True})
+
     # test_results = relationship("LineCoverage", backref=backref('commit', lazy='dynamic'))
     # prod_method_versions = relationship("ProdMethodVersion", backref('commit', lazy='dynamic'))
     
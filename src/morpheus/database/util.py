@@ -1,7 +1,73 @@
+from typing import Dict, Iterable, List, Sequence
+from sqlalchemy import func
+from morpheus.database.models.methods import CommitMethodVersion, CoverageEdge, CoverageEdgeDelta, LineCoverage, LineSet, ProdMethodVersion
+
+
+def public_columns(table) -> List:
+    """
+    The columns of a table that are part of responses, i.e., without the
+    internal bookkeeping of storing the data.
+    """
+    return [column for column in table.columns if not column.info.get('internal', False)]
+
+
 def row2dict(row, ignore_none=False):
     d = {}
-    for column in row.__table__.columns:
+    for column in public_columns(row.__table__):
         if (value := getattr(row, column.name)) is not None:
             d[column.name] = value
 
-    return d
\ No newline at end of file
+    return d
+
+
+def rows2dicts(rows: Iterable[Sequence], keys: Sequence[str]) -> List[Dict]:
+    """
+    The rows of a column projection as row2dict converts an entity, i.e.,
+    without the columns that are None.
+    """
+    return [{key: value for key, value in zip(keys, row) if value is not None} for row in rows]
+
+
+def insert_many(session, table, columns, rows):
+    """
+    Insert the rows, tuples ordered as the given columns, using a single
+    executemany on the DBAPI cursor within the current transaction.
+    """
+    if not rows:
+        return
+
+    statement = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    session.connection().exec_driver_sql(statement, rows)
+
+
+def delete_commit_data(session, commit_id: int):
+    """
+    Delete all data that was stored for a commit, except the commit itself.
+    """
+    from morpheus.database.edges import materialize_dependents
+
+    materialize_dependents(session, commit_id)
+
+    for model in (CoverageEdge, CoverageEdgeDelta, LineCoverage, LineSet, CommitMethodVersion):
+        session.query(model) \
+            .filter(model.commit_id == commit_id) \
+            .delete(synchronize_session=False)
+
+    # Versions that were first stored by the commit, but are shared with
+    # other commits are kept and moved to the first commit still having them.
+    shared_versions = session.query(CommitMethodVersion.method_version_id)
+
+    session.query(ProdMethodVersion) \
+        .filter(
+            ProdMethodVersion.commit_id == commit_id,
+            ProdMethodVersion.id.not_in(shared_versions)
+        ) \
+        .delete(synchronize_session=False)
+
+    first_commit = session.query(func.min(CommitMethodVersion.commit_id)) \
+        .filter(CommitMethodVersion.method_version_id == ProdMethodVersion.id) \
+        .scalar_subquery()
+
+    session.query(ProdMethodVersion) \
+        .filter(ProdMethodVersion.commit_id == commit_id) \
+        .update({ProdMethodVersion.commit_id: first_commit}, synchronize_session=False)
@@ -1,11 +1,18 @@
 import logging
+import os
 from morpheus import __name__ as __tool_name__, __version__
 from pathlib import Path
 from argparse import ArgumentParser
+from morpheus.api.logic.admission import HEAVY_QUEUE, HEAVY_REQUESTS, QUERY_DEADLINE
+from morpheus.api.logic.cache import CACHE_SIZE
+from morpheus.api.logic.compression import COMPRESS_LEVEL, MIN_SIZE
 from morpheus.commands.analysis import run_analysis
-from morpheus.commands.server import start_morpheus_backend
+from morpheus.commands.server import ServerOptions, start_morpheus_backend
 from morpheus.commands.db import create_database
 from morpheus.commands.extract import extract_coverage
+from morpheus.commands.migrate import migrate_database
+from morpheus.database.edges import KEYFRAME_INTERVAL, EdgeStorageFormat
+from morpheus.database.lineset import LineCoverageFormat
 from ipaddress import IPv4Address, ip_address
 
 logger = logging.getLogger(__tool_name__)
@@ -51,8 +58,21 @@ def parse_arguments():
     project_selection.add_argument('--project', type=Path, help="Project path to store in database")
     project_selection.add_argument('--all', type=Path, help="Path to directory of projects to store in database")
 
+    db_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Number of processes used to parse the commits, defaults to the number of CPUs.")
+    db_parser.add_argument('--bulk-load', action='store_true', help="Speed up loading by relaxing durability and rebuilding the coverage indexes once at the end.")
+    db_parser.add_argument('--line-coverage', type=LineCoverageFormat, choices=list(LineCoverageFormat), default=LineCoverageFormat.ROWS, metavar='{rows,compressed,none}', help="How the covered lines are stored: a row per line (default), a compressed set per test and method, or not at all.")
+    db_parser.add_argument('--edge-storage', type=EdgeStorageFormat, choices=list(EdgeStorageFormat), default=EdgeStorageFormat.FULL, metavar='{full,delta}', help="Store all coverage edges of every commit (default), or only the changes since the previous commit.")
+    db_parser.add_argument('--keyframe-interval', type=int, default=KEYFRAME_INTERVAL, help=f"With delta edge storage, store all edges of a commit at least every N commits, defaults to {KEYFRAME_INTERVAL}.")
+
     db_parser.set_defaults(func=morpheus_create_database)
 
+    # -------------------------------------------
+    #  Migrate database CLI parser
+    # -------------------------------------------
+    migrate_parser = subparsers.add_parser("migrate", help="Update database created by an older version to the current schema.")
+    migrate_parser.add_argument('database', type=Path, help="Database location")
+    migrate_parser.set_defaults(func=morpheus_migrate_database)
+
     # -------------------------------------------
     #  Start server CLI parser
     # -------------------------------------------
@@ -61,6 +81,18 @@ def parse_arguments():
     server_parser.add_argument('--host', type=ip_address, default=IPv4Address('127.0.0.1'), help='Port of the tool')
     server_parser.add_argument('-p', '--port', type=int, default=8080, help='Port of the tool')
     server_parser.add_argument('-d', '--debug', action='store_true', help='Turn on flask debugging features.')
+    server_parser.add_argument('--read-only', action='store_true', help='Serve the database read-only, it may not change while the server runs.')
+    server_parser.add_argument('--preload', action='store_true', help='Load all coverage in memory at startup, requires --read-only.')
+    server_parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help=f'With --read-only, MiB of coverage responses kept in memory per worker, 0 disables the cache, defaults to {CACHE_SIZE}.')
+    server_parser.add_argument('--cache-compress', action='store_true', help='Keep the cached responses gzip compressed.')
+    server_parser.add_argument('--coalesce-dir', type=Path, help='With --read-only, directory shared by the workers of a server to compute identical concurrent requests only once.')
+    server_parser.add_argument('--heavy-requests', type=int, default=HEAVY_REQUESTS, help=f'Coverage requests served at once per worker, defaults to {HEAVY_REQUESTS}.')
+    server_parser.add_argument('--heavy-queue', type=int, default=HEAVY_QUEUE, help=f'Coverage requests waiting for their turn per worker, further requests get a 503, defaults to {HEAVY_QUEUE}.')
+    server_parser.add_argument('--query-deadline', type=float, default=QUERY_DEADLINE, help=f'Seconds the queries of a request may take before they are interrupted, 0 disables the deadline, defaults to {QUERY_DEADLINE}.')
+    server_parser.add_argument('--slow-query-ms', type=float, help='Log the queries taking longer than the given milliseconds, with their query plan.')
+    server_parser.add_argument('--metrics-dir', type=Path, help='Directory shared by the workers of a server to aggregate the metrics of /api/metrics.')
+    server_parser.add_argument('--compress-level', type=int, default=COMPRESS_LEVEL, help=f'Level of the gzip and quality of the brotli compression of the responses, 0 disables compression, defaults to {COMPRESS_LEVEL}.')
+    server_parser.add_argument('--compress-min-size', type=int, default=MIN_SIZE, help=f'Bytes a response needs to be compressed, defaults to {MIN_SIZE}.')
     server_parser.set_defaults(func=morpheus_start_backend)
 
     # -------------------------------------------
@@ -84,10 +116,27 @@ def morpheus_analysis(args):
 
 
 def morpheus_create_database(args):
-    create_database(args.project, args.output, True)
+    create_database(args.project or args.all, args.output, args.all is None, args.bulk_load, args.jobs, args.line_coverage, args.edge_storage, args.keyframe_interval)
+
+def morpheus_migrate_database(args):
+    migrate_database(args.database)
 
 def morpheus_start_backend(args):
-    start_morpheus_backend(args.database, args.host, args.port, args.debug)
+    options = ServerOptions(
+        read_only=args.read_only,
+        preload=args.preload,
+        cache_size=args.cache_size,
+        cache_compress=args.cache_compress,
+        coalesce_directory=args.coalesce_dir,
+        heavy_requests=args.heavy_requests,
+        heavy_queue=args.heavy_queue,
+        query_deadline=args.query_deadline,
+        slow_query_ms=args.slow_query_ms,
+        metrics_directory=args.metrics_dir,
+        compress_level=args.compress_level,
+        compress_min_size=args.compress_min_size,
+    )
+    start_morpheus_backend(args.database, args.host, args.port, args.debug, options)
 
 def morpheus_extract_coverage(args):
     extract_coverage(args.database, args.output)
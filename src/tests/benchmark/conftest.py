@@ -0,0 +1,111 @@
+import json
+import random
+import shutil
+import pytest
+from pathlib import Path
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.edges import EdgeStorageFormat
+from tests.history import store_history
+
+RESOURCE_PATH = Path("./tests/resources/")
+TACOCO_FILE = RESOURCE_PATH / "jpacman-coverage-cov-matrix.json"
+
+COMMIT_COUNT = 1000
+METHOD_COUNT = 200
+TEST_COUNT = 100
+EDGE_COUNT = 500
+CHURN = 5
+
+
+def churned_history(rng: random.Random):
+    """
+    A fixed set of methods, of which a few coverage edges change between
+    consecutive commits.
+    """
+    pairs = [(test, method) for test in range(TEST_COUNT) for method in range(METHOD_COUNT)]
+    edges = set(rng.sample(pairs, EDGE_COUNT))
+
+    for i in range(COMMIT_COUNT):
+        edges -= set(rng.sample(sorted(edges), CHURN))
+        edges |= set(rng.sample(pairs, CHURN))
+        yield (set(range(METHOD_COUNT)) if i == 0 else set()), {(test, method, True) for test, method in edges}
+
+
+def create_history(storage: EdgeStorageFormat):
+    (engine, session) = create_engine_and_session()
+    init_db(engine)
+
+    store_history(session, 'history', [f'method{i}' for i in range(METHOD_COUNT)], [f'test{i}' for i in range(TEST_COUNT)], churned_history(random.Random(0)), storage)
+    session.close()
+
+
+@pytest.fixture(scope='session')
+def history_database(tmp_path_factory):
+    def _create(storage: EdgeStorageFormat) -> Path:
+        database_path = tmp_path_factory.getbasetemp() / f'history-{storage.value}.sqlite'
+        if not database_path.exists():
+            with pytest.MonkeyPatch.context() as monkeypatch:
+                monkeypatch.setattr(Config, 'DATABASE_PATH', str(database_path))
+                create_history(storage)
+        return database_path
+    return _create
+
+
+def create_synthetic_project(project_path: Path, commit_count: int) -> Path:
+    """
+    Create a project with the given amount of commits, every commit reuses the
+    jpacman coverage and derives the methods from the covered source files.
+    """
+    with open(TACOCO_FILE) as f:
+        sources = json.load(f)['sources']
+
+    project_path.mkdir(parents=True, exist_ok=True)
+    with open(project_path / 'project.json', 'w') as f:
+        json.dump({'project_name': project_path.name}, f)
+
+    for commit in range(commit_count):
+        sha = f'{commit:040x}'
+        commit_path = project_path / sha
+        commit_path.mkdir()
+
+        with open(commit_path / 'commits.json', 'w') as f:
+            json.dump({'sha': sha, 'author': 'morpheus', 'datetime': f'2022-01-01 00:00:{commit % 60:02d}+00:00'}, f)
+
+        methods = []
+        for source in sources:
+            full_name = source['source']['fullName']
+            first_line, last_line = source['source']['firstLine'], source['source']['lastLine']
+            *package, file_name = full_name.split('/')
+
+            # Split every file in methods of 5 lines, the first method grows
+            # every other commit so not all methods are identical.
+            line_start = first_line
+            for i, line_end in enumerate(range(first_line + 4 + commit % 2, last_line + 5, 5)):
+                methods.append({
+                    'methodDecl': f'void method{i}()',
+                    'methodName': f'method{i}',
+                    'className': file_name[:-len('.java')],
+                    'packageName': '.'.join(package),
+                    'filePath': f'/src/main/java/{full_name}',
+                    'history': [],
+                    'versions': [{'lineStart': line_start, 'lineEnd': min(line_end, last_line)}]
+                })
+                line_start = line_end + 1
+
+        with open(commit_path / 'methods.json', 'w') as f:
+            json.dump(methods, f)
+
+        shutil.copy(TACOCO_FILE, commit_path / 'coverage-cov-matrix.json')
+
+    return project_path
+
+
+@pytest.fixture(scope='session')
+def synthetic_project(tmp_path_factory):
+    def _create(commit_count: int) -> Path:
+        project_path = tmp_path_factory.getbasetemp() / f'synthetic-{commit_count}' / 'synthetic'
+        if not project_path.exists():
+            create_synthetic_project(project_path, commit_count)
+        return project_path
+    return _create
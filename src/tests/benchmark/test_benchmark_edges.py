@@ -0,0 +1,25 @@
+import pytest
+from morpheus.api.endpoints.coverage_routes import MethodTestCoverageRoute
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session
+from morpheus.database.edges import EdgeStorageFormat
+from tests.benchmark.conftest import COMMIT_COUNT
+
+
+def get_coverage(commit_ids):
+    route = MethodTestCoverageRoute()
+    for commit_id in commit_ids:
+        (_, status) = route.get(1, commit_id)
+        assert status == 200
+
+
+@pytest.mark.parametrize('storage', list(EdgeStorageFormat))
+def test_benchmark_commit_coverage_per_edge_storage(benchmark, monkeypatch, history_database, storage):
+    database_path = history_database(storage)
+
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(database_path))
+    create_engine_and_session()
+
+    benchmark.extra_info['commits'] = COMMIT_COUNT
+    benchmark.extra_info['database_bytes'] = database_path.stat().st_size
+    benchmark.pedantic(get_coverage, args=(range(1, COMMIT_COUNT + 1, COMMIT_COUNT // 10),), rounds=3, iterations=1)
@@ -0,0 +1,28 @@
+import pytest
+from pathlib import Path
+from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.models.methods import CoverageEdge, LineCoverage
+from morpheus.database.models.repository import Commit
+from morpheus.commands.db import add_project
+
+
+def store(project_path: Path):
+    engine, session = create_engine_and_session()
+    init_db(engine)
+
+    add_project(session, project_path.name, project_path)
+
+    assert session.query(Commit).count() == len(list(project_path.glob('*/commits.json')))
+    assert session.query(LineCoverage).count() > 0
+    assert session.query(CoverageEdge).count() == session.query(LineCoverage.commit_id, LineCoverage.test_id, LineCoverage.method_version_id).distinct().count()
+
+    session.close()
+
+
+@pytest.mark.parametrize('commit_count', [1, 5, 10])
+def test_benchmark_ingest_time_per_commit(benchmark, synthetic_project, commit_count):
+    project_path = synthetic_project(commit_count)
+
+    benchmark.extra_info['commits'] = commit_count
+    benchmark.pedantic(store, args=(project_path,), rounds=3, iterations=1)
+    benchmark.extra_info['seconds_per_commit'] = benchmark.stats.stats.mean / commit_count
@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+from morpheus.analysis.parser.parsing_engines import parse_tacoco_test_string
+
+RESOURCE_PATH = Path("./tests/resources/")
+
+
+def load_descriptors():
+    with open(RESOURCE_PATH / 'jpacman-coverage-cov-matrix.json') as f:
+        return json.load(f)['testsIndex']
+
+
+def parse_all(descriptors):
+    for descriptor in descriptors:
+        # The index also holds entries that are not tests, e.g., 'end'
+        try:
+            parse_tacoco_test_string(descriptor)
+        except:
+            pass
+
+
+def test_benchmark_parsing_descriptors_cold(benchmark):
+    descriptors = load_descriptors()
+
+    benchmark.extra_info['descriptors'] = len(descriptors)
+    benchmark.pedantic(parse_all, args=(descriptors,), setup=parse_tacoco_test_string.cache_clear, rounds=50, iterations=1)
+
+
+def test_benchmark_parsing_descriptors_cached(benchmark):
+    descriptors = load_descriptors()
+    parse_all(descriptors)
+
+    benchmark.extra_info['descriptors'] = len(descriptors)
+    benchmark(parse_all, descriptors)
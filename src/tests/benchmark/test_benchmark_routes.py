@@ -0,0 +1,90 @@
+import json
+import tracemalloc
+import pytest
+from flask import Flask
+from morpheus.api.logic.coverage import MethodCoverageQuery
+from morpheus.api.logic.formats import dump_json
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.edges import EdgeStorageFormat
+from morpheus.database.models.methods import CommitMethodVersion, CoverageEdge, ProdMethod, ProdMethodVersion, TestMethod
+from morpheus.database.models.repository import Commit, Project
+from morpheus.database.util import row2dict
+from tests.benchmark.conftest import COMMIT_COUNT
+
+COMMIT_IDS = range(1, COMMIT_COUNT + 1, COMMIT_COUNT // 10)
+
+
+def legacy_commit_coverage(session, project: Project, commit: Commit) -> bytes:
+    """
+    The commit coverage as served before the queries were projected to
+    columns, i.e., loading entities and converting them with row2dict.
+    """
+    methods = session.query(ProdMethod) \
+        .join(ProdMethodVersion, ProdMethodVersion.method_id==ProdMethod.id) \
+        .join(CommitMethodVersion, CommitMethodVersion.method_version_id==ProdMethodVersion.id) \
+        .filter(ProdMethod.project_id==project.id, CommitMethodVersion.commit_id==commit.id) \
+        .order_by(ProdMethod.package_name.desc(), ProdMethod.class_name.desc(), ProdMethod.method_decl.desc()) \
+        .all()
+
+    tests = session.query(TestMethod) \
+        .join(CoverageEdge, CoverageEdge.test_id==TestMethod.id) \
+        .filter(TestMethod.project_id==project.id, CoverageEdge.commit_id==commit.id) \
+        .distinct() \
+        .order_by(TestMethod.package_name.desc(), TestMethod.class_name.desc(), TestMethod.method_name.desc()) \
+        .all()
+
+    edges = session.query(CoverageEdge.test_id, CoverageEdge.method_id, CoverageEdge.test_result) \
+        .filter(CoverageEdge.commit_id==commit.id) \
+        .all()
+
+    return (json.dumps({
+        "project": row2dict(project),
+        "commit": row2dict(commit),
+        "coverage": {
+            "methods": list(map(row2dict, methods)),
+            "tests": list(map(row2dict, tests)),
+            "edges": [{'test_id': e[0], 'method_id': e[1], 'test_result': e[2]} for e in edges],
+        }
+    }) + "\n").encode()
+
+
+def projected_commit_coverage(session, project: Project, commit: Commit) -> bytes:
+    return dump_json({
+        "project": row2dict(project),
+        "commit": row2dict(commit),
+        "coverage": {
+            "methods": MethodCoverageQuery.get_methods(session, project, commit),
+            "tests": MethodCoverageQuery.get_tests(session, project, commit),
+            "edges": MethodCoverageQuery.get_edges(session, commit),
+        }
+    })
+
+
+@pytest.mark.parametrize('coverage', [legacy_commit_coverage, projected_commit_coverage], ids=['legacy', 'projected'])
+def test_benchmark_commit_coverage_route(benchmark, monkeypatch, history_database, coverage):
+    database_path = history_database(EdgeStorageFormat.FULL)
+
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(database_path))
+    (engine, session) = create_engine_and_session(read_only=True)
+    init_db(engine, read_only=True)
+
+    project = session.query(Project).first()
+    commits = [session.query(Commit).get(commit_id) for commit_id in COMMIT_IDS]
+
+    def serve():
+        for commit in commits:
+            coverage(session, project, commit)
+
+    with Flask(__name__).app_context():
+        assert json.loads(coverage(session, project, commits[0])) == json.loads(legacy_commit_coverage(session, project, commits[0]))
+
+        tracemalloc.start()
+        serve()
+        benchmark.extra_info['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        benchmark.pedantic(serve, rounds=5, iterations=1)
+
+    session.remove()
+    engine.dispose()
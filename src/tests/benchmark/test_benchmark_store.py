@@ -0,0 +1,33 @@
+import pytest
+from morpheus.api.endpoints.coverage_routes import MethodTestCoverageRoute
+from morpheus.api.logic import store
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.edges import EdgeStorageFormat
+from tests.benchmark.conftest import COMMIT_COUNT
+
+
+def get_coverage(commit_ids):
+    route = MethodTestCoverageRoute()
+    for commit_id in commit_ids:
+        (_, status) = route.get(1, commit_id)
+        assert status == 200
+
+
+@pytest.mark.parametrize('preload', [False, True])
+def test_benchmark_commit_coverage_preloaded(benchmark, monkeypatch, history_database, preload):
+    database_path = history_database(EdgeStorageFormat.DELTA)
+
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(database_path))
+    monkeypatch.setattr(store, 'coverage_store', None)
+    (engine, session) = create_engine_and_session(read_only=True)
+    init_db(engine, read_only=True)
+
+    if preload:
+        store.load_coverage_store(session)
+
+    benchmark.extra_info['commits'] = COMMIT_COUNT
+    benchmark.pedantic(get_coverage, args=(range(1, COMMIT_COUNT + 1, COMMIT_COUNT // 10),), rounds=3, iterations=1)
+
+    session.remove()
+    engine.dispose()
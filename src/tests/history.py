@@ -0,0 +1,48 @@
+from typing import Dict, Iterable, List, Set, Tuple
+from morpheus.database.edges import KEYFRAME_INTERVAL, EdgeStorageFormat, EdgeWriter
+from morpheus.database.models.methods import CommitMethodVersion, ProdMethod, ProdMethodVersion, SourceFile, TestMethod
+from morpheus.database.models.repository import Commit, Project
+from morpheus.database.util import insert_many
+
+# A covered (test, method, test result) pair, by the index of the test and the method.
+Edge = Tuple[int, int, bool]
+
+
+def store_history(session, project_name: str, method_names: List[str], test_names: List[str], history: Iterable[Tuple[Set[int], Set[Edge]]], storage: EdgeStorageFormat=EdgeStorageFormat.DELTA, keyframe_interval: int=KEYFRAME_INTERVAL) -> Tuple[int, Dict[str, List[int]]]:
+    """
+    Store a project with the given methods and tests. Per commit the history
+    holds the methods that get a new version, a method is part of the commits
+    from its first version on, and the coverage edges of the commit.
+    Returns the id of the project and the ids of its commits, methods and tests.
+    """
+    project = Project(project_name=project_name)
+    session.add(project)
+    session.flush()
+
+    source_file = SourceFile(project_id=project.id, path='Prod.java')
+    methods = [ProdMethod(project_id=project.id, method_name=name, method_decl=f'void {name}()', class_name='Prod', package_name=project_name) for name in method_names]
+    tests = [TestMethod(project_id=project.id, package_name=project_name, class_name='ProdTest', method_name=name) for name in test_names]
+    session.add_all([source_file] + methods + tests)
+    session.flush()
+
+    writer = EdgeWriter(storage, keyframe_interval)
+    versions: Dict[int, ProdMethodVersion] = {}
+    for i, (changed, edges) in enumerate(history):
+        commit = Commit(project_id=project.id, sha=f'{i:040x}', author='morpheus', datetime='2022-01-01', complete=True)
+        session.add(commit)
+        session.flush()
+
+        for index in sorted(changed):
+            versions[index] = ProdMethodVersion(method_id=methods[index].id, commit_id=commit.id, line_start=10 * index + i, line_end=10 * index + 5, source_file_id=source_file.id)
+        session.add_all(versions[index] for index in changed)
+        session.flush()
+
+        insert_many(session, CommitMethodVersion.__table__, ('commit_id', 'method_version_id'), [(commit.id, version.id) for version in versions.values()])
+        writer.store(session, commit, [(tests[test].id, versions[method].id, methods[method].id, result) for test, method, result in edges])
+    session.commit()
+
+    return (project.id, {
+        'commit': [commit_id for (commit_id,) in session.query(Commit.id).filter(Commit.project_id == project.id).order_by(Commit.id)],
+        'method': [method.id for method in methods],
+        'test': [test.id for test in tests],
+    })
@@ -0,0 +1,31 @@
+from typing import Dict, List, Tuple
+from tests.history import store_history
+
+# Per commit the covered (test, method) pairs, the second method changes in
+# the last commit and the third method is only added in the second commit.
+HISTORY = [
+    {(0, 0, True), (1, 0, True), (1, 1, True)},
+    {(0, 0, True), (1, 0, False), (1, 1, True), (2, 2, True)},
+    {(0, 1, True), (1, 0, False), (2, 2, True)},
+]
+
+# Per commit the methods that get a new version.
+VERSIONS = [{0, 1}, {2}, {1}]
+
+
+def canonical(value):
+    """
+    Responses compared regardless of the order of lists the routes do not sort.
+    """
+    if isinstance(value, dict):
+        return {key: canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return sorted((canonical(item) for item in value), key=repr)
+    return value
+
+
+def create_history(session) -> Tuple[int, Dict[str, List[int]]]:
+    """
+    The project of HISTORY stored as deltas, and the ids of its commits, methods and tests.
+    """
+    return store_history(session, 'store', ['b', 'a', 'c'], ['y', 'x', 'z'], zip(VERSIONS, HISTORY), keyframe_interval=2)
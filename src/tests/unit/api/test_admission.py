@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+import unittest
+from flask import Flask
+from flask_restx import Api, Resource
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from morpheus.api.logic.admission import AdmissionControl, heavy, init_admission_control
+from morpheus.api.logic.streaming import RowStream, streamed_response
+from morpheus.database.db import enable_query_deadlines, is_interrupted, set_query_deadline
+
+SLOW_QUERY = """
+    WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < 100000000)
+    SELECT COUNT(*) FROM numbers
+"""
+
+# A query that runs long enough for SQLite to check the deadline.
+BATCH_QUERY = SLOW_QUERY.replace('100000000', '100000')
+
+
+class AdmissionControlTest(unittest.TestCase):
+
+    def test_bounded_queue(self):
+        admission = AdmissionControl(limit=1, queue_size=1, timeout=5)
+        assert admission.acquire()
+
+        results = []
+        waiting = threading.Thread(target=lambda: results.append(admission.acquire()))
+        waiting.start()
+        while admission.waiting == 0:
+            time.sleep(0.01)
+
+        # The queue is full
+        assert not admission.acquire()
+
+        admission.release()
+        waiting.join()
+
+        assert results == [True]
+        assert (admission.admitted, admission.rejected, admission.active) == (2, 1, 1)
+
+    def test_queue_timeout(self):
+        admission = AdmissionControl(limit=1, queue_size=1, timeout=0.05)
+        assert admission.acquire()
+        assert not admission.acquire()
+
+
+class QueryDeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        enable_query_deadlines(self.engine)
+
+    def tearDown(self):
+        set_query_deadline(None)
+        self.engine.dispose()
+
+    def test_slow_query_is_interrupted(self):
+        set_query_deadline(0.05)
+        with self.engine.connect() as connection:
+            with self.assertRaises(OperationalError) as context:
+                connection.exec_driver_sql(SLOW_QUERY).scalar()
+
+        assert is_interrupted(context.exception)
+
+    def test_no_deadline(self):
+        set_query_deadline(None)
+        with self.engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT COUNT(*) FROM (SELECT 1 UNION SELECT 2)").scalar() == 2
+
+
+class LoadSheddingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        app = Flask(__name__)
+        api = Api(app)
+
+        test = self
+
+        @api.route('/heavy')
+        @heavy
+        class HeavyRoute(Resource):
+            def get(self):
+                test.started.set()
+                test.release.wait(5)
+                return {}, 200
+
+        @api.route('/light')
+        class LightRoute(Resource):
+            def get(self):
+                return {}, 200
+
+        self.admission = init_admission_control(app, limit=1, queue_size=0)
+        self.client = app.test_client()
+
+    def test_saturated_worker_sheds_heavy_requests(self):
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(self.client.get('/heavy')))
+        thread.start()
+        self.started.wait(5)
+
+        shed = self.client.get('/heavy')
+        assert shed.status_code == 503
+        assert shed.headers['Retry-After'] == '1'
+        assert self.client.get('/light').status_code == 200
+
+        self.release.set()
+        thread.join()
+
+        assert responses[0].status_code == 200
+        assert self.client.get('/heavy').status_code == 200
+        assert self.admission.active == 0
+
+
+class StreamDeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        enable_query_deadlines(self.engine)
+
+        app = Flask(__name__)
+        api = Api(app)
+
+        engine = self.engine
+
+        def batches():
+            with engine.connect() as connection:
+                for i in range(5):
+                    time.sleep(0.1)
+                    yield [{'batch': i, 'count': connection.exec_driver_sql(BATCH_QUERY).scalar()}]
+
+        @api.route('/stream')
+        @heavy
+        class StreamRoute(Resource):
+            def get(self):
+                return streamed_response({'batches': RowStream(batches())})
+
+        init_admission_control(app, deadline=0.25)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        set_query_deadline(None)
+        self.engine.dispose()
+
+    def test_stream_outlasts_deadline(self):
+        start_time = time.monotonic()
+        response = self.client.get('/stream')
+        body = response.get_data()
+
+        assert time.monotonic() - start_time > 0.25
+        assert response.status_code == 200
+        assert [batch['batch'] for batch in json.loads(body)['batches']] == list(range(5))
@@ -0,0 +1,96 @@
+import unittest
+from flask import Flask
+from werkzeug.exceptions import BadRequest
+from morpheus.api.endpoints import coverage_routes
+from morpheus.api.logic.batch import MAX_BATCH_SIZE, requested_ids
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from tests.unit.api.history import canonical, create_history
+
+# Per kind the batch route, the route of a single item and the key of the item in the batch edges.
+ROUTES = {
+    'commit': (coverage_routes.BatchCommitCoverageRoute, coverage_routes.MethodTestCoverageRoute, 'commit_id'),
+    'method': (coverage_routes.BatchMethodHistoryRoute, coverage_routes.ProdMethodHistoryRoute, 'method_id'),
+    'test': (coverage_routes.BatchTestHistoryRoute, coverage_routes.TestMethodHistoryRoute, 'test_id'),
+}
+
+
+class BatchCoverageTest(unittest.TestCase):
+
+    def setUp(self):
+        Config.DATABASE_PATH = ':memory:'
+        (engine, self.session) = create_engine_and_session()
+        init_db(engine)
+
+        (self.project_id, self.ids) = create_history(self.session)
+        self.app = Flask(__name__)
+
+    def tearDown(self):
+        self.session.remove()
+
+    def batch(self, kind: str, ids: str):
+        with self.app.test_request_context(f'/?ids={ids}'):
+            return ROUTES[kind][0]().get(self.project_id)
+
+    def test_batch_answers_as_single_items(self):
+        for kind, (_, route, key) in ROUTES.items():
+            (response, status) = self.batch(kind, ','.join(map(str, self.ids[kind])))
+            assert status == 200
+            assert response['missing'] == []
+
+            coverage = response['coverage']
+            entities = {name: {entity['id']: entity for entity in coverage[name]} for name in ('commits', 'methods', 'tests')}
+            for entity_id in self.ids[kind]:
+                (expected, status) = route().get(self.project_id, entity_id)
+                if status != 200:
+                    continue
+
+                edges = [{name: value for name, value in sorted(edge.items()) if name != key} for edge in coverage['edges'] if edge[key] == entity_id]
+                assert canonical(edges) == canonical([dict(sorted(edge.items())) for edge in expected['coverage']['edges']])
+                for name in ('commits', 'methods', 'tests'):
+                    assert all(entities[name][entity['id']] == entity for entity in expected['coverage'].get(name, []))
+
+    def test_entities_are_listed_once(self):
+        (response, _) = self.batch('test', ','.join(map(str, self.ids['test'])))
+
+        for name in ('commits', 'methods', 'tests'):
+            ids = [entity['id'] for entity in response['coverage'][name]]
+            assert len(ids) == len(set(ids))
+
+    def test_commits_leave_out_internal_columns(self):
+        (response, _) = self.batch('commit', ','.join(map(str, self.ids['commit'])))
+        (single, _) = coverage_routes.MethodTestCoverageRoute().get(self.project_id, self.ids['commit'][-1])
+
+        for commit in response['coverage']['commits'] + [single['commit']]:
+            assert set(commit) == {'id', 'project_id', 'sha', 'author', 'datetime'}
+
+    def test_missing_ids_are_listed(self):
+        (response, status) = self.batch('method', f"{self.ids['method'][0]},404,404")
+
+        assert status == 200
+        assert response['missing'] == [404]
+        assert [method['id'] for method in response['coverage']['methods']] == [self.ids['method'][0]]
+
+    def test_unknown_project(self):
+        with self.app.test_request_context('/?ids=1'):
+            (_, status) = coverage_routes.BatchCommitCoverageRoute().get(404)
+        assert status == 404
+
+    def test_requested_ids(self):
+        with self.app.test_request_context('/?ids=3,1,,3'):
+            assert requested_ids() == [1, 3]
+        with self.app.test_request_context('/', method='POST', json={'ids': [2, 1, 2]}):
+            assert requested_ids() == [1, 2]
+
+        invalid = [
+            {'query_string': 'ids=1,a'},
+            {'query_string': ''},
+            {'query_string': 'ids=' + ','.join(map(str, range(MAX_BATCH_SIZE + 1)))},
+            {'method': 'POST', 'json': {'ids': ['1']}},
+            {'method': 'POST', 'json': [1, 2]},
+            {'method': 'POST', 'json': 'x'},
+            {'method': 'POST', 'data': 'ids=1'},
+        ]
+        for arguments in invalid:
+            with self.app.test_request_context('/', **arguments), self.assertRaises(BadRequest):
+                requested_ids()
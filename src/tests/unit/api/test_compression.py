@@ -0,0 +1,78 @@
+import gzip
+import json
+import unittest
+from flask import Flask
+from flask_restx import Api, Resource
+from morpheus.api.logic.cache import ENTRY_OVERHEAD, ResponseCache, cached, init_response_cache
+from morpheus.api.logic.compression import init_compression
+
+BODY = {'values': list(range(1000))}
+
+
+class CompressionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        app = Flask(__name__)
+        api = Api(app)
+
+        test = self
+
+        @api.route('/cached')
+        @cached
+        class CachedRoute(Resource):
+            def get(self):
+                test.calls += 1
+                return BODY, 200
+
+        @api.route('/small')
+        class SmallRoute(Resource):
+            def get(self):
+                return {'value': 1}, 200
+
+        self.cache = init_response_cache(app, 'generation', 1 << 20)
+        self.compressor = init_compression(app, level=6, min_size=1024)
+        self.client = app.test_client()
+
+    def test_negotiated_encoding(self):
+        response = self.client.get('/cached', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip' and 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == BODY
+
+        identity = self.client.get('/cached')
+        assert 'Content-Encoding' not in identity.headers and identity.get_json() == BODY
+        assert (response.headers['ETag'], identity.headers['ETag']) == ('"generation-gzip"', '"generation"')
+
+    def test_small_bodies_are_not_compressed(self):
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers and response.get_json() == {'value': 1}
+
+    def test_cached_bodies_are_compressed_once(self):
+        bodies = [self.client.get('/cached', headers={'Accept-Encoding': 'gzip'}).data for _ in range(3)]
+
+        assert bodies[0] == bodies[1] == bodies[2] and self.calls == 1
+        (compressed, reused, input_bytes, output_bytes, _) = self.compressor.statistics['gzip']
+        assert (compressed, reused) == (1, 2) and output_bytes < input_bytes
+
+    def test_cached_responses_are_compressed_on_demand(self):
+        self.client.get('/cached')
+        for _ in range(2):
+            response = self.client.get('/cached', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['X-Cache'] == 'HIT' and json.loads(gzip.decompress(response.data)) == BODY
+        assert self.compressor.statistics['gzip'][:2] == [1, 1]
+
+
+class CompressedEncodingsTest(unittest.TestCase):
+
+    def test_encodings_count_towards_the_size(self):
+        cache = ResponseCache(2 * ENTRY_OVERHEAD + 20)
+        cache.put(('a', (), 'application/json'), b'0123456789', 200, 'application/json', {'gzip': b'01234'})
+        cache.put(('b', (), 'application/json'), b'0123456789', 200, 'application/json')
+        cache.add_encoding(('b', (), 'application/json'), 'gzip', b'01234')
+
+        assert cache.get(('a', (), 'application/json')) is None
+        assert cache.get(('b', (), 'application/json')).encodings == {'gzip': b'01234'}
+        assert cache.stats()['bytes'] == ENTRY_OVERHEAD + 15
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from morpheus.api.endpoints import coverage_routes
+from morpheus.api.logic.store import CoverageStore, _Column
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from tests.unit.api.history import canonical, create_history
+
+
+class CoverageStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        Config.DATABASE_PATH = ':memory:'
+        (engine, self.session) = create_engine_and_session()
+        init_db(engine)
+
+        (self.project_id, self.ids) = create_history(self.session)
+        self.store = CoverageStore.load(self.session)
+
+    def tearDown(self):
+        self.session.remove()
+
+    def test_store_answers_as_database(self):
+        routes = [
+            ('commit', coverage_routes.MethodTestCoverageRoute(), self.store.commit_coverage),
+            ('method', coverage_routes.ProdMethodHistoryRoute(), self.store.method_history),
+            ('test', coverage_routes.TestMethodHistoryRoute(), self.store.test_history),
+        ]
+        for kind, route, answer in routes:
+            for entity_id in self.ids[kind]:
+                (expected, status) = route.get(self.project_id, entity_id)
+                (response, store_status) = answer(self.project_id, entity_id)
+
+                assert store_status == status
+                assert canonical(response) == canonical(expected)
+
+    def test_commit_coverage_is_ordered(self):
+        (response, _) = self.store.commit_coverage(self.project_id, self.ids['commit'][1])
+
+        assert [method['method_name'] for method in response['coverage']['methods']] == ['c', 'b', 'a']
+        assert [test['method_name'] for test in response['coverage']['tests']] == ['z', 'y', 'x']
+
+    def test_unknown_entities_are_left_to_database(self):
+        assert self.store.commit_coverage(self.project_id, 404) is None
+        assert self.store.method_history(404, self.ids['method'][0]) is None
+        assert self.store.test_history(self.project_id, 'test') is None
+
+
+class ColumnTest(unittest.TestCase):
+
+    def test_values_are_kept(self):
+        columns = [[3, None, 1], ['métodö', None, ''], ['a', 'bc', 'd'], [None, None, None], [1.5, None, 'x']]
+        rows = np.array([2, 0, 1, 0])
+
+        for values in columns:
+            assert _Column(values).get(rows) == [values[row] for row in rows.tolist()]
+
+    def test_no_object_per_row(self):
+        column = _Column(['x', 'yz', 'w'])
+        assert isinstance(column.text, str) and column.offsets.tolist() == [0, 1, 3, 4]
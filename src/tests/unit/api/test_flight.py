@@ -0,0 +1,139 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+from flask import Flask
+from flask_restx import Api, Resource
+from morpheus.api.logic import cache
+from morpheus.api.logic.cache import cached, init_response_cache
+from morpheus.api.logic.flight import FlightResult, SharedFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        app = Flask(__name__)
+        api = Api(app)
+
+        test = self
+
+        @api.route('/slow/<value>')
+        @cached
+        class SlowRoute(Resource):
+            def get(self, value):
+                test.calls += 1
+                time.sleep(0.2)
+                if value == 'error':
+                    raise ValueError(value)
+                return {'value': value}, 200
+
+        init_response_cache(app, 'generation', 0)
+        self.client = app.test_client()
+
+    def request_concurrently(self, path: str, count: int):
+        responses = [None] * count
+
+        def request(i):
+            responses[i] = self.client.get(path)
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_concurrent_requests_are_computed_once(self):
+        responses = self.request_concurrently('/slow/1', 4)
+
+        assert self.calls == 1
+        assert sorted(response.headers['X-Cache'] for response in responses) == ['COALESCED'] * 3 + ['MISS']
+        assert len({response.data for response in responses}) == 1
+        assert cache.single_flight.coalesced == 3
+
+    def test_waiting_is_bounded(self):
+        with mock.patch.object(cache, 'FLIGHT_TIMEOUT', 0.05):
+            responses = self.request_concurrently('/slow/1', 2)
+
+        assert self.calls == 1
+        assert sorted(response.status_code for response in responses) == [200, 503]
+        assert [response.headers['Retry-After'] for response in responses if response.status_code == 503] == ['1']
+
+    def test_failures_are_not_shared(self):
+        responses = self.request_concurrently('/slow/error', 2)
+
+        assert self.calls == 2
+        assert [response.status_code for response in responses] == [500, 500]
+
+
+class SharedFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_waiting_worker_reuses_result(self):
+        (first, second) = (SharedFlight(Path(self.directory.name)), SharedFlight(Path(self.directory.name)))
+        key = ('/commits/1', ())
+
+        (lock, result) = first.acquire(key)
+        assert lock is not None and result is None
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(second.acquire(key)))
+        thread.start()
+        time.sleep(0.1)
+        assert not results
+
+        first.release(key, lock, FlightResult(b'{}', 200, 'application/json'))
+        thread.join()
+
+        assert results == [(None, FlightResult(b'{}', 200, 'application/json'))]
+        assert second.coalesced == 1
+
+    def test_expired_result_is_recomputed(self):
+        flight = SharedFlight(Path(self.directory.name), ttl=0)
+        key = ('/commits/1', ())
+
+        (lock, _) = flight.acquire(key)
+        flight.release(key, lock, FlightResult(b'{}', 200, 'application/json'))
+
+        (lock, result) = flight.acquire(key)
+        assert lock is not None and result is None
+        flight.release(key, lock, None)
+
+    def test_waiting_worker_gives_up(self):
+        (first, second) = (SharedFlight(Path(self.directory.name)), SharedFlight(Path(self.directory.name), timeout=0.1))
+        key = ('/commits/1', ())
+
+        (lock, _) = first.acquire(key)
+        start_time = time.monotonic()
+        assert second.acquire(key) == (None, None)
+        assert time.monotonic() - start_time < 1
+
+        first.release(key, lock, None)
+
+    def test_unused_files_are_removed(self):
+        flight = SharedFlight(Path(self.directory.name), ttl=0)
+        keys = [('/commits/1', ()), ('/commits/2', ())]
+
+        (lock, _) = flight.acquire(keys[0])
+        flight.release(keys[0], lock, FlightResult(b'{}', 200, 'application/json'))
+        files = set(Path(self.directory.name).iterdir())
+
+        # Only the lock held while writing the second result is kept.
+        (lock, _) = flight.acquire(keys[1])
+        flight.release(keys[1], lock, FlightResult(b'{}', 200, 'application/json'))
+        remaining = set(Path(self.directory.name).iterdir())
+
+        assert not files & remaining
+        assert [path.suffix for path in remaining] == ['.lock']
+
+        (lock, result) = flight.acquire(keys[0])
+        assert lock is not None and result is None
+        flight.release(keys[0], lock, None)
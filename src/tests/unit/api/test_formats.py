@@ -0,0 +1,108 @@
+import json
+import struct
+import unittest
+from unittest import mock
+from flask import Flask
+from flask_restx import Resource
+from morpheus.api import rest
+from morpheus.api.logic import formats
+from morpheus.api.logic.formats import BINARY, COLUMNAR, columnar, dump_json, pack_binary
+from morpheus.database.util import rows2dicts
+
+DATA = {'lines': {3: [1, 2]}, 'name': 'métodö', 'methods': rows2dicts([(1, None, 'a'), (2, 'b', None)], ('id', 'class_name', 'method_name'))}
+
+COVERAGE = {
+    'commit': {'id': 2, 'sha': 'abc'},
+    'coverage': {
+        'tests': [{'id': 1, 'method_name': 'test'}],
+        'edges': [{'test_id': 1, 'method_id': 3, 'test_result': True}, {'test_id': 1, 'method_id': 4, 'test_result': False}],
+    }
+}
+
+
+def unpack_binary(body: bytes):
+    (header_size,) = struct.unpack_from('<I', body)
+    start = 4 + header_size
+    assert start % formats.ALIGNMENT == 0
+
+    def resolve(value):
+        if isinstance(value, dict) and '$array' in value:
+            typecode = formats.TYPED_ARRAYS[value['$array']]
+            size = struct.calcsize(typecode)
+            offset = start + value['offset']
+            assert offset % size == 0
+            return list(struct.unpack_from(f"<{value['length']}{typecode}", body, offset))
+        if isinstance(value, dict):
+            return {key: resolve(item) for key, item in value.items()}
+        return value
+
+    return resolve(json.loads(body[4:start]))
+
+
+class JsonRepresentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.context = Flask(__name__).app_context()
+        self.context.push()
+
+    def tearDown(self):
+        self.context.pop()
+
+    def test_rows_without_none(self):
+        assert DATA['methods'] == [{'id': 1, 'method_name': 'a'}, {'id': 2, 'class_name': 'b'}]
+
+    @unittest.skipIf(formats.orjson is None, 'orjson is not installed')
+    def test_orjson(self):
+        body = dump_json(DATA)
+
+        assert body.endswith(b'\n')
+        assert json.loads(body) == json.loads(json.dumps(DATA))
+
+    def test_standard_library(self):
+        with mock.patch.object(formats, 'orjson', None):
+            body = dump_json(DATA)
+
+        assert body.endswith(b'\n')
+        assert json.loads(body) == json.loads(json.dumps(DATA))
+
+    def test_columnar(self):
+        assert columnar(DATA)['methods'] == {'id': [1, 2], 'method_name': ['a', None], 'class_name': [None, 'b']}
+        assert columnar(COVERAGE)['coverage']['edges'] == {'test_id': [1, 1], 'method_id': [3, 4], 'test_result': [True, False]}
+
+    def test_binary(self):
+        edges = unpack_binary(pack_binary(COVERAGE))['coverage']['edges']
+
+        assert edges == {'test_id': [1, 1], 'method_id': [3, 4], 'test_result': [1, 0]}
+        assert unpack_binary(pack_binary(DATA))['methods']['method_name'] == ['a', None]
+
+
+class ContentNegotiationTest(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        api = rest.MorpheusApi(app)
+        api.representations = dict(rest.api.representations)
+
+        @api.route('/coverage')
+        class CoverageRoute(Resource):
+            def get(self):
+                return COVERAGE, 200
+
+        self.client = app.test_client()
+
+    def test_json_by_default(self):
+        response = self.client.get('/coverage', headers={'Accept': 'text/html,*/*;q=0.8'})
+
+        assert response.mimetype == 'application/json' and response.get_json() == COVERAGE
+
+    def test_accept(self):
+        response = self.client.get('/coverage', headers={'Accept': COLUMNAR})
+
+        assert response.mimetype == COLUMNAR and 'Accept' in response.headers['Vary']
+        assert json.loads(response.data) == columnar(COVERAGE)
+
+    def test_format_argument(self):
+        response = self.client.get('/coverage?format=binary', headers={'Accept': 'application/json'})
+
+        assert response.mimetype == BINARY
+        assert unpack_binary(response.data)['commit'] == COVERAGE['commit']
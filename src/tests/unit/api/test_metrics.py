@@ -0,0 +1,100 @@
+import json
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from flask import Flask
+from flask_restx import Api, Resource
+from morpheus.api.logic.metrics import LATENCY_BUCKETS, MetricsExporter, WorkerMetrics, init_metrics, merge, render
+
+ROUTE = (('route', '/route'),)
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_histogram_is_cumulative(self):
+        worker = WorkerMetrics()
+        for value in (0.001, 0.02, 20):
+            worker.observe('morpheus_request_duration_seconds', ROUTE, value)
+
+        lines = render(merge([worker.snapshot()])).splitlines()
+
+        assert '# TYPE morpheus_request_duration_seconds histogram' in lines
+        assert 'morpheus_request_duration_seconds_bucket{route="/route",le="0.001"} 1' in lines
+        assert 'morpheus_request_duration_seconds_bucket{route="/route",le="0.025"} 2' in lines
+        assert 'morpheus_request_duration_seconds_bucket{route="/route",le="10"} 2' in lines
+        assert 'morpheus_request_duration_seconds_bucket{route="/route",le="+Inf"} 3' in lines
+        assert 'morpheus_request_duration_seconds_count{route="/route"} 3' in lines
+        assert len([line for line in lines if '_bucket' in line]) == len(LATENCY_BUCKETS) + 1
+
+    def test_label_values_are_escaped(self):
+        worker = WorkerMetrics()
+        worker.inc('morpheus_requests_total', (('route', 'a"b\\c'),))
+
+        assert 'morpheus_requests_total{route="a\\"b\\\\c"} 1' in render(merge([worker.snapshot()]))
+
+
+class MultiprocessMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def stopped_worker(self) -> int:
+        process = subprocess.Popen(['true'])
+        process.wait()
+        return process.pid
+
+    def test_workers_are_summed(self):
+        exporter = MetricsExporter(Path(self.directory.name))
+        exporter.worker.inc('morpheus_requests_total', ROUTE)
+        exporter.worker.inc('morpheus_requests_in_flight', (), 1)
+
+        stopped = WorkerMetrics()
+        stopped.inc('morpheus_requests_total', ROUTE, 2)
+        stopped.inc('morpheus_requests_in_flight', (), 3)
+        with open(Path(self.directory.name) / f'{self.stopped_worker()}.json', 'w') as f:
+            json.dump(stopped.snapshot(), f)
+
+        metrics = exporter.collect()
+
+        assert metrics['morpheus_requests_total'] == {ROUTE: 3}
+        # Nothing is in flight in a stopped worker.
+        assert metrics['morpheus_requests_in_flight'] == {(): 1}
+
+    def test_stopped_workers_of_previous_server_are_removed(self):
+        path = Path(self.directory.name) / f'{self.stopped_worker()}.json'
+        path.write_text('{}')
+
+        MetricsExporter(Path(self.directory.name))
+
+        assert not path.exists()
+
+
+class RequestMetricsTest(unittest.TestCase):
+
+    def test_requests_are_recorded(self):
+        app = Flask(__name__)
+        api = Api(app)
+
+        @api.route('/items/<item_id>')
+        class ItemRoute(Resource):
+            def get(self, item_id):
+                return {'id': item_id}, 200 if item_id != 'missing' else 404
+
+        exporter = init_metrics(app)
+        client = app.test_client()
+        for item_id in ('1', '2', 'missing'):
+            client.get(f'/items/{item_id}')
+
+        metrics = exporter.collect()
+        route = (('route', '/items/<item_id>'),)
+
+        assert metrics['morpheus_requests_total'] == {
+            route + (('method', 'GET'), ('status', '200')): 2,
+            route + (('method', 'GET'), ('status', '404')): 1,
+        }
+        assert metrics['morpheus_request_duration_seconds'][route][-1] == 3
+        assert metrics['morpheus_requests_in_flight'] == {(): 0}
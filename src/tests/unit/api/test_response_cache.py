@@ -0,0 +1,98 @@
+import gzip
+import unittest
+from flask import Flask
+from flask_restx import Api, Resource
+from morpheus.api.logic.cache import ENTRY_OVERHEAD, ResponseCache, cached, init_response_cache
+from morpheus.api.logic.formats import COLUMNAR
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_least_recently_used_are_evicted(self):
+        cache = ResponseCache(3 * (ENTRY_OVERHEAD + 10))
+        for key in ('a', 'b', 'c'):
+            cache.put((key, ()), b'0123456789', 200, 'application/json')
+
+        assert cache.get(('a', ())) is not None
+        cache.put(('d', ()), b'0123456789', 200, 'application/json')
+
+        assert cache.get(('b', ())) is None
+        assert [cache.get((key, ())) is not None for key in ('a', 'c', 'd')] == [True, True, True]
+        assert cache.stats() == {'hits': 4, 'misses': 1, 'evictions': 1, 'not_modified': 0, 'entries': 3, 'bytes': 3 * (ENTRY_OVERHEAD + 10)}
+
+    def test_oversized_bodies_are_not_cached(self):
+        cache = ResponseCache(ENTRY_OVERHEAD + 10)
+        cache.put(('a', ()), b'0123456789a', 200, 'application/json')
+
+        assert len(cache) == 0
+
+
+class ConditionalRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        app = Flask(__name__)
+        api = Api(app)
+
+        test = self
+
+        @api.route('/cached/<value>')
+        @cached
+        class CachedRoute(Resource):
+            def get(self, value):
+                test.calls += 1
+                return {'value': value}, 200
+
+        @api.route('/uncached/<value>')
+        class UncachedRoute(Resource):
+            def get(self, value):
+                test.calls += 1
+                return {'value': value}, 200
+
+        self.cache = init_response_cache(app, 'generation', 1 << 20, compress=True)
+        self.client = app.test_client()
+
+    def test_cached_responses(self):
+        first = self.client.get('/cached/1')
+        second = self.client.get('/cached/1')
+
+        assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+        assert first.data == second.data and self.calls == 1
+        assert second.headers['ETag'] == '"generation"'
+
+        compressed = self.client.get('/cached/1', headers={'Accept-Encoding': 'gzip'})
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.data) == first.data
+
+    def test_encodings_have_their_own_etag(self):
+        identity = self.client.get('/cached/1')
+        compressed = self.client.get('/cached/1', headers={'Accept-Encoding': 'gzip'})
+
+        assert (identity.headers['ETag'], compressed.headers['ETag']) == ('"generation"', '"generation-gzip"')
+
+        response = self.client.get('/cached/1', headers={'If-None-Match': '"generation-gzip"', 'Accept-Encoding': 'gzip'})
+        assert response.status_code == 304 and response.headers['ETag'] == '"generation-gzip"'
+        assert self.client.get('/cached/1', headers={'If-None-Match': '"generation-deflate"'}).status_code == 200
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.client.get('/cached/1', headers={'If-None-Match': '"generation"'})
+
+        assert response.status_code == 304 and self.calls == 0
+        assert self.client.get('/cached/1', headers={'If-None-Match': '"other"'}).status_code == 200
+        assert self.cache.stats()['not_modified'] == 1
+
+    def test_uncached_routes(self):
+        self.client.get('/uncached/1')
+        response = self.client.get('/uncached/1', headers={'If-None-Match': '"generation"'})
+
+        assert response.status_code == 200 and self.calls == 2
+        assert 'ETag' not in response.headers
+
+    def test_formats_are_cached_separately(self):
+        self.client.get('/cached/1')
+        columnar = self.client.get('/cached/1', headers={'Accept': COLUMNAR})
+        again = self.client.get('/cached/1', headers={'Accept': COLUMNAR})
+
+        assert (columnar.headers['X-Cache'], again.headers['X-Cache']) == ('MISS', 'HIT')
+        assert again.headers['ETag'] == '"generation-columnar"' and 'Accept' in again.headers['Vary']
+        assert self.client.get('/cached/1', headers={'If-None-Match': '"generation"', 'Accept': COLUMNAR}).status_code == 200
@@ -0,0 +1,68 @@
+import json
+import unittest
+from flask import Flask
+from werkzeug.exceptions import BadRequest
+from morpheus.api.logic.coverage import TestQuery
+from morpheus.api.logic.pagination import Page, paginated, requested_page
+from morpheus.api.logic.streaming import RowStream, streamed_response
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.models.methods import TestMethod
+from morpheus.database.models.repository import Project
+
+
+class StreamedResponseTest(unittest.TestCase):
+
+    def test_streamed_as_buffered(self):
+        app = Flask(__name__)
+        data = {'project': {'id': 1, 'name': 'métodö'}, 'coverage': {'tests': [{'id': 1}, {'id': 2}, {'id': 3}], 'edges': []}}
+
+        with app.test_request_context('/?stream=1'):
+            response = streamed_response({
+                'project': data['project'],
+                'coverage': {'tests': RowStream(iter([[{'id': 1}, {'id': 2}], [], [{'id': 3}]])), 'edges': RowStream(iter([]))}
+            })
+            body = b''.join(response.response)
+
+        assert response.is_streamed and body.endswith(b'\n')
+        assert json.loads(body) == data
+
+
+class PaginationTest(unittest.TestCase):
+
+    def setUp(self):
+        Config.DATABASE_PATH = ':memory:'
+        (engine, self.session) = create_engine_and_session()
+        init_db(engine)
+
+        project = Project(project_name='pages')
+        self.session.add(project)
+        self.session.flush()
+        self.project_id = project.id
+
+        self.session.add_all([TestMethod(project_id=project.id, package_name='pages', class_name='PageTest', method_name=f'test{i}') for i in range(5)])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.remove()
+
+    def test_requested_page(self):
+        app = Flask(__name__)
+        with app.test_request_context('/'):
+            assert requested_page() is None
+        with app.test_request_context('/?after=3'):
+            assert requested_page() == Page(3, 1000)
+        for arguments in ('after=x', 'limit=0', 'limit=100000'):
+            with app.test_request_context(f'/?{arguments}'), self.assertRaises(BadRequest):
+                requested_page()
+
+    def test_pages_cover_the_list(self):
+        (tests, after) = ([], 0)
+        while after is not None:
+            page = Page(after, 2)
+            response = paginated('tests', TestQuery.get_project_tests(self.session, self.project_id, page), page)
+            tests += response['tests']
+            after = response['next']
+
+        assert [test['method_name'] for test in tests] == [f'test{i}' for i in range(5)]
+        assert tests == TestQuery.get_project_tests(self.session, self.project_id)
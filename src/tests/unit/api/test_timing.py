@@ -0,0 +1,34 @@
+import re
+import unittest
+from flask import Flask
+from flask_restx import Api, Resource
+from sqlalchemy import create_engine
+from morpheus.api.logic.timing import init_request_timing
+from morpheus.database.instrumentation import instrument_engine
+
+
+class RequestTimingTest(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        instrument_engine(engine)
+
+        app = Flask(__name__)
+        api = Api(app)
+        init_request_timing(app, api)
+
+        @api.route('/query')
+        class QueryRoute(Resource):
+            def get(self):
+                with engine.connect() as connection:
+                    rows = connection.exec_driver_sql("SELECT 1 UNION SELECT 2").all()
+                return {'rows': len(rows)}, 200
+
+        self.client = app.test_client()
+
+    def test_server_timing(self):
+        with self.assertLogs('morpheus.api.logic.timing', level='INFO') as logs:
+            response = self.client.get('/query')
+
+        assert re.fullmatch(r'db;dur=[\d.]+;desc="1 queries, 2 rows", serialize;dur=[\d.]+, total;dur=[\d.]+', response.headers['Server-Timing'])
+        assert 'path=/query status=200 cache=- queries=1 rows=2' in logs.output[0]
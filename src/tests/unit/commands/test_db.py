@@ -0,0 +1,196 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from morpheus.analysis.parser.tacoco import TacocoParser
+from morpheus.commands.db import _checksum, _parse_commits, add_project
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, deferred_indexes, init_db
+from morpheus.database.models.methods import LineCoverage, TestMethod
+from morpheus.database.models.repository import Commit, Project
+from morpheus.matrix import parse_arguments
+
+# Per commit the lines, relative to the first line of the source, covered by each test.
+COVERAGE = {
+    'a': [[0, 1, 5], [6]],
+    'b': [[0, 6], [1, 2, 7]],
+}
+
+FIRST_LINE = 10
+
+
+def write_commit(project_path: Path, sha: str, coverage: list):
+    commit_path = project_path / sha
+    commit_path.mkdir(exist_ok=True)
+
+    (commit_path / 'commits.json').write_text(json.dumps({'sha': sha, 'author': 'morpheus', 'datetime': '2022-01-01'}))
+    (commit_path / 'methods.json').write_text(json.dumps([
+        {
+            'methodDecl': f'void {name}()', 'methodName': name, 'className': 'Main', 'packageName': 'app',
+            'filePath': '/src/main/java/app/Main.java', 'history': [],
+            'versions': [{'lineStart': FIRST_LINE + start, 'lineEnd': FIRST_LINE + start + 4, 'properties': {}}]
+        }
+        for name, start in (('run', 0), ('stop', 5))
+    ]))
+    (commit_path / 'coverage-cov-matrix.json').write_text(json.dumps({
+        'testCount': len(coverage) + 1,
+        'testsIndex': [f'test{i}(app.MainTest)' for i in range(len(coverage))],
+        'sources': [{
+            'source': {'fullName': 'app/Main.java', 'firstLine': FIRST_LINE, 'lastLine': FIRST_LINE + 9},
+            'activatingTests': list(range(len(coverage))),
+            'testStmtMatrix': [[line in lines for line in range(10)] for lines in coverage],
+        }],
+    }))
+
+
+class AddProjectTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.project_path = Path(self.directory.name) / 'app'
+        self.project_path.mkdir()
+        (self.project_path / 'project.json').write_text(json.dumps({'project_name': 'app'}))
+        for sha, coverage in COVERAGE.items():
+            write_commit(self.project_path, sha, coverage)
+
+        Config.DATABASE_PATH = ':memory:'
+        (engine, self.session) = create_engine_and_session()
+        init_db(engine)
+
+    def tearDown(self):
+        self.session.remove()
+        self.directory.cleanup()
+
+    def commits(self):
+        return {sha: (commit_id, complete) for commit_id, sha, complete in self.session.query(Commit.id, Commit.sha, Commit.complete)}
+
+    def lines(self):
+        rows = self.session.query(Commit.sha, TestMethod.method_name, LineCoverage.line_number) \
+            .join(Commit, Commit.id == LineCoverage.commit_id) \
+            .join(TestMethod, TestMethod.id == LineCoverage.test_id)
+        return sorted(rows)
+
+    def expected_lines(self, coverage):
+        return sorted((sha, f'test{i}', FIRST_LINE + line) for sha, tests in coverage.items() for i, lines in enumerate(tests) for line in lines)
+
+    def test_project_is_stored(self):
+        add_project(self.session, 'app', self.project_path)
+
+        assert {sha: complete for sha, (_, complete) in self.commits().items()} == {'a': True, 'b': True}
+        assert self.lines() == self.expected_lines(COVERAGE)
+
+    def test_unchanged_commits_are_skipped(self):
+        add_project(self.session, 'app', self.project_path)
+        commits = self.commits()
+
+        with mock.patch.object(TacocoParser, 'parse_file') as parse_file, mock.patch.object(TacocoParser, 'store') as store:
+            add_project(self.session, 'app', self.project_path)
+
+        parse_file.assert_not_called()
+        store.assert_not_called()
+        assert self.commits() == commits
+        assert self.lines() == self.expected_lines(COVERAGE)
+
+    def test_changed_commit_is_replaced_in_place(self):
+        add_project(self.session, 'app', self.project_path)
+        commits = self.commits()
+
+        coverage = {**COVERAGE, 'a': [[2, 3], [8, 9]]}
+        write_commit(self.project_path, 'a', coverage['a'])
+        add_project(self.session, 'app', self.project_path)
+
+        assert self.commits() == commits
+        assert self.lines() == self.expected_lines(coverage)
+
+    def test_interrupted_commit_is_stored_again(self):
+        with mock.patch.object(TacocoParser, 'store', side_effect=RuntimeError('interrupted')):
+            add_project(self.session, 'app', self.project_path)
+
+        # The marker outlives the failed transaction, rows left behind by a crash are removed.
+        commits = self.commits()
+        assert {sha: complete for sha, (_, complete) in commits.items()} == {'a': False, 'b': False}
+        assert self.lines() == []
+
+        self.session.add(LineCoverage(commit_id=commits['a'][0], test_id=1, method_version_id=1, line_number=1, test_result=True, source_file_id=1))
+        self.session.commit()
+
+        add_project(self.session, 'app', self.project_path)
+
+        assert self.commits() == {sha: (commit_id, True) for sha, (commit_id, _) in commits.items()}
+        assert self.lines() == self.expected_lines(COVERAGE)
+
+
+class ParseCommitsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.project_path = Path(self.directory.name)
+        self.commits = []
+        for i in range(7):
+            write_commit(self.project_path, str(i), COVERAGE['a'])
+            self.commits.append((str(i), self.project_path / str(i)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_results_keep_commit_order(self):
+        (self.project_path / '3' / 'methods.json').write_text('[')
+        stored_commits = {'5': _checksum(self.project_path / '5')}
+
+        results = list(_parse_commits(self.commits, stored_commits, jobs=2))
+
+        assert [sha for sha, _ in results] == [sha for sha, _ in self.commits]
+        for sha, result in results:
+            if sha == '3':
+                assert isinstance(result, ValueError)
+            elif sha == '5':
+                assert result is None
+            else:
+                (commit_json, _, _, _) = result
+                assert commit_json['sha'] == sha
+
+    def test_processes_parse_as_a_single_process(self):
+        (self.project_path / '1' / 'coverage-cov-matrix.json').unlink()
+
+        single = [(sha, type(result)) for sha, result in _parse_commits(self.commits, {}, jobs=1)]
+        parallel = [(sha, type(result)) for sha, result in _parse_commits(self.commits, {}, jobs=3)]
+
+        assert parallel == single
+        assert [sha for sha, result in single if issubclass(result, Exception)] == ['1']
+
+
+class CreateDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_path = Config.DATABASE_PATH
+
+        # Linked projects, as the scripts store a selection of the analyzed projects.
+        (self.analyzed, self.selected) = (Path(self.directory.name) / 'analyzed', Path(self.directory.name) / 'selected')
+        self.selected.mkdir()
+        for name in ('app', 'lib'):
+            project_path = self.analyzed / name
+            project_path.mkdir(parents=True)
+            (project_path / 'project.json').write_text(json.dumps({'project_name': name}))
+            write_commit(project_path, 'a', COVERAGE['a'])
+            (self.selected / name).symlink_to(project_path)
+
+    def tearDown(self):
+        Config.DATABASE_PATH = self.database_path
+        self.directory.cleanup()
+
+    def test_all_projects_are_stored_in_one_bulk_load(self):
+        database = Path(self.directory.name) / 'all.sqlite'
+
+        with mock.patch('sys.argv', ['matrix', 'db', '--bulk-load', '-j', '1', '--all', str(self.selected), str(database)]), \
+                mock.patch('morpheus.commands.db.deferred_indexes', wraps=deferred_indexes) as deferred:
+            args = parse_arguments()
+            args.func(args)
+
+        deferred.assert_called_once()
+        (engine, session) = create_engine_and_session()
+        assert sorted(name for (name,) in session.query(Project.project_name)) == ['app', 'lib']
+        assert session.query(Commit).filter(Commit.complete).count() == 2
+        session.remove()
+        engine.dispose()
@@ -0,0 +1,47 @@
+import unittest
+from sqlalchemy import inspect
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, deferred_indexes, init_db
+from morpheus.database.models.methods import CoverageEdge, CoverageEdgeDelta
+
+
+class DeferredIndexesTest(unittest.TestCase):
+
+    def setUp(self):
+        Config.DATABASE_PATH = ':memory:'
+        (self.engine, self.session) = create_engine_and_session()
+        init_db(self.engine)
+
+        self.tables = [CoverageEdge.__table__, CoverageEdgeDelta.__table__]
+        self.expected = self.indexes()
+        assert all(self.expected.values())
+
+    def tearDown(self):
+        self.session.remove()
+
+    def indexes(self):
+        inspector = inspect(self.engine)
+        return {table.name: sorted(index['name'] for index in inspector.get_indexes(table.name)) for table in self.tables}
+
+    def analyzed(self):
+        with self.engine.connect() as connection:
+            return connection.exec_driver_sql("SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_stat1'").scalar()
+
+    def test_indexes_are_dropped_and_recreated(self):
+        with deferred_indexes(self.engine, self.tables):
+            assert self.indexes() == {table.name: [] for table in self.tables}
+
+        assert self.indexes() == self.expected
+        assert self.analyzed()
+
+    def test_indexes_are_recreated_when_loading_fails(self):
+        with self.assertRaises(RuntimeError), deferred_indexes(self.engine, self.tables):
+            raise RuntimeError('loading failed')
+
+        assert self.indexes() == self.expected
+
+    def test_without_tables_nothing_changes(self):
+        with deferred_indexes(self.engine, []):
+            assert self.indexes() == self.expected
+
+        assert not self.analyzed()
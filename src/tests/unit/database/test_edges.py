@@ -0,0 +1,72 @@
+import unittest
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.edges import EdgeStorageFormat, EdgeWriter, commit_edges, history_edges, materialize_dependents
+from morpheus.database.models.repository import Commit, Project
+
+HISTORY = [
+    {(1, 10, 100, True), (2, 10, 100, True), (2, 20, 200, True)},
+    {(1, 10, 100, True), (2, 10, 100, False), (2, 20, 200, True)},
+    {(1, 10, 100, True), (2, 10, 100, False), (2, 20, 200, True), (3, 30, 300, True)},
+    {(1, 11, 100, True), (2, 10, 100, False), (2, 20, 200, True), (3, 30, 300, True)},
+]
+
+
+class EdgeWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        Config.DATABASE_PATH = ':memory:'
+        (engine, self.session) = create_engine_and_session()
+        init_db(engine)
+
+        project = Project(project_name='edges')
+        self.session.add(project)
+        self.session.flush()
+
+        self.project_id = project.id
+        self.commits = []
+        for i in range(len(HISTORY)):
+            commit = Commit(project_id=project.id, sha=str(i), author='morpheus', datetime='2022-01-01')
+            self.session.add(commit)
+            self.commits.append(commit)
+        self.session.flush()
+
+    def tearDown(self):
+        self.session.remove()
+
+    def store(self, writer: EdgeWriter):
+        for commit, edges in zip(self.commits, HISTORY):
+            writer.store(self.session, commit, edges)
+        self.session.flush()
+
+    def test_delta_commits_rebuild_edges(self):
+        self.store(EdgeWriter(EdgeStorageFormat.DELTA, keyframe_interval=3))
+
+        assert [commit.edge_base_id for commit in self.commits] == [None, self.commits[0].id, self.commits[1].id, None]
+        for commit, edges in zip(self.commits, HISTORY):
+            assert commit_edges(self.session, commit.id) == edges
+
+    def test_full_commits_are_keyframes(self):
+        self.store(EdgeWriter(EdgeStorageFormat.FULL))
+
+        assert all(commit.edge_base_id is None for commit in self.commits)
+        assert commit_edges(self.session, self.commits[2].id) == HISTORY[2]
+
+    def test_history_edges(self):
+        self.store(EdgeWriter(EdgeStorageFormat.DELTA))
+
+        expected = sorted((commit.id, edge) for commit, edges in zip(self.commits, HISTORY) for edge in edges if edge[0] == 2)
+        assert sorted(history_edges(self.session, self.project_id, 'test_id', 2)) == expected
+
+        expected = sorted((commit.id, edge) for commit, edges in zip(self.commits, HISTORY) for edge in edges if edge[2] in (100, 300))
+        assert sorted(history_edges(self.session, self.project_id, 'method_id', [100, 300])) == expected
+
+    def test_materialize_dependents(self):
+        self.store(EdgeWriter(EdgeStorageFormat.DELTA))
+
+        materialize_dependents(self.session, self.commits[0].id)
+
+        assert self.commits[1].edge_base_id is None
+        assert self.commits[2].edge_base_id == self.commits[1].id
+        for commit, edges in zip(self.commits, HISTORY):
+            assert commit_edges(self.session, commit.id) == edges
@@ -0,0 +1,74 @@
+import unittest
+from morpheus.config import Config
+from morpheus.database.db import create_engine_and_session, init_db
+from morpheus.database.identity import NaturalKeyResolver
+from morpheus.database.models.methods import ProdMethod
+from morpheus.database.models.repository import Project
+
+KEY = ('package_name', 'class_name', 'method_decl')
+
+
+def method(name: str) -> dict:
+    return {'package_name': 'org.morpheus', 'class_name': 'Matrix', 'method_name': name, 'method_decl': f'void {name}()'}
+
+
+class NaturalKeyResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        Config.DATABASE_PATH = ':memory:'
+        (engine, self.session) = create_engine_and_session()
+        init_db(engine)
+
+        projects = [Project(project_name='identity'), Project(project_name='other')]
+        self.session.add_all(projects)
+        self.session.flush()
+        (self.project_id, self.other_id) = (project.id for project in projects)
+
+    def tearDown(self):
+        self.session.remove()
+
+    def resolver(self, project_id: int | None=None) -> NaturalKeyResolver:
+        return NaturalKeyResolver(ProdMethod, KEY, project_id or self.project_id)
+
+    def stored(self):
+        return {(row.project_id, row.method_name): row.id for row in self.session.query(ProdMethod).all()}
+
+    def test_new_keys_are_inserted_once(self):
+        ids = self.resolver().resolve(self.session, [method('a'), method('b'), method('a')])
+
+        stored = self.stored()
+        assert len(stored) == 2
+        assert ids == [stored[(self.project_id, 'a')], stored[(self.project_id, 'b')], stored[(self.project_id, 'a')]]
+
+    def test_existing_keys_keep_their_id(self):
+        resolver = self.resolver()
+        [first] = resolver.resolve(self.session, [method('a')])
+
+        assert resolver.resolve(self.session, [method('b'), method('a')])[1] == first
+        assert self.resolver().resolve(self.session, [method('a')]) == [first]
+        assert len(self.stored()) == 2
+
+    def test_conflicting_insert_resolves_existing_id(self):
+        # Loaded before the other resolver inserts the method, so the insert conflicts.
+        late = self.resolver()
+        late.resolve(self.session, [method('a')])
+        [b] = self.resolver().resolve(self.session, [method('b')])
+
+        assert late.resolve(self.session, [method('b'), method('c')])[0] == b
+        assert sorted(name for (_, name) in self.stored()) == ['a', 'b', 'c']
+
+    def test_keys_are_per_project(self):
+        [own] = self.resolver().resolve(self.session, [method('a')])
+        [other] = self.resolver(self.other_id).resolve(self.session, [method('a')])
+
+        assert own != other
+        assert self.stored() == {(self.project_id, 'a'): own, (self.other_id, 'a'): other}
+
+    def test_reset_reloads_ids(self):
+        resolver = self.resolver()
+        [first] = resolver.resolve(self.session, [method('a')])
+        resolver.reset()
+
+        assert len(resolver) == 0
+        assert resolver.resolve(self.session, [method('a')]) == [first]
+        assert len(resolver) == 1
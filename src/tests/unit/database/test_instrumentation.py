@@ -0,0 +1,41 @@
+import unittest
+from sqlalchemy import create_engine
+from morpheus.database import instrumentation
+from morpheus.database.instrumentation import collect_statistics, instrument_engine, stop_statistics
+
+NUMBERS = """
+    WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < ?)
+    SELECT n FROM numbers
+"""
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+
+    def tearDown(self):
+        stop_statistics()
+        instrumentation.slow_query_time = None
+        self.engine.dispose()
+
+    def test_queries_and_rows_are_counted(self):
+        instrument_engine(self.engine)
+        statistics = collect_statistics()
+
+        with self.engine.connect() as connection:
+            assert len(connection.exec_driver_sql(NUMBERS, (100,)).all()) == 100
+            assert connection.exec_driver_sql(NUMBERS, (10,)).first() == (1,)
+
+        assert (statistics.queries, statistics.rows) == (2, 101)
+        assert statistics.duration > 0
+
+    def test_slow_queries_are_logged_with_plan(self):
+        instrument_engine(self.engine, slow_query_ms=1e-6)
+
+        with self.assertLogs(instrumentation.logger, level='WARNING') as logs:
+            with self.engine.connect() as connection:
+                connection.exec_driver_sql(NUMBERS, (100,)).all()
+
+        assert 'WITH RECURSIVE' in logs.output[0]
+        assert 'SCAN numbers' in logs.output[0]
@@ -0,0 +1,26 @@
+import unittest
+from morpheus.database.lineset import LineSetEncoding, decode_lines, encode_lines
+
+
+class LineSetTest(unittest.TestCase):
+
+    def test_dense_lines_use_bitmap(self):
+        lines = list(range(100, 140)) + [150]
+        blob = encode_lines(lines)
+
+        assert blob[0] == LineSetEncoding.BITMAP
+        assert decode_lines(blob) == lines
+
+    def test_sparse_lines_use_deltas(self):
+        lines = [3, 400, 12000]
+        blob = encode_lines(lines)
+
+        assert blob[0] == LineSetEncoding.DELTAS
+        assert decode_lines(blob) == lines
+
+    def test_lines_are_sorted_and_unique(self):
+        assert decode_lines(encode_lines([12, 10, 11, 10])) == [10, 11, 12]
+
+    def test_empty_and_single_line(self):
+        assert decode_lines(encode_lines([])) == []
+        assert decode_lines(encode_lines([1])) == [1]
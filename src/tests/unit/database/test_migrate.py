@@ -0,0 +1,84 @@
+import unittest
+from sqlalchemy import create_engine
+from morpheus.database.db import init_db, migrate_db, requires_migration
+from morpheus.database.models import Base
+
+OLD_SCHEMA = [
+    """CREATE TABLE method_versions (
+        id INTEGER NOT NULL PRIMARY KEY, method_id INTEGER NOT NULL, commit_id INTEGER NOT NULL,
+        line_start INTEGER NOT NULL, line_end INTEGER NOT NULL, file_path VARCHAR NOT NULL,
+        UNIQUE (method_id, commit_id, file_path)
+    )""",
+    "CREATE INDEX ix_method_versions_file_path ON method_versions (file_path)",
+    """CREATE TABLE linecoverage (
+        id INTEGER NOT NULL PRIMARY KEY, commit_id INTEGER NOT NULL, test_id INTEGER NOT NULL,
+        method_version_id INTEGER NOT NULL, test_result BOOLEAN NOT NULL, full_name VARCHAR NOT NULL,
+        line_number INTEGER NOT NULL
+    )""",
+    "CREATE INDEX ix_linecoverage_commit_id ON linecoverage (commit_id)",
+    "INSERT INTO projects (id, project_name) VALUES (1, 'migrate')",
+    "INSERT INTO commits (id, project_id, sha, author, datetime, complete) VALUES (1, 1, 'a', 'morpheus', '2022-01-01', 1)",
+    "INSERT INTO prodmethods (id, project_id, method_name, method_decl, class_name, package_name) VALUES (1, 1, 'run', 'void run()', 'Main', 'app')",
+    "INSERT INTO method_versions VALUES (1, 1, 1, 10, 20, '/src/main/java/app/Main.java')",
+    "INSERT INTO linecoverage VALUES (1, 1, 1, 1, 1, 'app/Main.java', 12), (2, 1, 1, 1, 1, 'app/Main.java', 11)",
+]
+
+
+class MigrateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+
+        tables = [Base.metadata.tables[name] for name in ('projects', 'commits', 'prodmethods')]
+        Base.metadata.create_all(bind=self.engine, tables=tables)
+
+        with self.engine.begin() as connection:
+            for statement in OLD_SCHEMA:
+                connection.exec_driver_sql(statement)
+
+    def test_outdated_schema_requires_migration(self):
+        assert requires_migration(self.engine)
+
+        with self.assertRaises(RuntimeError):
+            init_db(self.engine)
+
+    def test_migrate_interns_paths(self):
+        migrate_db(self.engine)
+        init_db(self.engine)
+
+        assert not requires_migration(self.engine)
+
+        with self.engine.connect() as connection:
+            assert connection.exec_driver_sql("""
+                SELECT method_versions.id, source_files.path FROM method_versions
+                JOIN source_files ON source_files.id = method_versions.source_file_id
+            """).all() == [(1, '/src/main/java/app/Main.java')]
+
+            assert connection.exec_driver_sql("""
+                SELECT linecoverage.line_number, source_files.path FROM linecoverage
+                JOIN source_files ON source_files.id = linecoverage.source_file_id
+            """).all() == [(11, 'app/Main.java'), (12, 'app/Main.java')]
+
+            # Backfilled from the migrated tables
+            assert connection.exec_driver_sql("SELECT commit_id, test_id, method_version_id FROM coverage_edges").all() == [(1, 1, 1)]
+
+    def test_duplicate_rows_are_left_out(self):
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql("INSERT INTO linecoverage VALUES (3, 1, 1, 1, 1, 'app/Main.java', 12)")
+
+        with self.assertLogs('morpheus.database.db', 'WARNING'):
+            migrate_db(self.engine)
+
+        with self.engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT line_number FROM linecoverage ORDER BY line_number").scalars().all() == [11, 12]
+
+    def test_conflicting_rows_abort_migration(self):
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql("INSERT INTO linecoverage VALUES (3, 1, 1, 1, 0, 'app/Main.java', 12)")
+
+        with self.assertRaises(RuntimeError):
+            migrate_db(self.engine)
+
+        assert requires_migration(self.engine)
+        with self.engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT COUNT(*) FROM linecoverage").scalar() == 3
@@ -0,0 +1,98 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from sqlalchemy import exc
+from morpheus.config import Config
+from morpheus.database.db import READ_ONLY_POOL_SIZE, create_engine_and_session, init_db
+from morpheus.database.models import Base
+from morpheus.database.models.repository import Project
+
+
+class ReadOnlyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_path = Config.DATABASE_PATH
+        Config.DATABASE_PATH = str(Path(self.directory.name) / 'read only.sqlite')
+
+    def tearDown(self):
+        Config.DATABASE_PATH = self.database_path
+        self.directory.cleanup()
+
+    def create_database(self):
+        (engine, session) = create_engine_and_session()
+        init_db(engine)
+
+        session.add(Project(project_name='read-only'))
+        session.commit()
+        session.remove()
+        engine.dispose()
+
+    def test_queries_but_never_writes(self):
+        self.create_database()
+        (engine, session) = create_engine_and_session(read_only=True)
+        init_db(engine, read_only=True)
+
+        assert [project.project_name for project in session.query(Project).all()] == ['read-only']
+        assert session.execute('PRAGMA query_only').scalar() == 1
+
+        session.add(Project(project_name='written'))
+        with self.assertRaises(exc.OperationalError):
+            session.commit()
+
+        session.remove()
+        engine.dispose()
+
+    def test_threads_share_connections(self):
+        self.create_database()
+        (engine, session) = create_engine_and_session(read_only=True)
+
+        def query():
+            return session.query(Project.project_name).all()
+
+        # More threads than connections in the pool, querying at the same time.
+        barrier = threading.Barrier(4 * READ_ONLY_POOL_SIZE)
+        results = []
+        errors = []
+        def run():
+            try:
+                barrier.wait()
+                for _ in range(20):
+                    results.append(query())
+                session.remove()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(barrier.parties)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert results == [[('read-only',)]] * 20 * barrier.parties
+        assert engine.pool.checkedin() == READ_ONLY_POOL_SIZE
+
+        # Connections returned by one thread are used by the next.
+        def connection_id():
+            with engine.connect() as connection:
+                return id(connection.connection.dbapi_connection)
+        pooled = {id(record.dbapi_connection) for record in engine.pool._pool.queue}
+        thread = threading.Thread(target=lambda: results.append(connection_id()))
+        thread.start()
+        thread.join()
+        assert results[-1] in pooled
+
+        engine.dispose()
+
+    def test_outdated_database_is_refused(self):
+        (engine, _) = create_engine_and_session()
+        Base.metadata.tables['projects'].create(bind=engine)
+        engine.dispose()
+
+        (engine, _) = create_engine_and_session(read_only=True)
+        with self.assertRaises(RuntimeError):
+            init_db(engine, read_only=True)
+
+        engine.dispose()
@@ -0,0 +1,52 @@
+import copy
+import unittest
+from morpheus.analysis.parser.methods import MethodParser
+
+
+class MethodContentHashTest(unittest.TestCase):
+
+    method = {
+        "methodDecl": "boolean hasOption(char)",
+        "methodName": "hasOption",
+        "className": "CommandLine",
+        "packageName": "org.apache.commons.cli",
+        "filePath": "/src/main/java/org/apache/commons/cli/CommandLine.java",
+        "history": [],
+        "versions": [{"lineStart": 76, "lineEnd": 79, "properties": {"method_size": 4}}]
+    }
+
+    def parse_version(self, method):
+        [(_, version)] = MethodParser().parse([method])
+        return version
+
+    def test_unchanged_method_has_same_hash(self):
+        version = self.parse_version(MethodContentHashTest.method)
+        same_version = self.parse_version(copy.deepcopy(MethodContentHashTest.method))
+
+        assert version.content_hash == same_version.content_hash
+
+    def test_moved_method_has_other_hash(self):
+        moved_method = copy.deepcopy(MethodContentHashTest.method)
+        moved_method['versions'][0]['lineStart'] += 1
+        moved_method['versions'][0]['lineEnd'] += 1
+
+        assert self.parse_version(MethodContentHashTest.method).content_hash != self.parse_version(moved_method).content_hash
+
+    def test_changed_body_with_same_lines_keeps_hash(self):
+        # methods.json holds no body, a changed body only shows in the lines or properties.
+        changed_body = copy.deepcopy(MethodContentHashTest.method)
+        changed_body['history'] = ['changed']
+
+        assert self.parse_version(MethodContentHashTest.method).content_hash == self.parse_version(changed_body).content_hash
+
+    def test_reported_body_hash_is_part_of_hash(self):
+        (first, second) = (copy.deepcopy(MethodContentHashTest.method), copy.deepcopy(MethodContentHashTest.method))
+        first['versions'][0]['bodyHash'] = 'a'
+        second['versions'][0]['bodyHash'] = 'b'
+
+        hashes = {self.parse_version(method).content_hash for method in (MethodContentHashTest.method, first, second)}
+        assert len(hashes) == 3
+
+    def test_hash_without_extra_content_is_unchanged(self):
+        # Versions stored before further content was hashed keep being shared.
+        assert self.parse_version(MethodContentHashTest.method).content_hash == '222177d1a8c082cb548fa51750d9db0274cda9e0'
@@ -0,0 +1,35 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from morpheus.analysis.util.json_stream import stream_json_object
+
+
+class JsonStreamTest(unittest.TestCase):
+
+    def test_stream_jpacman_with_small_chunks(self):
+        tacoco_file = Path('./tests/resources/jpacman-coverage-cov-matrix.json')
+
+        with open(tacoco_file) as f:
+            tacoco_dict = json.load(f)
+
+        streamed = {}
+        for key, value in stream_json_object(tacoco_file, ['testsIndex', 'sources'], chunk_size=7):
+            if key in ('testsIndex', 'sources'):
+                streamed.setdefault(key, []).append(value)
+            else:
+                streamed[key] = value
+
+        assert streamed == tacoco_dict
+
+    def test_stream_numbers_and_empty_arrays(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'stream.json'
+            path.write_text('{ "count" : 12345 , "items": [ ], "values": [1, 22, 333] }')
+
+            assert list(stream_json_object(path, ['items', 'values'], chunk_size=2)) == [
+                ('count', 12345),
+                ('values', 1),
+                ('values', 22),
+                ('values', 333),
+            ]
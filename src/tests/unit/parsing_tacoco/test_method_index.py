@@ -0,0 +1,32 @@
+import unittest
+from morpheus.analysis.util.method_index import MethodVersionIndex
+
+
+class MethodVersionIndexTest(unittest.TestCase):
+
+    versions = [
+        (1, "/src/main/java/org/example/Foo.java", 10, 20),
+        (2, "/src/main/java/org/example/Foo.java", 22, 30),
+        (3, "/src/main/java/org/example/Foo.java", 12, 14),
+        (4, "/src/main/java/org/example/Bar.java", 1, 5),
+    ]
+
+    def test_lookup_line_in_method(self):
+        index = MethodVersionIndex(MethodVersionIndexTest.versions)
+
+        assert index.lookup("org/example/Foo.java", 10) == 1
+        assert index.lookup("org/example/Foo.java", 25) == 2
+        assert index.lookup("org/example/Bar.java", 5) == 4
+
+    def test_lookup_line_outside_methods(self):
+        index = MethodVersionIndex(MethodVersionIndexTest.versions)
+
+        assert index.lookup("org/example/Foo.java", 21) is None
+        assert index.lookup("org/example/Foo.java", 31) is None
+        assert index.lookup("org/example/Baz.java", 10) is None
+
+    def test_lookup_nested_method_returns_outermost(self):
+        index = MethodVersionIndex(MethodVersionIndexTest.versions)
+
+        assert index.lookup("org/example/Foo.java", 13) == 1
+        assert index.lookup("org/example/Foo.java", 15) == 1
@@ -13,4 +13,30 @@ class TacocoParsingTest(unittest.TestCase):
         coverage = TacocoParser() \
             .parse(tacoco_coverage)
 
-        assert len(coverage) == 45 # One less because of 'end' method
+        assert len(coverage.tests) == 45 # One less because of 'end' method
+        assert len(coverage) == 5518
+
+    def test_parsing_jpacman_streaming(self):
+        tacoco_file = Path('./tests/resources/jpacman-coverage-cov-matrix.json')
+
+        coverage = TacocoParser() \
+            .parse(load_json(tacoco_file))
+
+        streamed_coverage = TacocoParser() \
+            .parse_file(tacoco_file)
+
+        assert len(streamed_coverage.tests) == len(coverage.tests)
+        assert len(streamed_coverage) == len(coverage)
+        assert streamed_coverage.source_files == coverage.source_files
+        assert (streamed_coverage.line_number == coverage.line_number).all()
+        assert (streamed_coverage.test_idx == coverage.test_idx).all()
+
+    def test_source_lines_are_contiguous(self):
+        coverage = TacocoParser() \
+            .parse_file(Path('./tests/resources/jpacman-coverage-cov-matrix.json'))
+
+        assert len(coverage.source_ptr) == len(coverage.source_files) + 1
+        assert coverage.source_ptr[-1] == len(coverage)
+        for source_id, (start, end) in enumerate(zip(coverage.source_ptr[:-1], coverage.source_ptr[1:])):
+            assert start < end
+            assert (coverage.source_idx[start:end] == source_id).all()